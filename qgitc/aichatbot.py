@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import bisect
 import re
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 
 from PySide6.QtCore import QEvent, QPoint, QPointF, QRectF, Qt, Signal
@@ -37,6 +39,38 @@ from qgitc.findpanel import FindPanel
 from qgitc.llm import AiResponse, AiRole
 from qgitc.markdownhighlighter import MarkdownHighlighter
 
+# Max number of find matches to keep, the others are only counted
+_MAX_FIND_MATCHES = 10000
+# Max number of queries whose matches are cached
+_MAX_CACHED_FINDS = 16
+
+# The chars take two positions in QTextDocument
+_astral_re = re.compile("[\U00010000-\U0010FFFF]")
+
+
+class _PlainText:
+    """ The plain text of document, maps between the str index
+    and the document position """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._indices = []
+        self._positions = []
+        if not text.isascii():
+            self._indices = [m.start() for m in _astral_re.finditer(text)]
+            self._positions = [index + i for i,
+                               index in enumerate(self._indices)]
+
+    def toPosition(self, index: int):
+        if not self._indices:
+            return index
+        return index + bisect.bisect_left(self._indices, index)
+
+    def toIndex(self, position: int):
+        if not self._positions:
+            return position
+        return position - bisect.bisect_left(self._positions, position)
+
 
 class AiChatHeaderData(QTextBlockUserData):
 
@@ -117,7 +151,18 @@ class AiChatbot(QPlainTextEdit):
         # Find panel state
         self._findPanel: Optional[FindPanel] = None
         self._findMatches: List[Tuple[int, int]] = []
+        self._findMoreCount = 0
         self._findCurrentIndex: int = -1
+        # (text, flags) of `_findMatches`
+        self._findQuery: Optional[Tuple[str, int]] = None
+        # the first changed position since `_findMatches` computed
+        self._findDirtyPos: Optional[int] = None
+        # (text, flags) => (matches, moreCount) of current document
+        self._findCache = OrderedDict()
+        self._plainText: _PlainText = None
+        self.document().contentsChange.connect(self._onContentsChange)
+        self.verticalScrollBar().valueChanged.connect(
+            self._updateFindHighlights)
 
         # Enable mouse tracking for hover effects
         self.setMouseTracking(True)
@@ -256,12 +301,32 @@ class AiChatbot(QPlainTextEdit):
 
     def _clearFindState(self):
         self._findMatches = []
+        self._findMoreCount = 0
         self._findCurrentIndex = -1
+        self._findQuery = None
+        self._findCache.clear()
         # Clear highlights
         self.setExtraSelections([])
 
+    def _onContentsChange(self, position: int, charsRemoved: int, charsAdded: int):
+        self._plainText = None
+        self._findCache.clear()
+        if self._findDirtyPos is None or position < self._findDirtyPos:
+            self._findDirtyPos = position
+
+    def _updateFindMatches(self, text: str, flags: int):
+        self._findMatches, self._findMoreCount = self._computeFindMatches(
+            text, flags)
+        self._findQuery = (text, flags)
+        self._findDirtyPos = None
+
+    def _updateFindStatus(self):
+        if self._findPanel:
+            self._findPanel.updateStatus(
+                self._findCurrentIndex, len(self._findMatches), moreCount=self._findMoreCount)
+
     def _onFindRequested(self, text: str, flags: int):
-        self._findMatches = self._computeFindMatches(text, flags)
+        self._updateFindMatches(text, flags)
 
         if not self._findMatches:
             self._findCurrentIndex = -1
@@ -272,45 +337,31 @@ class AiChatbot(QPlainTextEdit):
 
         cur = self.textCursor()
         selStart, selEnd = cur.selectionStart(), cur.selectionEnd()
+        # the matches never overlap, so they are sorted by both ends
+        i = bisect.bisect_left(self._findMatches, (selStart,))
         idx = -1
 
         if cur.hasSelection():
             # 1) Exact match (keeps index stable when toggling flags)
-            for i, (s, e) in enumerate(self._findMatches):
-                if s == selStart and e == selEnd:
-                    idx = i
-                    break
-
             # 2) Same start (keeps incremental typing anchored)
-            if idx == -1:
-                for i, (s, _) in enumerate(self._findMatches):
-                    if s == selStart:
-                        idx = i
-                        break
+            if i < len(self._findMatches) and self._findMatches[i][0] == selStart:
+                idx = i
 
             # 3) Contains selection start (handles cases where selection was shorter/longer)
-            if idx == -1:
-                for i, (s, e) in enumerate(self._findMatches):
-                    if s <= selStart < e:
-                        idx = i
-                        break
+            elif i > 0 and selStart < self._findMatches[i - 1][1]:
+                idx = i - 1
 
             # 4) Fallback: next match after the current selection end
-            if idx == -1:
+            else:
                 pos = selEnd
-                idx = 0
-                for i, (s, _) in enumerate(self._findMatches):
-                    if s >= pos:
-                        idx = i
-                        break
+                idx = bisect.bisect_left(self._findMatches, (pos,))
         else:
             # No selection: pick the next match at/after the caret.
             pos = cur.position()
+            idx = bisect.bisect_left(self._findMatches, (pos,))
+
+        if idx >= len(self._findMatches):
             idx = 0
-            for i, (s, _) in enumerate(self._findMatches):
-                if s >= pos:
-                    idx = i
-                    break
         self._findCurrentIndex = idx
         self._selectFindMatch(self._findCurrentIndex)
 
@@ -322,9 +373,8 @@ class AiChatbot(QPlainTextEdit):
             self._findPanel.updateStatus(0, 0)
             return
 
-        matches = self._computeFindMatches(
-            self._findPanel.text, self._findPanel.flags)
-        self._findMatches = matches
+        self._updateFindMatches(self._findPanel.text, self._findPanel.flags)
+        matches = self._findMatches
 
         if not matches:
             self._findCurrentIndex = -1
@@ -336,10 +386,9 @@ class AiChatbot(QPlainTextEdit):
         if preserveSelection:
             cur = self.textCursor()
             selStart, selEnd = cur.selectionStart(), cur.selectionEnd()
-            for i, (s, e) in enumerate(matches):
-                if s == selStart and e == selEnd:
-                    idx = i
-                    break
+            i = bisect.bisect_left(matches, (selStart, selEnd))
+            if i < len(matches) and matches[i] == (selStart, selEnd):
+                idx = i
 
         if idx < 0:
             idx = 0
@@ -348,7 +397,7 @@ class AiChatbot(QPlainTextEdit):
 
         self._findCurrentIndex = idx
         self._applyFindHighlights(matches, idx)
-        self._findPanel.updateStatus(idx, len(matches))
+        self._updateFindStatus()
 
     def _findNext(self):
         if not self._findMatches:
@@ -382,8 +431,12 @@ class AiChatbot(QPlainTextEdit):
         self.centerCursor()
 
         self._applyFindHighlights(self._findMatches, index)
-        if self._findPanel:
-            self._findPanel.updateStatus(index, len(self._findMatches))
+        self._updateFindStatus()
+
+    def _updateFindHighlights(self):
+        if self._findMatches:
+            self._applyFindHighlights(
+                self._findMatches, self._findCurrentIndex)
 
     def _applyFindHighlights(self, matches: List[Tuple[int, int]], currentIndex: int):
         if not matches:
@@ -397,12 +450,22 @@ class AiChatbot(QPlainTextEdit):
         curBg.setAlpha(170)
 
         selections: List[QTextEdit.ExtraSelection] = []
-
-        # Safety cap: don't highlight an extreme number of matches.
-        maxHighlights = 2000
         doc = self.document()
 
-        for i, (s, e) in enumerate(matches[:maxHighlights]):
+        # Only the visible matches need to be highlighted,
+        # they are updated when scrolled
+        begin = self.firstVisibleBlock().position()
+        lastBlock = self.cursorForPosition(
+            QPoint(0, self.viewport().height())).block()
+        end = lastBlock.position() + lastBlock.length()
+
+        first = bisect.bisect_left(matches, (begin,))
+        if first > 0 and matches[first - 1][1] > begin:
+            first -= 1
+        last = bisect.bisect_left(matches, (end,))
+
+        for i in range(first, last):
+            s, e = matches[i]
             sel = QTextEdit.ExtraSelection()
             sel.cursor = QTextCursor(doc)
             sel.cursor.setPosition(s)
@@ -414,48 +477,113 @@ class AiChatbot(QPlainTextEdit):
 
         self.setExtraSelections(selections)
 
-    def _computeFindMatches(self, text: str, flags: int) -> List[Tuple[int, int]]:
-        if not text:
-            return []
-
-        plain = self.document().toPlainText()
-
-        if flags & FindFlags.UseRegExp:
-            pattern = text
-            if flags & FindFlags.WholeWords:
-                pattern = rf"\b(?:{pattern})\b"
-
-            reFlags = re.MULTILINE
-            if not (flags & FindFlags.CaseSenitively):
-                reFlags |= re.IGNORECASE
-
-            try:
-                rx = re.compile(pattern, reFlags)
-            except re.error:
-                return []
-
-            matches: List[Tuple[int, int]] = []
-            for m in rx.finditer(plain):
-                if m.start() == m.end():
-                    continue
-                matches.append((m.start(), m.end()))
-            return matches
-
-        qtFlags = QTextDocument.FindFlags()
-        if flags & FindFlags.CaseSenitively:
-            qtFlags |= QTextDocument.FindCaseSensitively
+    def _documentText(self):
+        if self._plainText is None:
+            self._plainText = _PlainText(self.document().toPlainText())
+        return self._plainText
+
+    @staticmethod
+    def _toFindPattern(text: str, flags: int):
+        pattern = text if flags & FindFlags.UseRegExp else re.escape(text)
         if flags & FindFlags.WholeWords:
-            qtFlags |= QTextDocument.FindWholeWords
+            pattern = rf"\b(?:{pattern})\b"
+
+        reFlags = re.MULTILINE
+        if not (flags & FindFlags.CaseSenitively):
+            reFlags |= re.IGNORECASE
 
+        try:
+            return re.compile(pattern, reFlags)
+        except re.error:
+            return None
+
+    @staticmethod
+    def _scanFindMatches(rx: re.Pattern, plain: _PlainText, begin: int,
+                         matches: List[Tuple[int, int]]):
+        """ Append the matches from index `begin` to `matches`, return
+        the count of the ones beyond _MAX_FIND_MATCHES """
+        moreCount = 0
+        for m in rx.finditer(plain.text, begin):
+            s, e = m.span()
+            if s == e:
+                continue
+            if len(matches) >= _MAX_FIND_MATCHES:
+                moreCount += 1
+            else:
+                matches.append((plain.toPosition(s), plain.toPosition(e)))
+        return moreCount
+
+    def _computeFindMatches(self, text: str, flags: int) -> Tuple[List[Tuple[int, int]], int]:
+        if not text:
+            return [], 0
+
+        key = (text, flags)
+        cached = self._findCache.get(key)
+        if cached is not None:
+            self._findCache.move_to_end(key)
+            return cached
+
+        rx = self._toFindPattern(text, flags)
+        if rx is None:
+            return [], 0
+
+        plain = self._documentText()
+        literal = not (flags & FindFlags.UseRegExp)
         matches: List[Tuple[int, int]] = []
-        cursor = QTextCursor(self.document())
-        cursor.movePosition(QTextCursor.Start)
-        while True:
-            cursor = self.document().find(text, cursor, qtFlags)
-            if cursor.isNull():
-                break
-            matches.append((cursor.selectionStart(), cursor.selectionEnd()))
-        return matches
+        moreCount = None
+
+        if literal and self._findQuery == key and self._findDirtyPos is not None:
+            # only rescan from the changed position, the matches end
+            # before it are the same as literal text has no lookahead
+            dirtyPos = self._findDirtyPos
+            matches = self._findMatches[:bisect.bisect_left(
+                self._findMatches, (dirtyPos,))]
+            if matches and matches[-1][1] >= dirtyPos:
+                matches.pop()
+            begin = plain.toIndex(matches[-1][1]) if matches else 0
+            moreCount = self._scanFindMatches(rx, plain, begin, matches)
+        elif literal and not (flags & FindFlags.WholeWords):
+            # narrow down the matches of the longest cached prefix
+            def _isPrefix(prefix: str):
+                if flags & FindFlags.CaseSenitively:
+                    return text.startswith(prefix)
+                return prefix.isascii() and text.lower().startswith(prefix.lower())
+
+            prefixMatches = None
+            prefixLen = 0
+            for (prefix, prefixFlags), (found, more) in self._findCache.items():
+                if prefixFlags == flags and more == 0 and \
+                        len(prefix) > prefixLen and _isPrefix(prefix):
+                    prefixMatches = found
+                    prefixLen = len(prefix)
+
+            if prefixMatches is not None:
+                # each match starts inside a match of the prefix, as the
+                # prefix matches there or is skipped by an overlapping one
+                end = 0
+                for s, e in prefixMatches:
+                    for i in range(max(plain.toIndex(s), end), plain.toIndex(e)):
+                        m = rx.match(plain.text, i)
+                        if m:
+                            matches.append((plain.toPosition(i),
+                                            plain.toPosition(m.end())))
+                            end = m.end()
+                            break
+                moreCount = 0
+
+        if moreCount is None:
+            moreCount = self._scanFindMatches(rx, plain, 0, matches)
+
+        self._findCache[key] = (matches, moreCount)
+        if len(self._findCache) > _MAX_CACHED_FINDS:
+            self._findCache.popitem(last=False)
+
+        return matches, moreCount
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # the visible matches may be changed
+        self._updateFindHighlights()
 
     def event(self, event):
         if event.type() == QEvent.PaletteChange:
@@ -29,6 +29,7 @@ from qgitc.applicationbase import ApplicationBase, qtVersion
 from qgitc.blamewindow import BlameWindow
 from qgitc.branchcomparewindow import BranchCompareWindow
 from qgitc.colorschema import ColorSchemaDark, ColorSchemaLight, ColorSchemaMode
+from qgitc.commitgraph import CommitGraphThread
 from qgitc.commitwindow import CommitWindow
 from qgitc.common import dataDirPath, logger
 from qgitc.events import (
@@ -94,6 +95,7 @@ class Application(ApplicationBase):
         # blocking the UI and without QThread.terminate().
         self._orphanedThreads: List[QThread] = []
         self._findSubmoduleThread: FindSubmoduleThread = None
+        self._commitGraphThread: CommitGraphThread = None
         self._submodules: List[str] = []
 
         gitBin = self._settings.gitBinPath() or shutil.which("git")
@@ -414,6 +416,7 @@ class Application(ApplicationBase):
         Git.REPO_DIR = repoDir
         if reloadSubmodules:
             self._updateSubmodules()
+        self._updateCommitGraph()
         self.repoDirChanged.emit()
 
         return True
@@ -684,8 +687,31 @@ class Application(ApplicationBase):
 
         self.submoduleSearchCompleted.emit()
 
+    def _updateCommitGraph(self):
+        if self.testing or not Git.available() or not Git.REPO_DIR:
+            return
+        if not self._settings.writeCommitGraph():
+            return
+        # --changed-paths is added in git 2.27
+        if not Git.versionGE(2, 27, 0):
+            return
+
+        # let the running one finish, it writes for the old repo
+        if self._commitGraphThread:
+            self._commitGraphThread.requestInterruption()
+
+        self._commitGraphThread = CommitGraphThread(Git.REPO_DIR, self)
+        self._commitGraphThread.finished.connect(
+            self._onThreadFinished)
+        self._threads.append(self._commitGraphThread)
+
+        self._commitGraphThread.start(QThread.LowestPriority)
+
     def _onThreadFinished(self):
         thread = self.sender()
+        if thread == self._commitGraphThread:
+            self._commitGraphThread = None
+
         if thread in self._threads:
             self._threads.remove(thread)
 
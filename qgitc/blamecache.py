@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import hashlib
+import json
+import os
+import re
+import zlib
+from collections import OrderedDict
+from typing import List
+
+from qgitc.blameline import BlameTable
+from qgitc.common import logger
+
+__all__ = ["BlameCache", "BlameResult"]
+
+# The blame results kept in memory
+_MAX_CACHED_BLAMES = 16
+# The blame results kept in the disk cache dir
+_MAX_DISK_BLAMES = 256
+# Bump it if the disk format changed
+_DISK_VERSION = 1
+
+# Only the blame of a full sha1 never changes
+_immutable_rev_re = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+
+
+class BlameResult:
+    """ The file content and blame of a finished blame """
+
+    __slots__ = ("lines", "table")
+
+    def __init__(self, lines: List[bytes], table: BlameTable):
+        self.lines = lines
+        self.table = table
+
+
+class BlameCache:
+    """ LRU cache of the blame results of immutable revisions,
+    optionally backed by a disk cache dir """
+
+    def __init__(self, maxCount=_MAX_CACHED_BLAMES, diskDir: str = None):
+        self._maxCount = maxCount
+        self._results = OrderedDict()
+        self.diskDir = diskDir
+
+    @staticmethod
+    def makeKey(repoDir: str, rev: str, file: str, ignoreWhitespace: bool):
+        """ Return the key of the blame, None if it can't be cached """
+        if not rev or not _immutable_rev_re.match(rev):
+            return None
+
+        path = os.path.normcase(os.path.normpath(os.path.join(repoDir, file)))
+        repoDir = os.path.normcase(os.path.normpath(repoDir))
+        return (repoDir, rev, path, bool(ignoreWhitespace))
+
+    def get(self, key):
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        result = self._loadFromDisk(key)
+        if result is not None:
+            self._addResult(key, result)
+        return result
+
+    def put(self, key, result: BlameResult):
+        self._addResult(key, result)
+        self._saveToDisk(key, result)
+
+    def clear(self):
+        self._results.clear()
+
+    def _addResult(self, key, result: BlameResult):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self._maxCount:
+            self._results.popitem(last=False)
+
+    def _diskFile(self, key):
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.diskDir, name + ".blame")
+
+    def _loadFromDisk(self, key):
+        if not self.diskDir:
+            return None
+
+        diskFile = self._diskFile(key)
+        try:
+            with open(diskFile, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning("Invalid blame cache %s: %s", diskFile, e)
+            return None
+
+        if data.get("version") != _DISK_VERSION or data.get("key") != list(key):
+            return None
+
+        try:
+            # for pruning the least recently used ones
+            os.utime(diskFile)
+        except OSError:
+            pass
+
+        content = base64.b64decode(data["content"])
+        lines = content.split(b"\n") if data["lineCount"] else []
+        return BlameResult(lines, BlameTable.fromData(data["table"]))
+
+    def _saveToDisk(self, key, result: BlameResult):
+        if not self.diskDir:
+            return
+
+        data = {
+            "version": _DISK_VERSION,
+            "key": list(key),
+            "lineCount": len(result.lines),
+            "content": base64.b64encode(b"\n".join(result.lines)).decode("ascii"),
+            "table": result.table.toData(),
+        }
+
+        try:
+            os.makedirs(self.diskDir, exist_ok=True)
+            with open(self._diskFile(key), "wb") as f:
+                f.write(zlib.compress(json.dumps(data).encode("utf-8")))
+        except OSError as e:
+            logger.warning("Failed to write blame cache: %s", e)
+            return
+
+        self._pruneDisk()
+
+    def _pruneDisk(self):
+        try:
+            files = [os.path.join(self.diskDir, name)
+                     for name in os.listdir(self.diskDir)
+                     if name.endswith(".blame")]
+            if len(files) <= _MAX_DISK_BLAMES:
+                return
+
+            # drop the least recently used ones
+            files.sort(key=os.path.getmtime)
+            for file in files[:len(files) - _MAX_DISK_BLAMES]:
+                os.remove(file)
+        except OSError as e:
+            logger.warning("Failed to prune blame cache: %s", e)
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import os
 from datetime import datetime
 
 from PySide6.QtCore import Signal
 
-from qgitc.blameline import BlameLine
+from qgitc.blameline import BlameCommit, BlameLine
 from qgitc.common import logger
 from qgitc.datafetcher import DataFetcher
+from qgitc.gitutils import Git
 
 
 def _timeStr(data):
@@ -21,66 +23,74 @@ def _decode(data: bytes):
 
 
 class BlameFetcher(DataFetcher):
+    """ Fetch the `git blame --incremental` of a file, the lines
+    of each group are emitted as soon as git finds the commit """
 
     dataAvailable = Signal(list)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._curLine = BlameLine()
+        # sha1 => BlameCommit, the headers of a commit
+        # are only given at its first group
+        self._commits = {}
 
     def parse(self, data: bytes):
         results = []
-        # TODO: support utf16 32 split...
         lines = data.rstrip(self.separator).split(self.separator)
         for line in lines:
-            if line[0] == 9:  # \t
-                self._curLine.text = line[1:]
-                results.append(self._curLine)
-                self._curLine = BlameLine()
-            elif line[0] == 97 and line[1] == 117:  # author
+            commit = self._curLine.commit
+            if line[0] == 97 and line[1] == 117:  # author
                 if line[6] == 32:  # "author "
-                    self._curLine.author = _decode(line[7:])
+                    commit.author = _decode(line[7:])
                 elif line[7] == 109:  # "author-mail "
-                    self._curLine.authorMail = _decode(line[12:])
+                    commit.authorMail = _decode(line[12:])
                 elif line[8] == 105:  # "author-time "
-                    self._curLine.authorTime = _timeStr(line[12:])
+                    commit.authorTime = _timeStr(line[12:])
                 elif line[8] == 122:  # "author-tz "
-                    assert (self._curLine.authorTime is not None)
-                    self._curLine.authorTime += _decode(line[9:])
+                    assert (commit.authorTime is not None)
+                    commit.authorTime += _decode(line[9:])
                 else:
                     logger.warning("Invalid line: %s", line)
             elif line[0] == 99 and line[1] == 111:  # committer
                 if line[9] == 32:  # "committer "
-                    self._curLine.committer = _decode(line[10:])
+                    commit.committer = _decode(line[10:])
                 elif line[10] == 109:  # "committer-mail "
-                    self._curLine.committerMail = _decode(line[15:])
+                    commit.committerMail = _decode(line[15:])
                 elif line[11] == 105:  # "committer-time "
-                    self._curLine.committerTime = _timeStr(line[15:])
+                    commit.committerTime = _timeStr(line[15:])
                 elif line[11] == 122:  # "committer-tz "
-                    assert (self._curLine.committerTime is not None)
-                    self._curLine.committerTime += _decode(line[12:])
+                    assert (commit.committerTime is not None)
+                    commit.committerTime += _decode(line[12:])
                 else:
                     logger.warning("Invalid line: %s", line)
             elif line[0] == 115:  # "summary "
                 pass  # useless
             elif line[0] == 112:  # "previous "
                 parts = line.split(b' ')
-                self._curLine.previous = _decode(parts[1])
-                self._curLine.prevFileName = _decode(parts[2])
+                commit.previous = _decode(parts[1])
+                commit.prevFileName = _decode(parts[2])
             elif line[0] == 102 and line[1] == 105:  # "filename "
-                self._curLine.filename = _decode(line[9:])
+                # the last line of a group
+                commit.filename = _decode(line[9:])
+                results.append(self._curLine)
+                self._curLine = BlameLine()
             elif line[0] == 98 and line[1] == 111:  # boundary
                 pass
             else:
                 parts = line.split(b' ')
-                if len(parts) < 3 or len(parts) > 4:
+                if len(parts) != 4:
                     logger.warning("Invalid line: %s", line)
                 else:
-                    self._curLine.sha1 = _decode(parts[0])
+                    sha1 = _decode(parts[0])
+                    commit = self._commits.get(sha1)
+                    if commit is None:
+                        commit = BlameCommit(sha1)
+                        self._commits[sha1] = commit
+                    self._curLine.commit = commit
                     self._curLine.oldLineNo = int(parts[1])
                     self._curLine.newLineNo = int(parts[2])
-                    if len(parts) == 4:
-                        self._curLine.groupLines = int(parts[3])
+                    self._curLine.groupLines = int(parts[3])
 
         if results:
             self.dataAvailable.emit(results)
@@ -89,10 +99,14 @@ class BlameFetcher(DataFetcher):
         file = args[0]
         rev = args[1]
         ignoreWhitespace = args[2] if len(args) > 2 else False
+        # (begin, end) 1 based lines, blame only the range if given
+        lineRange = args[3] if len(args) > 3 else None
 
-        blameArgs = ["blame", "--porcelain"]
+        blameArgs = ["blame", "--incremental"]
         if ignoreWhitespace:
             blameArgs.append("-w")
+        if lineRange:
+            blameArgs.append("-L%d,%d" % lineRange)
         if rev:
             blameArgs.append(rev)
         blameArgs.extend(["--", file])
@@ -102,3 +116,38 @@ class BlameFetcher(DataFetcher):
     def reset(self):
         super().reset()
         self._curLine = BlameLine()
+        self._commits = {}
+
+
+def splitContentLines(data: bytes):
+    """ Split the file content to lines as git blame counts """
+    # TODO: support utf16 32 split...
+    lines = data.split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class BlameContentFetcher(DataFetcher):
+    """ Fetch the content of file at a revision, so that the source
+    can be shown before blame finished """
+
+    dataAvailable = Signal(list)
+
+    def parse(self, data: bytes):
+        # the data ends with separator except the last chunk
+        lines = splitContentLines(data)
+        if lines:
+            self.dataAvailable.emit(lines)
+
+    def makeArgs(self, args):
+        file = args[0]
+        rev = args[1]
+
+        cwd = self.cwd or Git.REPO_DIR
+        if os.path.isabs(file):
+            file = os.path.relpath(file, cwd)
+        # `./` makes the path relative to the working directory
+        path = "./" + file.replace(os.sep, "/")
+
+        return ["cat-file", "-p", "%s:%s" % (rev, path)]
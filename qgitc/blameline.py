@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Tuple
 
-class BlameLine:
 
-    def __init__(self):
-        self.sha1: str = None
-        self.oldLineNo = 0
-        self.newLineNo = 0
-        self.groupLines = 0
+class BlameCommit:
+    """ The commit info of blame, shared by all the lines of the commit """
+
+    __slots__ = ("sha1", "author", "authorMail", "authorTime",
+                 "committer", "committerMail", "committerTime",
+                 "previous", "prevFileName", "filename")
+
+    def __init__(self, sha1: str = None):
+        self.sha1 = sha1
 
         self.author: str = None
         self.authorMail: str = None
@@ -20,4 +26,208 @@ class BlameLine:
         self.previous: str = None
         self.prevFileName: str = None
         self.filename: str = None
-        self.text: str = None
+
+
+def _commitProperty(name):
+    def _get(self):
+        return getattr(self.commit, name)
+
+    def _set(self, value):
+        setattr(self.commit, name, value)
+
+    return property(_get, _set)
+
+
+class BlameLine:
+
+    __slots__ = ("commit", "oldLineNo", "newLineNo", "groupLines")
+
+    def __init__(self, commit: BlameCommit = None, oldLineNo=0, newLineNo=0):
+        self.commit = commit or BlameCommit()
+        self.oldLineNo = oldLineNo
+        self.newLineNo = newLineNo
+        self.groupLines = 0
+
+    sha1 = _commitProperty("sha1")
+
+    author = _commitProperty("author")
+    authorMail = _commitProperty("authorMail")
+    authorTime = _commitProperty("authorTime")
+
+    committer = _commitProperty("committer")
+    committerMail = _commitProperty("committerMail")
+    committerTime = _commitProperty("committerTime")
+
+    previous = _commitProperty("previous")
+    prevFileName = _commitProperty("prevFileName")
+    filename = _commitProperty("filename")
+
+
+class BlameTable:
+    """ The blame of a file, a table of the commits and the
+    commit index and original line number of each line """
+
+    def __init__(self):
+        self._commits: List[BlameCommit] = []
+        self._commitIndex: Dict[str, int] = {}
+        # the sorted [begin, end) line ranges of each commit
+        self._commitRanges: List[List[Tuple[int, int]]] = []
+        # previous sha1 => file name in the previous commit
+        self._prevFileNames: Dict[str, str] = {}
+        self._lineCommits = array("i")
+        self._oldLineNos = array("i")
+
+    def __len__(self):
+        return len(self._lineCommits)
+
+    def __getitem__(self, lineNo: int):
+        """ Return a BlameLine of `lineNo` (0 based) """
+        return BlameLine(self.commitAt(lineNo),
+                         self._oldLineNos[lineNo],
+                         lineNo + 1)
+
+    def _addCommit(self, commit: BlameCommit):
+        index = self._commitIndex.get(commit.sha1)
+        if index is None:
+            index = len(self._commits)
+            self._commitIndex[commit.sha1] = index
+            self._commits.append(commit)
+            self._commitRanges.append([])
+            if commit.previous:
+                self._prevFileNames.setdefault(
+                    commit.previous, commit.prevFileName)
+        return index
+
+    def _addRange(self, index: int, begin: int, end: int):
+        ranges = self._commitRanges[index]
+        i = bisect_left(ranges, (begin,))
+        # merge the overlapped or adjacent ranges
+        if i > 0 and ranges[i - 1][1] >= begin:
+            i -= 1
+            begin = ranges[i][0]
+            end = max(end, ranges[i][1])
+
+        j = i
+        while j < len(ranges) and ranges[j][0] <= end:
+            end = max(end, ranges[j][1])
+            j += 1
+
+        ranges[i:j] = [(begin, end)]
+
+    def _removeRange(self, index: int, begin: int, end: int):
+        ranges = []
+        for b, e in self._commitRanges[index]:
+            if e <= begin or b >= end:
+                ranges.append((b, e))
+                continue
+            if b < begin:
+                ranges.append((b, begin))
+            if e > end:
+                ranges.append((end, e))
+        self._commitRanges[index] = ranges
+
+    def _rebuildRanges(self):
+        self._commitRanges = [[] for _ in self._commits]
+        begin = 0
+        for i in range(1, len(self._lineCommits) + 1):
+            if i < len(self._lineCommits) and \
+                    self._lineCommits[i] == self._lineCommits[begin]:
+                continue
+            index = self._lineCommits[begin]
+            if index != -1:
+                self._commitRanges[index].append((begin, i))
+            begin = i
+
+    def append(self, line: BlameLine):
+        index = self._addCommit(line.commit)
+        self._addRange(index, len(self._lineCommits),
+                       len(self._lineCommits) + 1)
+        self._lineCommits.append(index)
+        self._oldLineNos.append(line.oldLineNo)
+
+    def resize(self, count: int):
+        """ Grow the table to `count` lines, the new lines
+        have no commit until `setLines` """
+        if count > len(self._lineCommits):
+            n = count - len(self._lineCommits)
+            self._lineCommits.extend(array("i", [-1]) * n)
+            self._oldLineNos.extend(array("i", [0]) * n)
+
+    def setLines(self, lineNo: int, count: int, commit: BlameCommit, oldLineNo: int):
+        """ Set `count` lines from `lineNo` (0 based) to `commit`,
+        the original line numbers start from `oldLineNo` """
+        self.resize(lineNo + count)
+        index = self._addCommit(commit)
+        end = lineNo + count
+
+        # the lines are blamed again, e.g. a range first and then
+        # the whole file, only in rare cases to another commit
+        for oldIndex in set(self._lineCommits[lineNo:end]):
+            if oldIndex != -1 and oldIndex != index:
+                self._removeRange(oldIndex, lineNo, end)
+        self._addRange(index, lineNo, end)
+
+        self._lineCommits[lineNo:end] = array("i", [index]) * count
+        self._oldLineNos[lineNo:end] = array(
+            "i", range(oldLineNo, oldLineNo + count))
+
+    def clear(self):
+        self._commits.clear()
+        self._commitIndex.clear()
+        self._commitRanges.clear()
+        self._prevFileNames.clear()
+        self._lineCommits = array("i")
+        self._oldLineNos = array("i")
+
+    @property
+    def commits(self):
+        return self._commits
+
+    def toData(self):
+        """ Return the table as a dict of builtin types """
+        return {
+            "commits": [[getattr(commit, name) for name in BlameCommit.__slots__]
+                        for commit in self._commits],
+            "lineCommits": self._lineCommits.tolist(),
+            "oldLineNos": self._oldLineNos.tolist(),
+        }
+
+    @staticmethod
+    def fromData(data: dict):
+        """ Make the table from the dict of `toData` """
+        table = BlameTable()
+        for values in data["commits"]:
+            commit = BlameCommit()
+            for name, value in zip(BlameCommit.__slots__, values):
+                setattr(commit, name, value)
+            table._addCommit(commit)
+
+        table._lineCommits = array("i", data["lineCommits"])
+        table._oldLineNos = array("i", data["oldLineNos"])
+        table._rebuildRanges()
+        return table
+
+    def commitIndex(self, sha1: str):
+        """ Return the index of commit `sha1`, -1 if not found """
+        return self._commitIndex.get(sha1, -1)
+
+    def commitAt(self, lineNo: int):
+        """ Return the commit of `lineNo`, None if not blamed yet """
+        index = self._lineCommits[lineNo]
+        return self._commits[index] if index != -1 else None
+
+    def commitIndexAt(self, lineNo: int):
+        return self._lineCommits[lineNo]
+
+    def lineRanges(self, index: int):
+        """ Return the sorted [begin, end) line ranges of commit `index` """
+        if index == -1:
+            return []
+        return self._commitRanges[index]
+
+    def fileName(self, sha1: str):
+        """ Return the file name in commit `sha1`, None if unknown """
+        index = self._commitIndex.get(sha1)
+        if index is not None and self._commits[index].filename:
+            return self._commits[index].filename
+        return self._prevFileNames.get(sha1)
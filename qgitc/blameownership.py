@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from PySide6.QtCore import QThread, Signal
+
+from qgitc.common import logger
+from qgitc.gitutils import Git
+from qgitc.submoduleexecutor import SubmoduleThread
+
+__all__ = ["AGE_DAYS", "BlameOwnershipThread", "FileOwnership",
+           "OwnershipCommit", "OwnershipReport", "parseBlameOwnership"]
+
+# The upper bounds (in days) of the age groups, the last
+# group is for the lines older than all of them
+AGE_DAYS = (30, 182, 365, 730, 1825)
+
+# The git blame processes run at the same time
+_MAX_WORKERS = 8
+# The blamed files kept in memory, a file is blamed again
+# only if its blob changed
+_MAX_CACHED_FILES = 50000
+
+_cachedFiles = OrderedDict()
+_cacheLock = threading.Lock()
+
+
+class OwnershipCommit:
+
+    __slots__ = ("sha1", "author", "authorTime", "summary")
+
+    def __init__(self, sha1: str):
+        self.sha1 = sha1
+        self.author: str = None
+        # the seconds since epoch
+        self.authorTime = 0
+        self.summary: str = None
+
+
+class FileOwnership:
+    """ The lines of each commit in the blame of a file """
+
+    __slots__ = ("commitLines", "commits")
+
+    def __init__(self):
+        self.commitLines: Dict[str, int] = {}
+        self.commits: Dict[str, OwnershipCommit] = {}
+
+    @property
+    def lineCount(self):
+        return sum(self.commitLines.values())
+
+
+def parseBlameOwnership(data: bytes):
+    """ Parse the output of `git blame --incremental` """
+    ownership = FileOwnership()
+    commit: OwnershipCommit = None
+    for line in data.split(b'\n'):
+        if not line:
+            continue
+
+        if line.startswith(b"author "):
+            commit.author = line[7:].decode("utf-8", "replace")
+        elif line.startswith(b"author-mail "):
+            commit.author += " " + line[12:].decode("utf-8", "replace")
+        elif line.startswith(b"author-time "):
+            commit.authorTime = int(line[12:])
+        elif line.startswith(b"summary "):
+            commit.summary = line[8:].decode("utf-8", "replace")
+        else:
+            # the group header: sha1 old-line new-line lines
+            parts = line.split(b' ')
+            if len(parts) != 4 or len(parts[0]) not in (40, 64):
+                continue
+
+            sha1 = parts[0].decode("utf-8")
+            commit = ownership.commits.get(sha1)
+            if commit is None:
+                commit = OwnershipCommit(sha1)
+                ownership.commits[sha1] = commit
+            ownership.commitLines[sha1] = \
+                ownership.commitLines.get(sha1, 0) + int(parts[3])
+
+    return ownership
+
+
+class OwnershipReport:
+    """ The lines of each author, commit and age group of files """
+
+    def __init__(self, now: float = None):
+        self._now = now or time.time()
+        self.fileCount = 0
+        self.lineCount = 0
+        self.authorLines: Dict[str, int] = {}
+        self.commitLines: Dict[str, int] = {}
+        self.commits: Dict[str, OwnershipCommit] = {}
+        self.ageLines = [0] * (len(AGE_DAYS) + 1)
+
+    def _ageGroup(self, authorTime: int):
+        days = (self._now - authorTime) / 86400
+        for i, maxDays in enumerate(AGE_DAYS):
+            if days <= maxDays:
+                return i
+        return len(AGE_DAYS)
+
+    def add(self, ownership: FileOwnership):
+        self.fileCount += 1
+        for sha1, lines in ownership.commitLines.items():
+            commit = self.commits.get(sha1)
+            if commit is None:
+                commit = ownership.commits[sha1]
+                self.commits[sha1] = commit
+
+            self.lineCount += lines
+            self.commitLines[sha1] = self.commitLines.get(sha1, 0) + lines
+            self.authorLines[commit.author] = \
+                self.authorLines.get(commit.author, 0) + lines
+            self.ageLines[self._ageGroup(commit.authorTime)] += lines
+
+
+def _cachedFile(key):
+    with _cacheLock:
+        ownership = _cachedFiles.get(key)
+        if ownership is not None:
+            _cachedFiles.move_to_end(key)
+        return ownership
+
+
+def _cacheFile(key, ownership: FileOwnership):
+    with _cacheLock:
+        _cachedFiles[key] = ownership
+        if len(_cachedFiles) > _MAX_CACHED_FILES:
+            _cachedFiles.popitem(last=False)
+
+
+class BlameOwnershipThread(QThread):
+    """ Blame the files of `paths` at `rev` by a bounded pool,
+    and sum up the lines to an OwnershipReport """
+
+    progress = Signal(int, int)
+
+    def __init__(self, repoDir: str, rev: str, paths: List[str],
+                 ignoreWhitespace=False, parent=None):
+        super().__init__(parent)
+        self._repoDir = repoDir
+        self._rev = rev or "HEAD"
+        self._paths = paths
+        self._ignoreWhitespace = ignoreWhitespace
+        self._report: OwnershipReport = None
+        self._blamedCount = 0
+        # the running `git blame` processes, killed by `cancel`
+        self._processes = set()
+        self._processLock = threading.Lock()
+
+    @property
+    def report(self):
+        return self._report
+
+    @property
+    def blamedCount(self):
+        """ The files blamed by git, the others are from cache """
+        return self._blamedCount
+
+    def _listBlobs(self) -> List[Tuple[str, str]]:
+        args = ["ls-tree", "-r", "-z", "--full-tree",
+                self._rev, "--"] + self._paths
+        data = Git.checkOutput(args, repoDir=self._repoDir, reportError=True)
+        if not data:
+            return []
+
+        blobs = []
+        for item in data.rstrip(b'\0').split(b'\0'):
+            info, _, path = item.partition(b'\t')
+            parts = info.split(b' ')
+            # skip the submodules
+            if len(parts) != 3 or parts[1] != b"blob":
+                continue
+            blobs.append((path.decode("utf-8"), parts[2].decode("utf-8")))
+
+        return blobs
+
+    def cancel(self):
+        """ Stop blaming, the running git processes are killed """
+        self.requestInterruption()
+        with self._processLock:
+            for process in self._processes:
+                process.kill()
+
+    def _blameFile(self, path: str):
+        if self.isInterruptionRequested():
+            return None
+
+        args = ["blame", "--incremental"]
+        if self._ignoreWhitespace:
+            args.append("-w")
+        args.extend([self._rev, "--", path])
+
+        process = Git.run(args, repoDir=self._repoDir)
+        with self._processLock:
+            self._processes.add(process.process)
+        # cancelled before it was added
+        if self.isInterruptionRequested():
+            process.process.kill()
+
+        try:
+            data, error = process.communicate()
+        finally:
+            with self._processLock:
+                self._processes.discard(process.process)
+
+        if self.isInterruptionRequested():
+            return None
+
+        if process.returncode != 0:
+            logger.warning("Failed to blame %s: %s", path,
+                           error.decode("utf-8", "replace").rstrip())
+            return None
+
+        return parseBlameOwnership(data)
+
+    def run(self):
+        self._report = None
+        self._blamedCount = 0
+        blobs = self._listBlobs()
+        if self.isInterruptionRequested():
+            return
+
+        report = OwnershipReport()
+        repoDir = os.path.normcase(os.path.normpath(self._repoDir))
+        pending = {}
+        for path, blob in blobs:
+            key = (repoDir, path, blob, self._ignoreWhitespace)
+            ownership = _cachedFile(key)
+            if ownership is not None:
+                report.add(ownership)
+            else:
+                pending[path] = key
+
+        total = len(blobs)
+        done = total - len(pending)
+        self.progress.emit(done, total)
+
+        if pending:
+            executor = ThreadPoolExecutor(
+                max_workers=min(_MAX_WORKERS, os.cpu_count() or 2))
+            tasks = {executor.submit(self._blameFile, path): key
+                     for path, key in pending.items()}
+            for task in as_completed(tasks):
+                if self.isInterruptionRequested():
+                    SubmoduleThread.shutdown(executor)
+                    return
+
+                ownership = task.result()
+                if ownership is not None:
+                    _cacheFile(tasks[task], ownership)
+                    report.add(ownership)
+                    self._blamedCount += 1
+
+                done += 1
+                self.progress.emit(done, total)
+
+            executor.shutdown()
+
+        self._report = report
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+from typing import List
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QLabel,
+    QProgressBar,
+    QTabWidget,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+)
+
+from qgitc.applicationbase import ApplicationBase
+from qgitc.blameownership import AGE_DAYS, BlameOwnershipThread, OwnershipReport
+from qgitc.events import ShowCommitEvent
+
+__all__ = ["BlameOwnershipDialog"]
+
+
+class BlameOwnershipDialog(QDialog):
+    """ The lines of each author, commit and age of the blamed files """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle(self.tr("Blame Ownership"))
+        self.setAttribute(Qt.WA_DeleteOnClose, True)
+        self.resize(800, 500)
+
+        self._thread: BlameOwnershipThread = None
+        self._repoDir: str = None
+
+        self._setupUi()
+
+    def _setupUi(self):
+        layout = QVBoxLayout(self)
+
+        self._lbScope = QLabel(self)
+        self._lbScope.setWordWrap(True)
+        layout.addWidget(self._lbScope)
+
+        self._progress = QProgressBar(self)
+        self._progress.setRange(0, 0)
+        layout.addWidget(self._progress)
+
+        self._lbSummary = QLabel(self)
+        layout.addWidget(self._lbSummary)
+
+        self._tabWidget = QTabWidget(self)
+        self._authorTree = self._newTree(
+            [self.tr("Author"), self.tr("Lines"), "%"])
+        self._tabWidget.addTab(self._authorTree, self.tr("Authors"))
+
+        self._commitTree = self._newTree(
+            [self.tr("Commit"), self.tr("Author"), self.tr("Date"),
+             self.tr("Summary"), self.tr("Lines"), "%"])
+        self._commitTree.itemDoubleClicked.connect(
+            self._onCommitDoubleClicked)
+        self._tabWidget.addTab(self._commitTree, self.tr("Commits"))
+
+        self._ageTree = self._newTree(
+            [self.tr("Age"), self.tr("Lines"), "%"])
+        self._tabWidget.addTab(self._ageTree, self.tr("Age"))
+        layout.addWidget(self._tabWidget)
+
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttonBox.rejected.connect(self.close)
+        layout.addWidget(buttonBox)
+
+    def _newTree(self, labels: List[str]):
+        tree = QTreeWidget(self)
+        tree.setRootIsDecorated(False)
+        tree.setHeaderLabels(labels)
+        tree.setSortingEnabled(True)
+        return tree
+
+    def _ageLabels(self):
+        labels = [self.tr("Within 1 month"),
+                  self.tr("1 - 6 months"),
+                  self.tr("6 - 12 months"),
+                  self.tr("1 - 2 years"),
+                  self.tr("2 - 5 years"),
+                  self.tr("Over 5 years")]
+        assert len(labels) == len(AGE_DAYS) + 1
+        return labels
+
+    def blame(self, repoDir: str, rev: str, paths: List[str]):
+        """ Blame the files of `paths` (relative to `repoDir`) at `rev` """
+        self.cancel()
+
+        self._repoDir = repoDir
+        self._lbScope.setText(self.tr("{0} at {1}").format(
+            ", ".join(paths), rev or "HEAD"))
+        self._progress.setRange(0, 0)
+        self._progress.show()
+        self._lbSummary.clear()
+
+        ignoreWhitespace = ApplicationBase.instance().settings().ignoreWhitespaceBlame()
+        self._thread = BlameOwnershipThread(
+            repoDir, rev, paths, ignoreWhitespace, self)
+        self._thread.progress.connect(self._onProgress)
+        self._thread.finished.connect(self._onFinished)
+        self._thread.start()
+
+    def cancel(self):
+        if self._thread:
+            self._thread.progress.disconnect(self._onProgress)
+            self._thread.finished.disconnect(self._onFinished)
+            self._thread.cancel()
+            # it is detached to finish later if not stopped in time
+            ApplicationBase.instance().terminateThread(self._thread)
+            self._thread = None
+
+    def _onProgress(self, done: int, total: int):
+        if self.sender() != self._thread:
+            return
+        self._progress.setRange(0, total)
+        self._progress.setValue(done)
+
+    def _onFinished(self):
+        if self.sender() != self._thread:
+            return
+
+        report = self._thread.report
+        blamedCount = self._thread.blamedCount
+        # the thread is a child, make sure it exited before deleting us
+        self._thread.wait()
+        self._thread = None
+        self._progress.hide()
+        if report:
+            self._showReport(report, blamedCount)
+
+    def _showReport(self, report: OwnershipReport, blamedCount: int):
+        self._lbSummary.setText(
+            self.tr("{0} files, {1} lines ({2} files blamed, {3} from cache)").format(
+                report.fileCount, report.lineCount,
+                blamedCount, report.fileCount - blamedCount))
+
+        def _percent(lines):
+            if not report.lineCount:
+                return "0.0"
+            return "%.1f" % (lines * 100 / report.lineCount)
+
+        def _newItem(tree: QTreeWidget, texts: List[str], lines: int):
+            item = QTreeWidgetItem(texts)
+            column = len(texts)
+            # sort the lines as number
+            item.setData(column, Qt.DisplayRole, lines)
+            item.setText(column + 1, _percent(lines))
+            tree.addTopLevelItem(item)
+            return item
+
+        for tree in (self._authorTree, self._commitTree, self._ageTree):
+            tree.clear()
+
+        for author, lines in report.authorLines.items():
+            _newItem(self._authorTree, [author], lines)
+
+        for sha1, lines in report.commitLines.items():
+            commit = report.commits[sha1]
+            date = datetime.fromtimestamp(commit.authorTime).strftime("%Y-%m-%d")
+            item = _newItem(self._commitTree,
+                            [sha1[:7], commit.author, date, commit.summary or ""],
+                            lines)
+            item.setData(0, Qt.UserRole, sha1)
+
+        for label, lines in zip(self._ageLabels(), report.ageLines):
+            _newItem(self._ageTree, [label], lines)
+
+        self._authorTree.sortByColumn(1, Qt.DescendingOrder)
+        self._commitTree.sortByColumn(4, Qt.DescendingOrder)
+        # keep the age groups in order
+        self._ageTree.setSortingEnabled(False)
+
+        for tree in (self._authorTree, self._commitTree, self._ageTree):
+            tree.resizeColumnToContents(0)
+
+    def _onCommitDoubleClicked(self, item: QTreeWidgetItem, column: int):
+        sha1 = item.data(0, Qt.UserRole)
+        app = ApplicationBase.instance()
+        app.postEvent(app, ShowCommitEvent(sha1, self._repoDir))
+
+    def closeEvent(self, event):
+        self.cancel()
+        super().closeEvent(event)
@@ -53,6 +53,10 @@ class BlameSourceViewer(SourceViewer):
             self._preferEncoding = encoding
         return super().toTextLine(text)
 
+    def toText(self, item):
+        text, _ = decodeFileData(item, self._preferEncoding)
+        return super().toText(text)
+
     def createContextMenu(self):
         menu = super().createContextMenu()
         menu.addSeparator()
@@ -77,21 +81,27 @@ class BlameSourceViewer(SourceViewer):
             self._curIndexForMenu = -1
         self._acBlamePrev.setEnabled(enabled)
 
-    def appendBlameLines(self, lines):
-        texts = []
-        for line in lines:
-            texts.append(line.text)
-            # to save memory as revision panel no need text
-            line.text = None
+    def appendContent(self, lines):
+        """ Append the raw `lines` of file content, the
+        revisions are given later by `updateBlameLines` """
+        self._panel.appendLineCount(len(lines))
+        self.appendLines(lines)
+
+    def updateBlameLines(self, lines):
+        self._panel.updateRevisions(lines)
 
-        self._panel.appendRevisions(lines)
-        self.appendLines(texts)
+    def contentLines(self):
+        """ The raw lines of file content """
+        return self._lines
 
     def _onMenuShowCommitLog(self):
         if self._curIndexForMenu == -1:
             return
 
         rev = self._panel.revisions[self._curIndexForMenu]
+        if not rev.sha1:
+            return
+
         event = ShowCommitEvent(rev.sha1, self.repoDir)
         ApplicationBase.instance().postEvent(ApplicationBase.instance(), event)
 
@@ -3,7 +3,7 @@
 import os
 from typing import List
 
-from PySide6.QtCore import QSize, Qt, Signal
+from PySide6.QtCore import QSize, QStandardPaths, Qt, Signal
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import (
     QCheckBox,
@@ -19,22 +19,40 @@ from PySide6.QtWidgets import (
 )
 
 from qgitc.applicationbase import ApplicationBase
-from qgitc.blamefetcher import BlameFetcher
+from qgitc.blamecache import BlameCache, BlameResult
+from qgitc.blamefetcher import (
+    BlameContentFetcher,
+    BlameFetcher,
+    splitContentLines,
+)
 from qgitc.blameline import BlameLine
 from qgitc.blamesourceviewer import BlameSourceViewer
 from qgitc.coloredicontoolbutton import ColoredIconToolButton
 from qgitc.commitdetailpanel import CommitDetailPanel
-from qgitc.common import dataDirPath
+from qgitc.common import Commit, dataDirPath, logger
 from qgitc.events import OpenLinkEvent
 from qgitc.gitutils import Git
 from qgitc.logview import LogView
-from qgitc.namefetcher import NameFetcher
 from qgitc.revisionpanel import RevisionPanel
 from qgitc.textline import Link
 from qgitc.waitingspinnerwidget import QtWaitingSpinner
 
 __all__ = ["BlameView"]
 
+# The whole file is blamed, the visible lines are also blamed
+# alone first for the files of more lines, as git takes much
+# longer to blame all the lines of a long history file
+_VIEWPORT_BLAME_MIN_LINES = 2000
+
+# The finished blames shared by all the views, so that the
+# history navigation needs no git
+_blameCache = BlameCache()
+
+
+def _blameCacheDir():
+    cacheDir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    return os.path.join(cacheDir, "blame") if cacheDir else None
+
 
 class BlameHistory:
 
@@ -52,10 +70,6 @@ class BlameCommitPanel(QSplitter):
     def __init__(self, viewer: BlameSourceViewer, parent=None):
         super().__init__(Qt.Horizontal, parent)
 
-        self._nameFetcher = NameFetcher(self)
-        self._nameFetcher.dataAvailable.connect(
-            self._onNameAvailable)
-
         self._sha1Names = {}
         self._curFile = None
 
@@ -74,6 +88,8 @@ class BlameCommitPanel(QSplitter):
 
         self.logView.currentIndexChanged.connect(
             self._onCommitChanged)
+        self.logView.fetcher.logsAvailable.connect(
+            self._onLogsAvailable)
 
         self.detailPanel.linkActivated.connect(
             self.linkActivated)
@@ -104,10 +120,9 @@ class BlameCommitPanel(QSplitter):
         self._curFile = normFile
 
         self._sha1Names.clear()
-        self._nameFetcher.cwd = repoDir
-        self._nameFetcher.fetch(file)
 
-        args = ["--follow", "--", file]
+        # the file names of the commits come with the logs
+        args = ["--follow", "--name-only", "--", file]
         self.logView.clear()
         self.logView.preferSha1 = rev
         self.logView.showLogs(branch=None, branchDir=repoDir, args=args)
@@ -164,12 +179,10 @@ class BlameCommitPanel(QSplitter):
 
         self.detailPanel.showCommit(commit, previous)
 
-    def _onNameAvailable(self, data: List[tuple]):
-        if not data:
-            return
-
-        for sha1, file in data:
-            self._sha1Names[sha1] = file
+    def _onLogsAvailable(self, commits: List[Commit]):
+        for commit in commits:
+            if commit.fileName:
+                self._sha1Names[commit.sha1] = commit.fileName
 
 
 class HeaderWidget(QWidget):
@@ -365,6 +378,8 @@ class BlameView(QWidget):
         self._file = None
         self._rev = None
         self._lineNo = -1
+        self._ignoreWhitespace = False
+        self._cacheKey = None
 
         self._fetcher = BlameFetcher(self)
         self._fetcher.dataAvailable.connect(
@@ -372,6 +387,16 @@ class BlameView(QWidget):
         self._fetcher.fetchFinished.connect(
             self._onFetchFinished)
 
+        self._viewportFetcher = BlameFetcher(self)
+        self._viewportFetcher.dataAvailable.connect(
+            self._onFetchDataAvailable)
+
+        self._contentFetcher = BlameContentFetcher(self)
+        self._contentFetcher.dataAvailable.connect(
+            self._viewer.appendContent)
+        self._contentFetcher.fetchFinished.connect(
+            self._onContentFetchFinished)
+
         self._commitPanel.linkActivated.connect(
             self._onLinkActivated)
         self._viewer.linkActivated.connect(
@@ -392,13 +417,68 @@ class BlameView(QWidget):
                 ApplicationBase.instance(), OpenLinkEvent(link))
 
     def _onFetchDataAvailable(self, lines: List[BlameLine]):
-        self._viewer.appendBlameLines(lines)
+        self._viewer.updateBlameLines(lines)
 
     def _onFetchFinished(self, exitCode):
+        if exitCode != 0:
+            self._cacheKey = None
+        if self._viewportFetcher.process:
+            self._viewportFetcher.cancel()
+        if not self._contentFetcher.process:
+            self._onBlameFinished()
+
+    def _onContentFetchFinished(self, exitCode):
+        if exitCode != 0:
+            self._cacheKey = None
+        self._onContentLoaded()
+        if not self._fetcher.process:
+            self._onBlameFinished()
+
+    def _onContentLoaded(self):
+        if self._lineNo > 0:
+            self._viewer.gotoLine(self._lineNo - 1)
+
+        if not self._fetcher.process:
+            return
+
+        count = self._viewer.textLineCount()
+        if count < _VIEWPORT_BLAME_MIN_LINES:
+            return
+
+        firstLine = self._viewer.firstVisibleLine()
+        pageLines = self._viewer.viewport().height() // self._viewer.lineHeight
+        lastLine = min(count, firstLine + max(1, pageLines) + 1)
+        self._viewportFetcher.cwd = self._fetcher.cwd
+        self._viewportFetcher.fetch(self._file, self._rev, self._ignoreWhitespace,
+                                    (firstLine + 1, lastLine))
+
+    def _loadContent(self, file, rev):
+        if rev:
+            self._contentFetcher.cwd = self._fetcher.cwd
+            self._contentFetcher.fetch(file, rev)
+            return
+
+        # blame the working tree file
+        try:
+            with open(os.path.join(self._fetcher.cwd, file), "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning("Failed to read %s: %s", file, e)
+            data = b""
+
+        self._viewer.appendContent(splitContentLines(data))
+        self._onContentLoaded()
+
+    def _onBlameFinished(self):
+        if self._cacheKey and self._viewer.hasTextLines():
+            result = BlameResult(list(self._viewer.contentLines()),
+                                 self._viewer.panel.revisions)
+            _blameCache.put(self._cacheKey, result)
+        self._cacheKey = None
+
         self.blameFileChanged.emit(self._file)
         self._headerWidget.notifyFecthingFinished()
         if self._lineNo > 0:
-            self._viewer.gotoLine(self._lineNo - 1)
             self._viewer.panel.setActiveRevByLineNumber(self._lineNo - 1)
             self._lineNo = -1
         elif self._rev:
@@ -429,16 +509,36 @@ class BlameView(QWidget):
         self.clear()
         self._viewer.repoDir = repoDir
         self._viewer.beginReading()
-        self._fetcher.cwd = repoDir or Git.REPO_DIR
-        ignoreWhitespace = ApplicationBase.instance().settings().ignoreWhitespaceBlame()
-        self._fetcher.fetch(file, rev, ignoreWhitespace)
-
-        self._commitPanel.showLogs(self._fetcher.cwd, file, rev)
 
         self._file = file
         self._rev = rev
         self._lineNo = lineNo
 
+        settings = ApplicationBase.instance().settings()
+        self._ignoreWhitespace = settings.ignoreWhitespaceBlame()
+
+        self._viewportFetcher.cancel()
+        self._contentFetcher.cancel()
+        self._fetcher.cancel()
+        self._fetcher.cwd = repoDir or Git.REPO_DIR
+
+        self._commitPanel.showLogs(self._fetcher.cwd, file, rev)
+
+        _blameCache.diskDir = _blameCacheDir() if settings.cacheBlameOnDisk() else None
+        self._cacheKey = BlameCache.makeKey(
+            self._fetcher.cwd, rev, file, self._ignoreWhitespace)
+        result = _blameCache.get(self._cacheKey) if self._cacheKey else None
+        if result:
+            self._cacheKey = None
+            self._viewer.panel.setRevisions(result.table)
+            self._viewer.appendContent(result.lines)
+            self._onContentLoaded()
+            self._onBlameFinished()
+        else:
+            self._fetcher.fetch(file, rev, self._ignoreWhitespace)
+            # show the source before the blame
+            self._loadContent(file, rev)
+
         self._headerWidget.addBlameInfo(file, rev, lineNo)
 
     @property
@@ -451,6 +551,8 @@ class BlameView(QWidget):
 
     def queryClose(self):
         self._fetcher.cancel()
+        self._viewportFetcher.cancel()
+        self._contentFetcher.cancel()
         self._commitPanel.logView.queryClose()
 
     def _onRequestBlame(self, sha1: str, file: str):
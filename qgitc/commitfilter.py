@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import re
+from typing import List, Tuple
+
+from qgitc.common import Commit
+
+__all__ = ["CommitFilter"]
+
+# The pattern options filter the loaded commits in memory
+_PATTERN_OPTS = ("--author", "--committer", "--grep")
+_IGNORE_CASE_OPTS = ("-i", "--regexp-ignore-case")
+
+# The options change what the pattern options select,
+# leave them to git if any of them presents
+_UNSUPPORTED_OPTS = ("--all-match", "--invert-grep", "--grep-reflog",
+                     "-E", "--extended-regexp", "-F", "--fixed-strings",
+                     "-P", "--perl-regexp", "--basic-regexp",
+                     "-n", "--max-count", "--skip")
+
+# The chars have different meanings in git's basic regexp and python's
+_unsafe_pattern_re = re.compile(r"[\\+?(){}|]|\[[:=.]")
+_max_count_re = re.compile(r"-n?[0-9]+$")
+
+
+class CommitFilter:
+    """ Filter the loaded commits as `git log --author/--committer/--grep` """
+
+    def __init__(self, authors: List[str], committers: List[str], greps: List[str], ignoreCase=False):
+        self.authors = authors
+        self.committers = committers
+        self.greps = greps
+        self.ignoreCase = ignoreCase
+
+        flags = re.MULTILINE
+        if ignoreCase:
+            flags |= re.IGNORECASE
+        self._authorRes = [re.compile(p, flags) for p in authors]
+        self._committerRes = [re.compile(p, flags) for p in committers]
+        self._grepRes = [re.compile(p, flags) for p in greps]
+
+    def __eq__(self, other):
+        if not isinstance(other, CommitFilter):
+            return False
+
+        return self.authors == other.authors and \
+            self.committers == other.committers and \
+            self.greps == other.greps and \
+            self.ignoreCase == other.ignoreCase
+
+    def __call__(self, commit: Commit):
+        # same as git, any of the same option matches
+        if self._authorRes and \
+                not any(r.search(commit.author) for r in self._authorRes):
+            return False
+
+        if self._committerRes and \
+                not any(r.search(commit.committer) for r in self._committerRes):
+            return False
+
+        if self._grepRes and \
+                not any(r.search(commit.comments) for r in self._grepRes):
+            return False
+
+        return True
+
+    @staticmethod
+    def fromArgs(args: List[str]) -> Tuple[List[str], "CommitFilter"]:
+        """ Split the `git log` args to the ones for git and the filter,
+        the filter is None if the args can't be filtered in memory """
+        if not args:
+            return args, None
+
+        gitArgs = []
+        patterns = {opt: [] for opt in _PATTERN_OPTS}
+        ignoreCase = False
+
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            i += 1
+            if arg == "--":
+                gitArgs.extend(args[i - 1:])
+                break
+
+            name, sep, value = arg.partition("=")
+            if name in _UNSUPPORTED_OPTS or _max_count_re.match(arg):
+                return args, None
+
+            if name in _PATTERN_OPTS:
+                if not sep:
+                    if i >= len(args):
+                        return args, None
+                    value = args[i]
+                    i += 1
+                if not value or _unsafe_pattern_re.search(value):
+                    return args, None
+                patterns[name].append(value)
+            elif arg in _IGNORE_CASE_OPTS:
+                ignoreCase = True
+            else:
+                gitArgs.append(arg)
+
+        if not any(patterns.values()):
+            return args, None
+
+        try:
+            commitFilter = CommitFilter(patterns["--author"],
+                                        patterns["--committer"],
+                                        patterns["--grep"],
+                                        ignoreCase)
+        except re.error:
+            # leave the invalid patterns to git to report
+            return args, None
+
+        return gitArgs, commitFilter
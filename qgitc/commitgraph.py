@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+from PySide6.QtCore import QThread
+
+from qgitc.common import logger
+from qgitc.gitutils import Git
+
+__all__ = ["CommitGraphThread", "commitGraphFiles",
+           "hasChangedPaths", "isCommitGraphStale"]
+
+# The chunks of changed-path Bloom filters in commit-graph file
+_BLOOM_CHUNKS = (b"BIDX", b"BDAT")
+
+
+def commitGraphFiles(commonDir: str):
+    """ Return the commit-graph files of the repo """
+    infoDir = os.path.join(commonDir, "objects", "info")
+    graphFile = os.path.join(infoDir, "commit-graph")
+    if os.path.isfile(graphFile):
+        return [graphFile]
+
+    graphsDir = os.path.join(infoDir, "commit-graphs")
+    chainFile = os.path.join(graphsDir, "commit-graph-chain")
+    try:
+        with open(chainFile, "r") as f:
+            hashes = f.read().split()
+    except OSError:
+        return []
+
+    return [os.path.join(graphsDir, "graph-%s.graph" % h) for h in hashes]
+
+
+def hasChangedPaths(graphFile: str):
+    """ True if the commit-graph file has the changed-path Bloom filters """
+    try:
+        with open(graphFile, "rb") as f:
+            header = f.read(8)
+            if len(header) != 8 or header[:4] != b"CGPH":
+                return False
+
+            # the chunk table follows the header, each entry is
+            # a 4-byte chunk id and a 8-byte offset
+            numChunks = header[6]
+            table = f.read((numChunks + 1) * 12)
+    except OSError:
+        return False
+
+    chunkIds = {table[i:i + 4] for i in range(0, len(table), 12)}
+    return all(chunk in chunkIds for chunk in _BLOOM_CHUNKS)
+
+
+def _newestRefTime(commonDir: str):
+    newest = 0
+    for name in ("packed-refs", "HEAD"):
+        try:
+            newest = max(newest, os.path.getmtime(
+                os.path.join(commonDir, name)))
+        except OSError:
+            pass
+
+    for name in ("refs", "reftable"):
+        for root, _, files in os.walk(os.path.join(commonDir, name)):
+            for file in files:
+                try:
+                    newest = max(newest, os.path.getmtime(
+                        os.path.join(root, file)))
+                except OSError:
+                    pass
+
+    return newest
+
+
+def isCommitGraphStale(commonDir: str):
+    """ True if the commit-graph is missing, has no changed-path
+    Bloom filters, or is older than the refs """
+    graphFiles = commitGraphFiles(commonDir)
+    if not graphFiles:
+        return True
+
+    graphTime = 0
+    for graphFile in graphFiles:
+        if not hasChangedPaths(graphFile):
+            return True
+        try:
+            graphTime = max(graphTime, os.path.getmtime(graphFile))
+        except OSError:
+            return True
+
+    return _newestRefTime(commonDir) > graphTime
+
+
+class CommitGraphThread(QThread):
+    """ Write the commit-graph with changed-path Bloom filters, so
+    that git can skip the tree diff of most commits when the
+    history is limited by paths """
+
+    def __init__(self, repoDir, parent=None):
+        super().__init__(parent)
+        self._repoDir = repoDir
+        self._updated = False
+        self._elapsed = 0
+
+    @property
+    def updated(self):
+        return self._updated
+
+    @property
+    def elapsed(self):
+        return self._elapsed
+
+    def run(self):
+        self._updated = False
+        if self.isInterruptionRequested():
+            return
+
+        data = Git.checkOutput(["rev-parse", "--git-common-dir"],
+                               text=True, repoDir=self._repoDir)
+        if not data:
+            return
+
+        commonDir = os.path.join(self._repoDir, data.rstrip("\n"))
+        if not isCommitGraphStale(commonDir):
+            return
+
+        if self.isInterruptionRequested():
+            return
+
+        # the Bloom filters of the existing graph are reused by git,
+        # so only the new commits are computed
+        beginTime = time.perf_counter()
+        args = ["commit-graph", "write", "--reachable", "--changed-paths"]
+        process = Git.run(args, repoDir=self._repoDir)
+        _, error = process.communicate()
+        if process.returncode != 0:
+            logger.warning("Failed to write commit-graph: %s",
+                           error.decode("utf-8", errors="replace").rstrip())
+            return
+
+        self._elapsed = time.perf_counter() - beginTime
+        self._updated = True
+        logger.info("Commit-graph with changed paths written in %.2fs (%s)",
+                    self._elapsed, self._repoDir)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import re
+from itertools import accumulate
+from typing import List
+
+from qgitc.common import Commit
+from qgitc.gitutils import Git
+
+__all__ = ["CommitTextIndex", "commitMatches"]
+
+# Number of commits joined into one text block
+_BLOCK_SIZE = 4096
+# Max number of text blocks kept alive, the blocks out of them are
+# built for each scan without caching, so that a scan never evicts
+# the blocks the next scan reuses
+_MAX_CACHED_BLOCKS = 128
+
+# The patterns look around the field boundaries can't be searched
+# in the joined text, as the neighbors are different
+_unsafe_re = re.compile(r"\\[AZ]|\(\?(<?[=!])")
+
+
+def commitMatches(pattern: re.Pattern, commit: Commit):
+    """ True if any field of `commit` matches the `pattern` """
+    if pattern.search(commit.comments):
+        return True
+
+    if pattern.search(commit.author):
+        return True
+
+    if pattern.search(commit.committer):
+        return True
+
+    if pattern.search(commit.sha1):
+        return True
+
+    if pattern.search(commit.authorDate):
+        return True
+
+    if pattern.search(commit.committerDate):
+        return True
+
+    for p in commit.parents:
+        if pattern.search(p):
+            return True
+
+    return False
+
+
+def _isLocalChanges(commit: Commit):
+    return commit.sha1 in (Git.LUC_SHA1, Git.LCC_SHA1)
+
+
+class _TextBlock:
+
+    __slots__ = ("commits", "text", "offsets", "localParents")
+
+    def __init__(self, commits: List[Commit]):
+        self.commits = commits
+        # the parents of local changes are updated later
+        self.localParents = []
+
+        texts = []
+        for i, commit in enumerate(commits):
+            if _isLocalChanges(commit):
+                self.localParents.append((i, list(commit.parents)))
+            # one line per field, and each commit ends with a newline
+            texts.append("\n".join([
+                commit.comments,
+                commit.author,
+                commit.committer,
+                commit.sha1,
+                commit.authorDate,
+                commit.committerDate,
+                *commit.parents,
+                ""]))
+
+        self.text = "".join(texts)
+        self.offsets = [0]
+        self.offsets.extend(accumulate(map(len, texts)))
+
+    def isValid(self, commits: List[Commit]):
+        if commits != self.commits:
+            return False
+
+        for i, parents in self.localParents:
+            if commits[i].parents != parents:
+                return False
+
+        return True
+
+    def candidates(self, pattern: re.Pattern, first: int, last: int):
+        """ The rows in [first, last] that may match the `pattern` """
+        pos = self.offsets[first]
+        end = self.offsets[last + 1]
+        while pos < end:
+            m = pattern.search(self.text, pos, end)
+            if not m:
+                break
+            row = bisect.bisect_right(self.offsets, m.start()) - 1
+            if row > last:
+                break
+            yield row
+            # the match may cross the fields, continue with next commit
+            pos = self.offsets[row + 1]
+
+
+class CommitTextIndex:
+    """ Find the commits by searching the joined text of them block
+    by block, instead of matching every field of each commit """
+
+    def __init__(self):
+        self._blocks = {}
+
+    def clear(self):
+        self._blocks.clear()
+
+    def findCommit(self, data: List[Commit], pattern: re.Pattern, findRange: range):
+        """ Return the first index in `findRange` whose commit matches
+        `pattern`, -1 if not found """
+        if not findRange:
+            return -1
+
+        if abs(findRange.step) != 1 or _unsafe_re.search(pattern.pattern):
+            return self._scan(data, pattern, findRange)
+
+        # `^` and `$` are for each field
+        textPattern = re.compile(pattern.pattern,
+                                 pattern.flags | re.MULTILINE)
+
+        first = findRange[0]
+        last = findRange[-1]
+        if findRange.step == 1:
+            for blockNo in range(first // _BLOCK_SIZE, last // _BLOCK_SIZE + 1):
+                base = blockNo * _BLOCK_SIZE
+                block = self._block(data, blockNo)
+                for row in block.candidates(
+                        textPattern,
+                        max(first, base) - base,
+                        min(last, base + _BLOCK_SIZE - 1) - base):
+                    if commitMatches(pattern, data[base + row]):
+                        return base + row
+        else:
+            for blockNo in range(first // _BLOCK_SIZE, last // _BLOCK_SIZE - 1, -1):
+                base = blockNo * _BLOCK_SIZE
+                block = self._block(data, blockNo)
+                rows = list(block.candidates(
+                    textPattern,
+                    max(last, base) - base,
+                    min(first, base + _BLOCK_SIZE - 1) - base))
+                for row in reversed(rows):
+                    if commitMatches(pattern, data[base + row]):
+                        return base + row
+
+        return -1
+
+    def _block(self, data: List[Commit], blockNo: int):
+        begin = blockNo * _BLOCK_SIZE
+        commits = data[begin:begin + _BLOCK_SIZE]
+
+        block = self._blocks.get(blockNo)
+        if block is not None and block.isValid(commits):
+            return block
+
+        block = _TextBlock(commits)
+        if blockNo in self._blocks or len(self._blocks) < _MAX_CACHED_BLOCKS:
+            self._blocks[blockNo] = block
+
+        return block
+
+    @staticmethod
+    def _scan(data: List[Commit], pattern: re.Pattern, findRange: range):
+        for i in findRange:
+            if commitMatches(pattern, data[i]):
+                return i
+
+        return -1
@@ -3,7 +3,7 @@
 import os
 import re
 from enum import Enum
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, Iterable, List, Tuple
 
 from PySide6.QtCore import (
     QAbstractListModel,
@@ -55,14 +55,18 @@ from qgitc.common import dataDirPath, fullRepoDir, logger, pathsEqual, toSubmodu
 from qgitc.difffetcher import DiffFetcher
 from qgitc.diffview import DiffView
 from qgitc.events import CodeReviewEvent, LocalChangesCommittedEvent, ShowCommitEvent
-from qgitc.filestatus import StatusFileItemDelegate, StatusFileListModel
+from qgitc.filestatus import (
+    StatusFileInfo,
+    StatusFileItemDelegate,
+    StatusFileListModel,
+)
 from qgitc.findconstants import FindFlags
 from qgitc.gitutils import Git
 from qgitc.ntpdatetime import getNtpDateTime
 from qgitc.preferences import Preferences
 from qgitc.settings import Settings
 from qgitc.statewindow import StateWindow
-from qgitc.statusfetcher import StatusFetcher
+from qgitc.statusfetcher import StatusFetcher, UntrackedFilter
 from qgitc.submoduleexecutor import SubmoduleExecutor
 from qgitc.templatemanager import TemplateManageDialog, TemplateScope, loadTemplates
 from qgitc.ui_commitwindow import Ui_CommitWindow
@@ -443,6 +447,9 @@ class CommitWindow(StateWindow):
 
     def _loadLocalChanges(self):
         submodules = ApplicationBase.instance().settings().submodulesCache(Git.REPO_DIR)
+        # the hidden files may be changed, all changes reload here
+        self._statusFetcher.setUntrackedFilter(UntrackedFilter(
+            self._getIgnoredUntrackedFiles(), self._getIgnoredDirectories()))
         self._statusFetcher.fetch(submodules)
         self.ui.tbRefresh.setEnabled(False)
         self.ui.tbWDChanges.setEnabled(False)
@@ -483,28 +490,18 @@ class CommitWindow(StateWindow):
 
     def _onStatusAvailable(self, repoDir: str, fileList: List[Tuple[str, str, str]]):
         logger.debug("Status available %s -> %s", repoDir, fileList)
-        ignoredUntrackedFiles = self._ignoredUntrackedFilesSet()
-        hiddenDirs = self._ignoredDirectoriesSet()
+        # the hidden untracked files are dropped by the fetcher
+        stagedFiles = []
+        files = []
         for status, file, oldFile in fileList:
-            if status[1] == "?":
-                if file in ignoredUntrackedFiles:
-                    logger.debug("Ignore untracked file: %s", file)
-                    continue
-                normalizedPath = os.path.normpath(file)
-                isHidden = False
-                for hiddenDir in hiddenDirs:
-                    if normalizedPath.startswith(hiddenDir + os.sep):
-                        logger.debug(
-                            "Ignore untracked file in hidden directory: %s", file)
-                        isHidden = True
-                        break
-                if isHidden:
-                    continue
-
             if status[0] != " " and status[0] not in ["?", "!"]:
-                self._stagedModel.addFile(file, repoDir, status[0], oldFile)
+                stagedFiles.append(StatusFileInfo(
+                    file, repoDir, status[0], oldFile))
             if status[1] != " ":
-                self._filesModel.addFile(file, repoDir, status[1])
+                files.append(StatusFileInfo(file, repoDir, status[1]))
+
+        self._stagedModel.addFiles(stagedFiles)
+        self._filesModel.addFiles(files)
 
         self._updateAmendCommitsIfNeeded()
 
@@ -841,19 +838,24 @@ class CommitWindow(StateWindow):
             if repoDir not in submoduleFiles:
                 submoduleFiles[repoDir] = []
 
+    def _removeRepoFiles(self, repoDirs: Iterable[str]):
+        """ Remove the files of `repoDirs` to fetch their status again,
+        the other repos are unchanged """
+        self._filesModel.removeRepoFiles(repoDirs)
+        self._stagedModel.removeRepoFiles(repoDirs)
+        self._curFile = None
+        self._curFileStatus = None
+
     def _onUnstageClicked(self):
         ApplicationBase.instance().trackFeatureUsage("commit.unstage")
         submoduleFiles = self._collectSectionFiles(self.ui.lvStaged)
         if not submoduleFiles:
             return
 
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvFiles.model())
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvStaged.model())
-
         self._blockUI()
         self.ui.spinnerUnstaged.start()
         self._submoduleExecutor.submit(submoduleFiles, self._doUnstage)
-        self.clearModels()
+        self._removeRepoFiles(submoduleFiles)
 
     def _onUnstageAllClicked(self):
         ApplicationBase.instance().trackFeatureUsage("commit.unstage_all")
@@ -861,12 +863,10 @@ class CommitWindow(StateWindow):
         if not submoduleFiles:
             return
 
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvFiles.model())
-
         self._blockUI()
         self.ui.spinnerUnstaged.start()
         self._submoduleExecutor.submit(submoduleFiles, self._doUnstage)
-        self.clearModels()
+        self._removeRepoFiles(submoduleFiles)
 
     def _onStageClicked(self):
         ApplicationBase.instance().trackFeatureUsage("commit.stage")
@@ -874,13 +874,10 @@ class CommitWindow(StateWindow):
         if not submoduleFiles:
             return
 
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvFiles.model())
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvStaged.model())
-
         self._blockUI()
         self.ui.spinnerUnstaged.start()
         self._submoduleExecutor.submit(submoduleFiles, self._doStage)
-        self.clearModels()
+        self._removeRepoFiles(submoduleFiles)
 
     def _onStageAllClicked(self):
         ApplicationBase.instance().trackFeatureUsage("commit.stage_all")
@@ -888,12 +885,10 @@ class CommitWindow(StateWindow):
         if not submoduleFiles:
             return
 
-        self._updateSubmoduleFiles(submoduleFiles, self.ui.lvStaged.model())
-
         self._blockUI()
         self.ui.spinnerUnstaged.start()
         self._submoduleExecutor.submit(submoduleFiles, self._doStage)
-        self.clearModels()
+        self._removeRepoFiles(submoduleFiles)
 
     def _doUnstage(self, submodule: str, files: List[str], cancelEvent: CancelEvent):
         ApplicationBase.instance().trackFeatureUsage("commit.unstage")
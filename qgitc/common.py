@@ -37,7 +37,7 @@ class Commit():
     __slots__ = ("sha1", "comments", "author", "authorDate",
                  "committer", "committerDate", "committerDateTime",
                  "parents", "children", "repoDir", "subCommits",
-                 "untrackedFiles")
+                 "untrackedFiles", "fileName")
 
     def __init__(self, sha1="", comments="",
                  author="", authorDate="",
@@ -56,6 +56,8 @@ class Commit():
         self.repoDir: str = None
         self.subCommits: List[Commit] = []
         self.untrackedFiles: List[str] = []
+        # the file name of `git log --name-only`
+        self.fileName: str = None
 
     def __str__(self):
         return "Commit: {0}\n"  \
@@ -78,10 +80,15 @@ class Commit():
         authorDate = parts[3]
         committer = parts[4]
         committerDate = parts[5]
-        parents = [x for x in str_split(parts[6], " ") if x]
-
-        return cls(sha1, comments, author, authorDate,
-                   committer, committerDate, parents)
+        # the names of `--name-only` follow the parents
+        parents, _, fileName = parts[6].partition("\n")
+        parents = [x for x in str_split(parents, " ") if x]
+
+        commit = cls(sha1, comments, author, authorDate,
+                     committer, committerDate, parents)
+        if fileName:
+            commit.fileName = fileName
+        return commit
 
     def isValid(self):
         return len(self.sha1) > 0
@@ -1,11 +1,19 @@
 # -*- coding: utf-8 -*-
 
+from functools import partial
+
 from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, Signal
 
 from qgitc.common import logger
 from qgitc.gitutils import Git, GitProcess
 
 
+def _killProcess(process: QProcess):
+    if process.state() != QProcess.NotRunning:
+        process.kill()
+        process.waitForFinished(100)
+
+
 class DataFetcher(QObject):
 
     fetchFinished = Signal(int)
@@ -61,6 +69,8 @@ class DataFetcher(QObject):
         self._process.readyReadStandardOutput.connect(self.onDataAvailable)
         self._process.readyReadStandardError.connect(self.onProcessError)
         self._process.finished.connect(self.onDataFinished)
+        # the process is deleted with us, don't leave it running
+        self.destroyed.connect(partial(_killProcess, self._process))
 
     def onDataAvailable(self):
         if not self._active or not self._process:
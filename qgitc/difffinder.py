@@ -2,9 +2,10 @@
 
 import bisect
 import os
+from collections import OrderedDict, deque
 from typing import List
 
-from PySide6.QtCore import SIGNAL, QObject, QProcess, Signal
+from PySide6.QtCore import SIGNAL, QObject, QProcess, QTimer, Signal
 
 from qgitc.commitsource import CommitSource
 from qgitc.common import (
@@ -20,6 +21,53 @@ from qgitc.common import (
 )
 from qgitc.gitutils import Git, GitProcess
 
+# Max number of `git diff-tree` processes running at the same time
+_MAX_FINDERS = max(2, os.cpu_count() or 1)
+# Max number of commits searched by one `git diff-tree` process
+_FIND_CHUNK_SIZE = 2000
+# Max number of searched sha1s of all the cached finds
+_MAX_CACHED_SHA1S = 1000000
+
+
+class _FindCacheEntry:
+
+    __slots__ = ("searched", "matched")
+
+    def __init__(self):
+        self.searched = set()
+        self.matched = set()
+
+    def prune(self, sha1s):
+        """ Drop the commits not in `sha1s` """
+        self.searched = {sha1 for sha1 in self.searched if sha1 in sha1s}
+        self.matched = {sha1 for sha1 in self.matched if sha1 in sha1s}
+
+
+# (repo dir, submodule, pattern, field, flag, filter path) => _FindCacheEntry
+# the diff of a commit never changes, so the results are kept across reloads,
+# only the commits gone after reloading are dropped
+_findCache = OrderedDict()
+
+
+def _findCacheEntry(submodule: str, param: FindParameter, filterPath: List[str]):
+    key = (Git.REPO_DIR, submodule, param.pattern, param.field, param.flag,
+           tuple(filterPath) if filterPath else None)
+    entry = _findCache.get(key)
+    if entry is None:
+        entry = _FindCacheEntry()
+        _findCache[key] = entry
+    else:
+        _findCache.move_to_end(key)
+    return entry
+
+
+def _trimFindCache():
+    total = sum(len(entry.searched) for entry in _findCache.values())
+    # keep the most recent one even if too big
+    while total > _MAX_CACHED_SHA1S and len(_findCache) > 1:
+        _, entry = _findCache.popitem(last=False)
+        total -= len(entry.searched)
+
 
 class FindWorker(QObject):
 
@@ -30,9 +78,22 @@ class FindWorker(QObject):
         super().__init__(parent)
         self._submodule = submodule
         self._process: QProcess = None
-        self._result = []
+        self._sha1s: List[str] = []
+        self._result: List[str] = []
         self._dataFragment = None
 
+    @property
+    def submodule(self):
+        return self._submodule
+
+    @property
+    def sha1s(self):
+        return self._sha1s
+
+    @property
+    def result(self):
+        return self._result
+
     def cancel(self):
         if not self._process:
             return
@@ -44,9 +105,13 @@ class FindWorker(QObject):
                            SIGNAL("finished(int, QProcess::ExitStatus)"),
                            self._onFinished)
         self._process.kill()
+        # the process is deleted with us, make sure it exited
+        self._process.waitForFinished()
+        self._process = None
 
     def find(self, sha1s: List[str], param: FindParameter, filterPath: List[str] = None):
         assert len(sha1s) > 0
+        self._sha1s = sha1s
 
         args = ["diff-tree", "-r", "-s", "-m", "--stdin"]
         if param.field == FindField.AddOrDel:
@@ -112,7 +177,9 @@ class FindWorker(QObject):
             parts.pop()
 
         if parts:
-            self.resultAvailable.emit([p.decode("utf-8") for p in parts])
+            result = [p.decode("utf-8") for p in parts]
+            self._result.extend(result)
+            self.resultAvailable.emit(result)
 
 
 class DiffFinder(QObject):
@@ -123,12 +190,22 @@ class DiffFinder(QObject):
     def __init__(self, source: CommitSource, parent=None):
         super().__init__(parent)
         self._finders: List[FindWorker] = []
+        self._pendingFinds = deque()
+        self._cachedResult: List[str] = []
+        self._cacheTimer = QTimer(self)
+        self._cacheTimer.setSingleShot(True)
+        self._cacheTimer.timeout.connect(self._onCachedResultTimeout)
         self._source = source
         self._result = []
+        self._resultSet = set()
         self._param: FindParameter = None
         self._filterPath: List[str] = None
         self._submodules: List[str] = None
         self._sha1IndexMap = {}
+        # any of the finders failed, such as an invalid pattern
+        self._findFailed = False
+        # the cache entries pruned since the logs reloaded
+        self._prunedEntries = set()
 
     def updateParameters(self, param: FindParameter, filterPath: List[str], submodules: List[str]):
         """True if the parameters are updated, False otherwise."""
@@ -148,46 +225,87 @@ class DiffFinder(QObject):
 
     def findAsync(self):
         self.cancel()
+        self._findFailed = False
 
-        moduleSha1s = self._dispatchCommits()
-        if not moduleSha1s:
+        chunks = self._dispatchCommits()
+        if not chunks:
             return False
 
-        # TODO: limit the number of finders running at the same time
-        for submodule, sha1s in moduleSha1s.items():
-            finder = FindWorker(submodule, self)
-            finder.resultAvailable.connect(
-                self._onResultAvailable)
-            finder.finished.connect(
-                self._onFindFinished)
-            self._finders.append(finder)
-            finder.find(sha1s, self._param, self._filterPath)
+        # the chunks are ordered by their first commit in the target
+        # range, so the ones near the current commit are searched first
+        for submodule, sha1s in chunks:
+            entry = _findCacheEntry(submodule, self._param, self._filterPath)
+            if entry not in self._prunedEntries:
+                entry.prune(self._sha1IndexMap)
+                self._prunedEntries.add(entry)
+
+            if not entry.searched:
+                self._pendingFinds.append((submodule, sha1s))
+                continue
+
+            # only search the new commits
+            newSha1s = []
+            for sha1 in sha1s:
+                if sha1 not in entry.searched:
+                    newSha1s.append(sha1)
+                elif sha1 in entry.matched:
+                    self._cachedResult.append(sha1)
+            if newSha1s:
+                self._pendingFinds.append((submodule, newSha1s))
+
+        while self._pendingFinds and len(self._finders) < _MAX_FINDERS:
+            self._startNextFinder()
+
+        # report the cached results as the finders do
+        if self._cachedResult or not self._finders:
+            self._cacheTimer.start(0)
 
         return True
 
+    def _startNextFinder(self):
+        submodule, sha1s = self._pendingFinds.popleft()
+        finder = FindWorker(submodule, self)
+        finder.resultAvailable.connect(
+            self._onResultAvailable)
+        finder.finished.connect(
+            self._onFindFinished)
+        self._finders.append(finder)
+        finder.find(sha1s, self._param, self._filterPath)
+
     def cancel(self):
+        self._cacheTimer.stop()
+        self._cachedResult.clear()
+        self._pendingFinds.clear()
         for finder in self._finders:
             finder.cancel()
+            finder.deleteLater()
         self._finders.clear()
 
     def reset(self):
         self.cancel()
         self.clearResult()
+        self._prunedEntries.clear()
         self._param = None
         self._filterPath = None
         self._submodules = None
 
     def clearResult(self):
         self._result.clear()
+        self._resultSet.clear()
         self._sha1IndexMap.clear()
 
     def isRunning(self):
-        return len(self._finders) > 0
+        return len(self._finders) > 0 or \
+            len(self._pendingFinds) > 0 or \
+            self._cacheTimer.isActive()
 
     @property
     def findResult(self):
         return self._result
 
+    def isResult(self, index: int):
+        return index in self._resultSet
+
     def nextResult(self):
         if not self._param.range or not self._result:
             return FIND_NOTFOUND
@@ -212,35 +330,81 @@ class DiffFinder(QObject):
         if not self._sha1IndexMap:
             return
 
+        indexes = []
         for sha1 in result:
             index = self._sha1IndexMap[sha1]
-            bisect.insort(self._result, index)
+            if index not in self._resultSet:
+                self._resultSet.add(index)
+                indexes.append(index)
+
+        if indexes:
+            # merging the two sorted runs is linear
+            indexes.sort()
+            self._result.extend(indexes)
+            self._result.sort()
         self.resultAvailable.emit()
 
     def _onFindFinished(self, exitCode, exitStatus):
         finder: FindWorker = self.sender()
         self._finders.remove(finder)
-        if self._finders:
+        finder.deleteLater()
+
+        if exitCode != 0 or exitStatus != QProcess.NormalExit:
+            self._findFailed = True
+        else:
+            entry = _findCacheEntry(
+                finder.submodule, self._param, self._filterPath)
+            entry.searched.update(finder.sha1s)
+            entry.matched.update(finder.result)
+            _trimFindCache()
+
+        if self._pendingFinds:
+            self._startNextFinder()
             return
 
-        if exitCode != 0 and exitStatus != QProcess.NormalExit:
+        self._checkFinished()
+
+    def _onCachedResultTimeout(self):
+        if self._cachedResult:
+            result = self._cachedResult
+            self._cachedResult = []
+            self._onResultAvailable(result)
+
+        self._checkFinished()
+
+    def _checkFinished(self):
+        if self._finders or self._cacheTimer.isActive():
+            return
+
+        if self._findFailed:
             self.findFinished.emit(FIND_CANCELED)
         elif not self._result:
             self.findFinished.emit(FIND_NOTFOUND)
 
     def _dispatchCommits(self):
+        """ Split the commits into chunks of each submodule, so that
+        a big repo can be searched by several processes """
+        chunks = []
         moduleSha1s = {}
 
         submodules = filterSubmoduleByPath(self._submodules, self._filterPath)
 
+        def _addSha1(submodule: str, sha1: str):
+            sha1s = moduleSha1s.get(submodule)
+            if sha1s is None or len(sha1s) >= _FIND_CHUNK_SIZE:
+                sha1s = []
+                moduleSha1s[submodule] = sha1s
+                chunks.append((submodule, sha1s))
+            sha1s.append(sha1)
+
         def _consumeCommit(commit: Commit):
             if not submodules:
-                moduleSha1s.setdefault(None, []).append(commit.sha1)
+                _addSha1(None, commit.sha1)
                 return
 
             for submodule in submodules:
                 if commit.repoDir == submodule:
-                    moduleSha1s.setdefault(commit.repoDir, []).append(commit.sha1)
+                    _addSha1(commit.repoDir, commit.sha1)
 
         def _dispatch(rg: range):
             for i in rg:
@@ -265,4 +429,4 @@ class DiffFinder(QObject):
         # then the rest
         _dispatch(range(begin, end))
 
-        return moduleSha1s
+        return chunks
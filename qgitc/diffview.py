@@ -170,6 +170,7 @@ class FileListModel(QAbstractListModel):
 class DiffView(QWidget):
     requestCommit = Signal(str, bool, bool)
     requestBlame = Signal(str, bool, Commit)
+    requestBlameOwnership = Signal(list, Commit)
 
     beginFetch = Signal()
     endFetch = Signal()
@@ -225,6 +226,8 @@ class DiffView(QWidget):
                               self.__onBlameFile)
         self.twMenu.addAction(self.tr("Blame parent commit"),
                               self.__onBlameParentCommit)
+        self.twMenu.addAction(self.tr("Blame &ownership report"),
+                              self.__onBlameOwnership)
 
         self.twMenu.addSeparator()
         self.acRestoreFiles = self.twMenu.addAction(
@@ -419,6 +422,25 @@ class DiffView(QWidget):
         app = ApplicationBase.instance()
         app.trackFeatureUsage("diffview.blame_parent_commit")
 
+    def __onBlameOwnership(self):
+        if not self.commit:
+            return
+
+        indexes = self.fileListView.selectionModel().selectedRows()
+        files = [index.data() for index in indexes
+                 if not self.__isCommentItem(index)]
+        # all the files of the commit if none selected
+        if not files:
+            files = [self.fileListModel.data(self.fileListModel.index(i, 0))
+                     for i in range(1, self.fileListModel.rowCount())]
+        if not files:
+            return
+
+        self.requestBlameOwnership.emit(files, self.commit)
+
+        app = ApplicationBase.instance()
+        app.trackFeatureUsage("diffview.blame_ownership")
+
     def __onRestoreFiles(self):
         indexes = self.fileListView.selectedIndexes()
         if not indexes:
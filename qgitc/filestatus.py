@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 
 from PySide6.QtCore import QAbstractListModel, QModelIndex, QRect, QRectF, Qt
 from PySide6.QtGui import QFont, QPainter, QPen
@@ -11,6 +11,8 @@ from qgitc.applicationbase import ApplicationBase
 
 class StatusFileInfo():
 
+    __slots__ = ("file", "repoDir", "statusCode", "oldFile")
+
     def __init__(self, file: str, repoDir: str, statusCode: str, oldFile: str = None):
         self.file = file
         self.repoDir = repoDir
@@ -111,6 +113,8 @@ class StatusFileListModel(QAbstractListModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._fileList: List[StatusFileInfo] = []
+        # the row of each (repoDir, file)
+        self._fileRows: Dict[Tuple[str, str], int] = {}
         self._icons = {}
 
     def rowCount(self, parent=QModelIndex()):
@@ -126,11 +130,46 @@ class StatusFileListModel(QAbstractListModel):
         if row < 0 or (row + count) > self.rowCount(parent) or count < 1:
             return False
 
+        self._removeRange(row, count)
+        self._updateFileRows(row)
+
+        return True
+
+    def _removeRange(self, row, count):
         self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for info in self._fileList[row: row + count]:
+            self._fileRows.pop((info.repoDir, info.file), None)
         del self._fileList[row: row + count]
         self.endRemoveRows()
 
-        return True
+    def _removeRowSet(self, rows: Iterable[int]):
+        """ Remove `rows` with one notification per contiguous range,
+        return the removed infos in row order """
+        rows = sorted(rows)
+        if not rows:
+            return []
+
+        removed = [self._fileList[row] for row in rows]
+        ranges = []
+        begin = end = rows[0]
+        for row in rows[1:]:
+            if row != end + 1:
+                ranges.append((begin, end))
+                begin = row
+            end = row
+        ranges.append((begin, end))
+
+        # from the last one so the rows of the others are unchanged
+        for begin, end in reversed(ranges):
+            self._removeRange(begin, end - begin + 1)
+        self._updateFileRows(rows[0])
+
+        return removed
+
+    def _updateFileRows(self, begin):
+        for row in range(begin, len(self._fileList)):
+            info = self._fileList[row]
+            self._fileRows[(info.repoDir, info.file)] = row
 
     def data(self, index, role=Qt.DisplayRole):
         row = index.row()
@@ -155,26 +194,43 @@ class StatusFileListModel(QAbstractListModel):
         return None
 
     def addFile(self, file: str, repoDir: str, statusCode: str, oldFile: str = None):
+        self.addFiles([StatusFileInfo(file, repoDir, statusCode, oldFile)])
+
+    def addFiles(self, files: List[StatusFileInfo]):
+        """ Append `files` with one insert notification """
+        if not files:
+            return
+
         rowCount = self.rowCount()
-        self.beginInsertRows(QModelIndex(), rowCount, rowCount)
-        self._fileList.append(StatusFileInfo(
-            file, repoDir, statusCode, oldFile))
+        self.beginInsertRows(QModelIndex(), rowCount,
+                             rowCount + len(files) - 1)
+        self._fileList.extend(files)
+        self._updateFileRows(rowCount)
         self.endInsertRows()
 
-    def removeFile(self, file: str, repoDir: str):
-        if not self._fileList:
-            return None
-
-        for i, fileInfo in enumerate(self._fileList):
-            if fileInfo.file == file and fileInfo.repoDir == repoDir:
-                break
-        else:
-            return None
+    def fileRow(self, file: str, repoDir: str):
+        """ Return the row of `file` in `repoDir`, -1 if not found """
+        return self._fileRows.get((repoDir, file), -1)
 
-        self.beginRemoveRows(QModelIndex(), i, i)
-        info = self._fileList.pop(i)
-        self.endRemoveRows()
-        return info
+    def removeFile(self, file: str, repoDir: str):
+        removed = self.removeFiles([(file, repoDir)])
+        return removed[0] if removed else None
+
+    def removeFiles(self, files: Iterable[Tuple[str, str]]):
+        """ Remove the (file, repoDir) of `files`, return the removed infos """
+        rows = set()
+        for file, repoDir in files:
+            row = self._fileRows.get((repoDir, file))
+            if row is not None:
+                rows.add(row)
+        return self._removeRowSet(rows)
+
+    def removeRepoFiles(self, repoDirs: Iterable[str]):
+        """ Remove all the files of `repoDirs`, return the removed infos """
+        repoDirs = set(repoDirs)
+        rows = [row for row, info in enumerate(self._fileList)
+                if info.repoDir in repoDirs]
+        return self._removeRowSet(rows)
 
     def clear(self):
         self.removeRows(0, self.rowCount())
@@ -263,13 +263,18 @@ class FindPanel(QWidget):
     def flags(self) -> int:
         return self._flags
 
-    def updateStatus(self, currentIndex: int, totalCount: int, searching: bool = False, invalidPattern: bool = False):
+    def updateStatus(self, currentIndex: int, totalCount: int, searching: bool = False, invalidPattern: bool = False, moreCount: int = 0):
         if invalidPattern:
             color = ApplicationBase.instance().colorSchema().ErrorText
             self._lbStatus.setText(self.tr("No results"))
         elif totalCount > 0:
             color = self.palette().windowText().color()
-            self._lbStatus.setText(f"{currentIndex + 1}/{totalCount}")
+            if moreCount > 0:
+                # only the first `totalCount` ones can be navigated
+                self._lbStatus.setText(self.tr("{0}/{1} ({2} more)").format(
+                    currentIndex + 1, totalCount, moreCount))
+            else:
+                self._lbStatus.setText(f"{currentIndex + 1}/{totalCount}")
         elif searching:
             color = self.palette().windowText().color()
             self._lbStatus.setText(self.tr("Finding..."))
@@ -256,8 +256,7 @@ class FindWidget(QWidget):
             else:
                 self._curIndex += len(result)
             low = bisect.bisect_left(self._findResult, result[0])
-            for i in range(0, len(result)):
-                self._findResult.insert(low + i, result[i])
+            self._findResult[low:low] = result
         else:
             if curIndex >= 0:
                 self._curIndex = curIndex + len(self._findResult)
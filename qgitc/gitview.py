@@ -6,6 +6,8 @@ from PySide6.QtCore import QTimer, Signal
 from PySide6.QtWidgets import QCompleter, QWidget
 
 from qgitc.applicationbase import ApplicationBase
+from qgitc.blameownershipdialog import BlameOwnershipDialog
+from qgitc.commitfilter import CommitFilter
 from qgitc.common import *
 from qgitc.events import BlameEvent
 from qgitc.gitutils import Git
@@ -86,6 +88,8 @@ class GitView(QWidget):
 
         self.ui.diffView.requestCommit.connect(self.__onRequestCommit)
         self.ui.diffView.requestBlame.connect(self.__onRequestBlame)
+        self.ui.diffView.requestBlameOwnership.connect(
+            self.__onRequestBlameOwnership)
         self.ui.diffView.beginFetch.connect(self.__onBeginFetch)
         self.ui.diffView.endFetch.connect(self.__onEndFetch)
 
@@ -320,6 +324,23 @@ class GitView(QWidget):
         QCoreApplication.postEvent(
             ApplicationBase.instance(), BlameEvent(filePath, rev, repoDir=repoDir))
 
+    def __onRequestBlameOwnership(self, files: list, commit: Commit):
+        repoFiles = {}
+        for filePath in files:
+            realCommit = fileRealCommit(filePath, commit)
+            if realCommit.repoDir and realCommit.repoDir != ".":
+                filePath = filePath[len(realCommit.repoDir) + 1:]
+            repoFiles.setdefault(realCommit.repoDir, (realCommit, []))[1].append(filePath)
+
+        for realCommit, paths in repoFiles.values():
+            # the local changes are reported as HEAD
+            rev = realCommit.sha1
+            if rev in (Git.LCC_SHA1, Git.LUC_SHA1):
+                rev = "HEAD"
+            dialog = BlameOwnershipDialog(self)
+            dialog.show()
+            dialog.blame(commitRepoDir(realCommit), rev, paths)
+
     def setBranchDesc(self, desc):
         self.ui.lbBranch.setText(desc)
 
@@ -344,10 +365,27 @@ class GitView(QWidget):
             return self.ui.cbBranch.itemText(index)
         return ""
 
-    def filterLog(self, args):
+    def filterLog(self, args, inMemoryOnly=False):
+        """ Filter the logs by `args`, the commits loaded are filtered in
+        memory if possible. If `inMemoryOnly` is True, do nothing if
+        the logs must be fetched again """
+        # composite mode merges the logs of submodules, leave it to git
+        if ApplicationBase.instance().settings().isCompositeMode():
+            commitFilter = None
+        else:
+            args, commitFilter = CommitFilter.fromArgs(args)
+
+        if not args and not self.logArgs and (commitFilter or inMemoryOnly):
+            # same as the logs loaded without args
+            args = self.logArgs
+
+        if inMemoryOnly and args != self.logArgs:
+            return
+
         paths = extractFilePaths(args)
         self.ui.diffView.setFilterPath(paths)
         self.ui.logView.setFilterPath(paths)
+        self.ui.logView.setCommitFilter(commitFilter)
 
         if args != self.logArgs:
             self.logArgs = args
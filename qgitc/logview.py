@@ -4,7 +4,7 @@ import json
 import os
 import re
 import tempfile
-from bisect import bisect_right
+from bisect import bisect_left, bisect_right
 from typing import List
 
 from PySide6.QtCore import (
@@ -51,7 +51,9 @@ from qgitc.applicationbase import ApplicationBase
 from qgitc.changeauthordialog import ChangeAuthorDialog
 from qgitc.cherrypickprogressdialog import CherryPickProgressDialog
 from qgitc.cherrypicksession import CherryPickItem
+from qgitc.commitfilter import CommitFilter
 from qgitc.commitsource import CommitSource
+from qgitc.committextindex import CommitTextIndex
 from qgitc.common import *
 from qgitc.difffinder import DiffFinder
 from qgitc.events import (
@@ -219,6 +221,31 @@ class Marker():
         if self._changedCallback:
             self._changedCallback()
 
+    def unmarkIndices(self, indices: List[int]):
+        """Unmark the sorted indices at once, notify only once"""
+        if not indices:
+            return
+
+        self._ensureSorted()
+        newRanges = []
+        for r in self._ranges:
+            begin = r.begin
+            i = bisect_left(indices, begin)
+            while i < len(indices) and indices[i] <= r.end:
+                if indices[i] > begin:
+                    newRanges.append(
+                        MarkRange(begin, indices[i] - 1, r.markType))
+                begin = indices[i] + 1
+                i += 1
+
+            if begin <= r.end:
+                newRanges.append(MarkRange(begin, r.end, r.markType))
+
+        # still sorted as the ranges never overlap
+        self._ranges = newRanges
+        if self._changedCallback:
+            self._changedCallback()
+
     def countMarked(self):
         """Efficiently count total number of marked commits"""
         return sum(r.end - r.begin + 1 for r in self._ranges)
@@ -613,6 +640,11 @@ class LogView(QAbstractScrollArea, CommitSource):
         self.delayVisible = False
         self.delayUpdateParents = False
 
+        # filter the fetched commits in memory, all of them are kept
+        # in `_sourceData` and `data` is the ones passed the filter
+        self._commitFilter: CommitFilter = None
+        self._sourceData: List[Commit] = None
+
         # composite mode keeps merging sub-repo commits into the selected row,
         # remember what we last showed so the diff can be refreshed once
         self._compositeSelCommit: Commit = None
@@ -642,6 +674,7 @@ class LogView(QAbstractScrollArea, CommitSource):
         self.authorRe = re.compile("(.*) <.*>$")
 
         self._finder = DiffFinder(self, self)
+        self._textIndex = CommitTextIndex()
         self.needUpdateFindResult = True
 
         self.highlightPattern = None
@@ -833,6 +866,9 @@ class LogView(QAbstractScrollArea, CommitSource):
 
     def clear(self):
         self.data.clear()
+        if self._sourceData is not None:
+            self._sourceData.clear()
+        self._textIndex.clear()
         self.curIdx = -1
         self.selectedIndices.clear()
         self._compositeSelCommit = None
@@ -1479,6 +1515,12 @@ class LogView(QAbstractScrollArea, CommitSource):
             self.__onNormalLogsAvailable(logs)
 
     def __onNormalLogsAvailable(self, logs):
+        if self._commitFilter:
+            self._sourceData.extend(logs)
+            logs = [commit for commit in logs if self._commitFilter(commit)]
+            if not logs:
+                return
+
         self.data.extend(logs)
 
         if self.delayUpdateParents and len(self.data) > 2:
@@ -2320,40 +2362,7 @@ class LogView(QAbstractScrollArea, CommitSource):
         assert findField == FindField.Comments
         self.cancelFindCommit()
 
-        def findInCommit(commit):
-            if findPattern.search(commit.comments):
-                return True
-
-            if findPattern.search(commit.author):
-                return True
-
-            if findPattern.search(commit.committer):
-                return True
-
-            if findPattern.search(commit.sha1):
-                return True
-
-            if findPattern.search(commit.authorDate):
-                return True
-
-            if findPattern.search(commit.committerDate):
-                return True
-
-            for p in commit.parents:
-                if findPattern.search(p):
-                    return True
-
-            return False
-
-        result = -1
-        total = abs(findRange.stop - findRange.start)
-
-        for i in findRange:
-            if findInCommit(self.data[i]):
-                result = i
-                break
-
-        return result
+        return self._textIndex.findCommit(self.data, findPattern, findRange)
 
     def cancelFindCommit(self, forced=True):
         self.needUpdateFindResult = False
@@ -2379,6 +2388,58 @@ class LogView(QAbstractScrollArea, CommitSource):
     def setFilterPath(self, path):
         self.filterPath = path
 
+    def commitFilter(self):
+        return self._commitFilter
+
+    def setCommitFilter(self, commitFilter: CommitFilter):
+        """ Show only the fetched commits that pass `commitFilter`
+        without fetching again, None to show all of them """
+        if commitFilter == self._commitFilter:
+            return
+
+        self.cancelFindCommit()
+        self.clearFindData()
+
+        # the local changes are always on top
+        pinned = 0
+        while pinned < len(self.data) and \
+                self.data[pinned].sha1 in (Git.LUC_SHA1, Git.LCC_SHA1):
+            pinned += 1
+
+        if self._sourceData is None:
+            self._sourceData = self.data[pinned:]
+
+        curCommit = None
+        if 0 <= self.curIdx < len(self.data):
+            curCommit = self.data[self.curIdx]
+
+        data = self.data[:pinned]
+        if commitFilter:
+            data.extend(commit for commit in self._sourceData
+                        if commitFilter(commit))
+        else:
+            data.extend(self._sourceData)
+            self._sourceData = None
+
+        # the children are different in the new rows
+        for commit in data[pinned:]:
+            commit.children = None
+
+        self._commitFilter = commitFilter
+        self.data = data
+        self.curIdx = -1
+        self.selectedIndices.clear()
+        self.marker.clear()
+        self.__resetGraphs()
+        self.updateGeometries()
+
+        index = -1
+        if curCommit is not None:
+            index = self.findCommitIndex(curCommit.sha1)
+        if index == -1 and self.data:
+            index = 0
+        self.setCurrentIndex(index)
+
     def setLogGraph(self, logGraph):
         self.logGraph = logGraph
 
@@ -2413,7 +2474,7 @@ class LogView(QAbstractScrollArea, CommitSource):
         settings = ApplicationBase.instance().settings()
         if self.fetcher.isLoading():
             tips = self.tr("Loading commits, please wait...")
-        elif self.args:
+        elif self.args or self._commitFilter:
             tips = self.tr(
                 "No commits found for the current filter. Try adjusting your filter criteria.")
         elif settings.isCompositeMode() and \
@@ -2570,8 +2631,7 @@ class LogView(QAbstractScrollArea, CommitSource):
             rect.adjust(4, 0, 0, 0)
 
             # bold find result
-            # it seems that *in* already fast, so no bsearch
-            if i in self._finder.findResult:
+            if self._finder.isResult(i):
                 font = painter.font()
                 font.setBold(True)
                 painter.setFont(font)
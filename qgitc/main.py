@@ -21,6 +21,7 @@ from PySide6.QtWidgets import QStyle
 
 from qgitc.application import Application
 from qgitc.applicationbase import ApplicationBase
+from qgitc.blameownershipdialog import BlameOwnershipDialog
 from qgitc.common import attachConsole, logger
 from qgitc.excepthandler import ExceptHandler
 from qgitc.gcdiag import install as installGcDiag
@@ -83,7 +84,7 @@ def _setup_argument(prog):
         help="Blame with <rev>.")
     blame_parser.add_argument(
         "file", metavar="<file>",
-        help="The file to blame.")
+        help="The file to blame, or a directory for the ownership report.")
     blame_parser.set_defaults(func=_do_blame)
 
     commit_parser = subparsers.add_parser(
@@ -269,6 +270,9 @@ def _do_log(args):
 def _do_blame(args):
     app = _init_gui(args.cmd)
 
+    if os.path.isdir(args.file):
+        return _do_blame_ownership(app, args)
+
     window = app.getWindow(WindowType.BlameWindow)
     _move_center(window)
 
@@ -285,6 +289,21 @@ def _do_blame(args):
     return _do_exec(app)
 
 
+def _do_blame_ownership(app, args):
+    dir = os.path.abspath(args.file)
+    _detect_and_fix_repo(os.path.join(dir, "."))
+
+    repoDir = Git.repoTopLevelDir(dir) or Git.REPO_DIR
+    path = os.path.relpath(dir, repoDir).replace("\\", "/")
+
+    dialog = BlameOwnershipDialog()
+    _move_center(dialog)
+    dialog.show()
+    dialog.blame(repoDir, args.rev, [path])
+
+    return _do_exec(app)
+
+
 def _do_commit_ai(app: Application, args):
     """Console mode commit with AI-generated message"""
     import itertools
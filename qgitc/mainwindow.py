@@ -78,6 +78,11 @@ class MainWindow(StateWindow):
         self._delayTimer = QTimer(self)
         self._delayTimer.setSingleShot(True)
 
+        self._liveFilterTimer = QTimer(self)
+        self._liveFilterTimer.setSingleShot(True)
+        self._liveFilterTimer.timeout.connect(
+            self.__onLiveFilterTimeout)
+
         self._repoTopDir = None
         self._reloadingRepo = False
 
@@ -158,6 +163,8 @@ class MainWindow(StateWindow):
 
         self.ui.leOpts.returnPressed.connect(
             self.__onOptsReturnPressed)
+        self.ui.leOpts.textEdited.connect(
+            self.__onOptsTextEdited)
 
         self.ui.acAbout.triggered.connect(
             self.__onAboutTriggered)
@@ -445,9 +452,26 @@ class MainWindow(StateWindow):
             return
 
         # Regular git log filter processing
+        self._liveFilterTimer.stop()
         self.filterOpts(opts, self.ui.gitViewA)
         self.filterOpts(opts, self.gitViewB)
 
+    def __onOptsTextEdited(self, text):
+        self._liveFilterTimer.start(300)
+
+    def __onLiveFilterTimeout(self):
+        opts = self.ui.leOpts.text().strip()
+        if opts.lower().startswith("@ai "):
+            return
+
+        # only the filters that need no fetching are applied while typing
+        try:
+            self.filterOpts(opts, self.ui.gitViewA, True)
+            self.filterOpts(opts, self.gitViewB, True)
+        except ValueError:
+            # the quotes are not closed yet
+            pass
+
     def __onCopyTriggered(self):
         fw = ApplicationBase.instance().focusWidget()
         assert fw
@@ -594,14 +618,14 @@ class MainWindow(StateWindow):
 
         return True
 
-    def filterOpts(self, opts: str, gitView: GitView):
+    def filterOpts(self, opts: str, gitView: GitView, inMemoryOnly=False):
         if not gitView:
             return
 
         args = shlex.split(self._fixSeparator(opts), posix=True)
         if self.ui.cbSelfCommits.isChecked():
             args.insert(0, f"--author={Git.userName()}")
-        gitView.filterLog(args)
+        gitView.filterLog(args, inMemoryOnly)
 
     @staticmethod
     def _fixSeparator(opts: str):
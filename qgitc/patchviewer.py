@@ -34,7 +34,10 @@ class DiffTextLine(SourceTextLineBase):
         super().__init__(text, viewer._font, viewer._option)
         self._parentCount = parentCount
 
-    def rehighlight(self):
+    def _highlightKey(self):
+        return self._parentCount
+
+    def _highlightFormats(self):
         text = self.text()
 
         formats = self._commonHighlightFormats()
@@ -75,12 +78,13 @@ class DiffTextLine(SourceTextLineBase):
         if tcFormat.isValid():
             formats.append(createFormatRange(0, self.utf16Length(), tcFormat))
 
-        if formats:
-            self._layout.setFormats(formats)
+        return formats
 
 
 class InfoTextLine(TextLine):
 
+    _plainLayout = False
+
     def __init__(self, viewer, type, text):
         super(InfoTextLine, self).__init__(
             text, viewer._font)
@@ -138,6 +142,8 @@ class Sha1TextLine(LinkTextLine):
 
 class SummaryTextLine(TextLine):
 
+    _plainLayout = False
+
     def __init__(self, text, font, option=None, indent=4):
         super().__init__(text, font, option)
         self._indent = indent
@@ -197,11 +203,8 @@ class PatchViewer(SourceViewer):
         # alloc too many objects at the same time is too slow
         # so delay construct TextLine and decode bytes here
         if type == DiffType.Diff:
-            text, _ = decodeFileData(content, diff_encoding)
-            # FIXME: The git may generate some patch with \x00 char (such as: b'- \x00')
-            # The origin file is a normal text file and not Unicode encoding
-            textLine = DiffTextLine(self, text.replace(
-                '\x00', ''), self._parentCount)
+            textLine = DiffTextLine(
+                self, self._decodeDiff(content), self._parentCount)
         elif type == DiffType.File or \
                 type == DiffType.FileInfo:
             textLine = InfoTextLine(self, type, content.decode(diff_encoding))
@@ -210,6 +213,22 @@ class PatchViewer(SourceViewer):
 
         return textLine
 
+    def toText(self, item):
+        type, content = item
+        if type == DiffType.Diff:
+            return super().toText(self._decodeDiff(content))
+        return content.decode(diff_encoding)
+
+    @staticmethod
+    def _decodeDiff(content):
+        text, _ = decodeFileData(content, diff_encoding)
+        # FIXME: The git may generate some patch with \x00 char (such as: b'- \x00')
+        # The origin file is a normal text file and not Unicode encoding
+        return text.replace('\x00', '')
+
+    def textLength(self, item):
+        return len(item[1])
+
     def addAuthorLine(self, name):
         textLine = AuthorTextLine(self, name)
         self.appendTextLine(textLine)
@@ -19,6 +19,34 @@ from qgitc.statewindow import StateWindow
 from qgitc.ui_pickbranchwindow import Ui_PickBranchWindow
 from qgitc.waitingspinnerwidget import QtWaitingSpinner
 
+# The patterns can't be combined as the group numbers are changed,
+# or the group names may be redefined
+_group_ref_re = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?\(")
+# The global inline flags would apply to all the combined patterns
+_global_flags_re = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _combineFilterPatterns(patterns: List[str], useRegex: bool) -> List[re.Pattern]:
+    """Combine the filter patterns to one regex if possible,
+    re.error raised if any of them is invalid"""
+    if not useRegex:
+        # case-insensitive plain text
+        pattern = "|".join(re.escape(p) for p in patterns)
+        return [re.compile(pattern, re.IGNORECASE)]
+
+    # compile each one first for the accurate error
+    compiledPatterns = [re.compile(p) for p in patterns]
+    if len(compiledPatterns) > 1 and \
+            not any(_group_ref_re.search(p) or _global_flags_re.search(p)
+                    for p in patterns):
+        try:
+            pattern = "|".join("(?:%s)" % p for p in patterns)
+            return [re.compile(pattern)]
+        except re.error:
+            pass
+
+    return compiledPatterns
+
 
 class CommitsAvailableEvent(QEvent):
     """Event to notify that commits are available"""
@@ -375,23 +403,18 @@ class PickBranchWindow(StateWindow):
         if commitCount == 0:
             return
 
-        # Compile regex patterns if needed
+        # Compile all the patterns to one regex if possible
         compiledPatterns = []
         if filterPatterns:
-            if useRegex:
-                try:
-                    compiledPatterns = [re.compile(
-                        pattern) for pattern in filterPatterns]
-                except re.error as e:
-                    self._updateStatus(
-                        self.tr("Invalid regex pattern: {0}").format(str(e)))
-                    return
-            else:
-                # Convert to lowercase for case-insensitive matching
-                compiledPatterns = [pattern.lower()
-                                    for pattern in filterPatterns]
+            try:
+                compiledPatterns = _combineFilterPatterns(
+                    filterPatterns, useRegex)
+            except re.error as e:
+                self._updateStatus(
+                    self.tr("Invalid regex pattern: {0}").format(str(e)))
+                return
 
-        filteredCount = 0
+        filteredIndices = []
 
         # Get currently marked indices
         markedIndices = self.ui.logView.marker.getMarkedIndices()
@@ -400,38 +423,23 @@ class PickBranchWindow(StateWindow):
             if not commit:
                 continue
 
-            shouldFilter = False
-
             # Check if commit is a revert commit
             # TODO: check if it is reverted later
-            if filterReverted:
-                if "This reverts commit " in commit.comments:
-                    shouldFilter = True
+            if filterReverted and "This reverts commit " in commit.comments:
+                filteredIndices.append(index)
 
             # Check if commit is a merge commit
-            if not shouldFilter and filterMerge:
-                if len(commit.parents) > 1:
-                    shouldFilter = True
+            elif filterMerge and len(commit.parents) > 1:
+                filteredIndices.append(index)
 
             # Check if commit matches any pattern
-            if not shouldFilter and compiledPatterns:
-                lowercase_commit_message = commit.comments.lower()
-                for pattern in compiledPatterns:
-                    if useRegex:
-                        # Pattern is a compiled regex
-                        if pattern.search(commit.comments):
-                            shouldFilter = True
-                            break
-                    else:
-                        # Pattern is a lowercase string
-                        if pattern in lowercase_commit_message:
-                            shouldFilter = True
-                            break
-
-            # Unmark the commit if it matches filter criteria
-            if shouldFilter:
-                self.ui.logView.marker.unmark(index)
-                filteredCount += 1
+            elif compiledPatterns and \
+                    any(pattern.search(commit.comments) for pattern in compiledPatterns):
+                filteredIndices.append(index)
+
+        # Unmark the commits match filter criteria at once
+        self.ui.logView.marker.unmarkIndices(filteredIndices)
+        filteredCount = len(filteredIndices)
 
         self.ui.logView.viewport().update()
         self._updatePickButton()
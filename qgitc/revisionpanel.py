@@ -8,7 +8,7 @@ from PySide6.QtGui import QFontMetrics, QPainter
 from PySide6.QtWidgets import QFrame, QMenu
 
 from qgitc.applicationbase import ApplicationBase
-from qgitc.blameline import BlameLine
+from qgitc.blameline import BlameLine, BlameTable
 from qgitc.events import BlameEvent, ShowCommitEvent
 from qgitc.textline import Link
 from qgitc.textviewer import TextViewer
@@ -22,7 +22,10 @@ class RevisionPanel(TextViewer):
 
     def __init__(self, viewer):
         self._viewer = viewer
-        self._revs: List[BlameLine] = []
+        self._revs = BlameTable()
+        # the TextLine of each commit shared by all its lines,
+        # {(commitIndex, withInfo): TextLine}
+        self._commitTexts = {}
 
         super().__init__(viewer)
 
@@ -34,8 +37,6 @@ class RevisionPanel(TextViewer):
 
         viewer.textLineClicked.connect(
             self._onTextLineClicked)
-        self.textLineClicked.connect(
-            self._onTextLineClicked)
 
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -44,14 +45,15 @@ class RevisionPanel(TextViewer):
         settings = ApplicationBase.instance().settings()
         settings.diffViewFontChanged.connect(self.delayUpdateSettings)
 
-    def toTextLine(self, text):
-        textLine = super().toTextLine(text)
+    def toTextLine(self, lineNo):
+        textLine = super().toTextLine(self.toText(lineNo))
         textLine.useBuiltinPatterns = False
         textLine.setCustomLinkPatterns([(Link.Sha1, self._sha1Pattern, None)])
         return textLine
 
     def reloadSettings(self):
         self.updateFont(ApplicationBase.instance().settings().diffViewFont())
+        self._commitTexts.clear()
 
         fm = QFontMetrics(self._font)
         self._sha1Width = fm.horizontalAdvance('a') * ABBREV_N
@@ -66,34 +68,98 @@ class RevisionPanel(TextViewer):
         width += self._digitWidth * 6 + self.textMargins()
         self.resize(width, self._viewer.height())
 
-    def appendRevisions(self, revs: List[BlameLine]):
-        texts = []
-        for rev in revs:
-            text = rev.sha1[:ABBREV_N]
-            self._fix_rev(rev)
-            if not self._revs or self._revs[len(self._revs) - 1].sha1 != rev.sha1:
-                text += " " + rev.authorTime.split(" ")[0]
-                text += " " + rev.author
+    def toText(self, lineNo):
+        # the raw lines are the line numbers, the text is made
+        # from the table as the blame may come later
+        if lineNo >= len(self._revs):
+            return ""
+
+        commit = self._revs.commitAt(lineNo)
+        if commit is None:
+            return ""
+
+        text = commit.sha1[:ABBREV_N]
+        if lineNo == 0 or self._revs.commitIndexAt(lineNo - 1) != self._revs.commitIndexAt(lineNo):
+            text += " " + commit.authorTime.split(" ")[0]
+            text += " " + commit.author
+        return text
+
+    def textLength(self, lineNo):
+        return ABBREV_N
+
+    def _commitText(self, lineNo):
+        """ Return the TextLine of the commit at `lineNo` to paint,
+        None if not blamed yet """
+        if lineNo < 0 or lineNo >= len(self._revs):
+            return None
 
-            texts.append(text)
-            self._revs.append(rev)
+        index = self._revs.commitIndexAt(lineNo)
+        if index == -1:
+            return None
 
-        self.appendLines(texts)
+        withInfo = lineNo == 0 or self._revs.commitIndexAt(lineNo - 1) != index
+        key = (index, withInfo)
+        textLine = self._commitTexts.get(key)
+        if textLine is None:
+            textLine = self.toTextLine(lineNo)
+            self._commitTexts[key] = textLine
+        return textLine
+
+    def _aliveTextLines(self):
+        yield from super()._aliveTextLines()
+        yield from self._commitTexts.values()
+
+    def appendLineCount(self, count: int):
+        """ Append `count` lines to show the revisions """
+        total = self.textLineCount() + count
+        self._revs.resize(total)
+        # the raw lines are the line numbers, no need to store them
+        self._lines = range(total)
+        self._updateMaxChars(ABBREV_N)
+
+        self._delayLayout()
+        self.viewport().update()
+
+    def updateRevisions(self, revs: List[BlameLine]):
+        """ Set the revisions of the groups `revs` """
+        activeChanged = False
+        for rev in revs:
+            begin = rev.newLineNo - 1
+            self._revs.setLines(begin, rev.groupLines,
+                                rev.commit, rev.oldLineNo)
+            # the line after the group may not be the first of its group
+            for i in range(begin, begin + rev.groupLines + 1):
+                self._cachedLines.pop(i, None)
+            if self._activeRev and rev.sha1 == self._activeRev:
+                activeChanged = True
+
+        if activeChanged:
+            self._viewer.highlightLines(self._activeRevLines())
         self.update()
 
     def updateLinkData(self, link, lineNo):
-        link.setData(self._revs[lineNo].sha1)
+        link.setData(self._revs.commitAt(lineNo).sha1)
 
     def firstVisibleLine(self):
         return self._viewer.firstVisibleLine()
 
     @property
     def revisions(self):
+        """ The BlameTable of the lines """
         return self._revs
 
+    def setRevisions(self, revs: BlameTable):
+        """ Use the finished blame `revs`, call before appending lines """
+        self._revs = revs
+        self._cachedLines.clear()
+        self._commitTexts.clear()
+        self.update()
+
     def clear(self):
         super().clear()
-        self._revs.clear()
+        # the table may be shared with the blame cache
+        self._revs = BlameTable()
+        self._commitTexts.clear()
         self._activeRev = None
         self.update()
 
@@ -101,23 +167,19 @@ class RevisionPanel(TextViewer):
         if not sha1:
             return None
 
-        for rev in self._revs:
-            if rev.filename and rev.sha1 == sha1:
-                return rev.filename
-            if rev.prevFileName and rev.previous == sha1:
-                return rev.prevFileName
-        return None
+        return self._revs.fileName(sha1)
 
     def setActiveRevByLineNumber(self, lineNo):
         if lineNo >= 0 and lineNo < len(self._revs):
             self._updateActiveRev(lineNo)
 
     def setActiveRevBySha1(self, sha1: str):
-        for i, rev in enumerate(self._revs):
-            if rev.sha1 == sha1:
-                self._updateActiveRev(i)
-                self._viewer.ensureLineVisible(i)
-                return i
+        ranges = self._revs.lineRanges(self._revs.commitIndex(sha1))
+        if ranges:
+            lineNo = ranges[0][0]
+            self._updateActiveRev(lineNo)
+            self._viewer.ensureLineVisible(lineNo)
+            return lineNo
 
         # no rev found
         self._viewer.highlightLines([])
@@ -129,54 +191,33 @@ class RevisionPanel(TextViewer):
     def _onTextLineClicked(self, textLine):
         self._updateActiveRev(textLine.lineNo())
 
+    def _activeRevLines(self):
+        lines = []
+        for begin, end in self._revs.lineRanges(self._revs.commitIndex(self._activeRev)):
+            lines.extend(range(begin, end))
+        return lines
+
     def _updateActiveRev(self, lineNo):
-        rev = self._revs[lineNo]
-        sha1 = rev.sha1
-        if sha1 == self._activeRev:
+        commit = self._revs.commitAt(lineNo)
+        if commit is None or commit.sha1 == self._activeRev:
             return
 
-        self._activeRev = sha1
-
-        lines = []
-        for i in range(len(self._revs)):
-            if self._revs[i].sha1 == sha1:
-                lines.append(i)
+        self._activeRev = commit.sha1
 
-        self._viewer.highlightLines(lines)
+        self._viewer.highlightLines(self._activeRevLines())
         self.update()
 
-        self.revisionActivated.emit(rev)
+        self.revisionActivated.emit(self._revs[lineNo])
 
-    def _drawActiveRev(self, painter, lineNo, x, y):
-        if self._activeRev and self._revs[lineNo].sha1 == self._activeRev:
-            line = self.textLineAt(lineNo)
-            br = line.boundingRect()
-            fr = QRectF(br)
-            fr.moveTop(fr.top() + y)
-            fr.moveLeft(x)
+    def _drawActiveRev(self, painter, lineNo, activeIndex, rect):
+        if activeIndex != -1 and lineNo < len(self._revs) and \
+                self._revs.commitIndexAt(lineNo) == activeIndex:
             painter.fillRect(
-                fr, ApplicationBase.instance().colorSchema().HighlightLineBg)
+                rect, ApplicationBase.instance().colorSchema().HighlightLineBg)
 
     def _reloadTextLine(self, textLine):
         textLine.setFont(self._font)
 
-    def _fix_rev(self, rev):
-        if rev.author:
-            return
-        for i in range(len(self._revs) - 1, -1, -1):
-            r = self._revs[i]
-            if r.sha1 == rev.sha1:
-                rev.author = r.author
-                rev.authorMail = r.authorMail
-                rev.authorTime = r.authorTime
-                rev.committer = r.committer
-                rev.committerMail = r.committerMail
-                rev.committerTime = r.committerTime
-                rev.previous = r.previous
-                rev.prevFileName = r.prevFileName
-                rev.filename = r.filename
-                break
-
     def _onMenuShowCommitLog(self):
         if self._hoveredLine == -1:
             return
@@ -225,19 +266,21 @@ class RevisionPanel(TextViewer):
             return
 
         startLine = self.firstVisibleLine()
+        activeIndex = self._revs.commitIndex(self._activeRev)
         ascent = QFontMetrics(self._font).ascent()
 
         for i in range(startLine, textLineCount):
-            line = self.textLineAt(i)
-
-            lineClipRect = QRectF(0, y, maxLineWidth, self._viewer.lineHeight)
-            painter.save()
-            painter.setClipRect(lineClipRect)
+            line = self._commitText(i)
+            if line:
+                lineClipRect = QRectF(
+                    0, y, maxLineWidth, self._viewer.lineHeight)
+                painter.save()
+                painter.setClipRect(lineClipRect)
 
-            self._drawActiveRev(painter, i, 0, y)
-            line.draw(painter, QPointF(0, y))
+                self._drawActiveRev(painter, i, activeIndex, lineClipRect)
+                line.draw(painter, QPointF(0, y))
 
-            painter.restore()
+                painter.restore()
 
             lineNumber = str(i + 1)
             rect = QRect(x + self._space, y, width -
@@ -250,12 +293,57 @@ class RevisionPanel(TextViewer):
             if y > self.height():
                 break
 
+    def _onLayoutEvent(self):
+        self.killTimer(self._layoutTimerId)
+        self._layoutTimerId = None
+
+        # no horizontal scrolling, nothing to measure
+        self._adjustScrollbars()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._clickOnLink = self._link is not None
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return
+
+        if self._link and self._clickOnLink:
+            self.linkActivated.emit(self._link)
+        self._clickOnLink = False
+
+        lineNo = self.textRowForPos(event.position())
+        if lineNo != -1:
+            self._updateActiveRev(lineNo)
+
+    def mouseDoubleClickEvent(self, event):
+        # nothing to select
+        pass
+
+    def mouseMoveEvent(self, event):
+        self._clickOnLink = False
+        self._link = None
+
+        pos = event.position().toPoint()
+        lineNo = self.textRowForPos(pos)
+        textLine = self._commitText(lineNo)
+        if textLine and event.buttons() == Qt.NoButton:
+            pos = self.mapToContents(pos)
+            if textLine.boundingRect().right() >= pos.x():
+                self._link = textLine.hitTest(textLine.offsetForPos(pos))
+                if self._link:
+                    self.updateLinkData(self._link, lineNo)
+
+        cursorShape = Qt.PointingHandCursor if self._link \
+            else Qt.IBeamCursor
+        self.viewport().setCursor(cursorShape)
+
     def contextMenuEvent(self, event):
-        textLine = self.textLineForPos(event.pos())
-        if not textLine:
+        lineNo = self.textRowForPos(event.pos())
+        if lineNo == -1 or self._revs.commitAt(lineNo) is None:
             return
 
-        self._hoveredLine = textLine.lineNo()
+        self._hoveredLine = lineNo
 
         if not self._menu:
             self._menu = QMenu(self)
@@ -260,6 +260,12 @@ class Settings(QSettings):
         self.setValue("ignoreWhitespaceBlame", ignore)
         self.ignoreWhitespaceBlameChanged.emit(ignore)
 
+    def cacheBlameOnDisk(self):
+        return self.value("cacheBlameOnDisk", False, type=bool)
+
+    def setCacheBlameOnDisk(self, cache):
+        self.setValue("cacheBlameOnDisk", cache)
+
     def mergeToolList(self):
         tools = [MergeTool(MergeTool.Nothing, ".png", "imgdiff"),
                  MergeTool(MergeTool.Nothing, ".jpg", "imgdiff")]
@@ -840,6 +846,12 @@ class Settings(QSettings):
     def showFetchSlowAlert(self) -> bool:
         return self.value("showFetchSlowAlert", True, type=bool)
 
+    def setWriteCommitGraph(self, write: bool):
+        self.setValue("writeCommitGraph", write)
+
+    def writeCommitGraph(self) -> bool:
+        return self.value("writeCommitGraph", True, type=bool)
+
     def recentRepositories(self) -> List[str]:
         """Get list of recently visited repositories"""
         # settings type=list here is not working well
@@ -15,11 +15,6 @@ class SourceTextLine(SourceTextLineBase):
     def __init__(self, text, font, option):
         super().__init__(text, font, option)
 
-    def rehighlight(self):
-        formats = self._commonHighlightFormats()
-        if formats:
-            self._layout.setFormats(formats)
-
 
 class SourceViewer(TextViewer):
 
@@ -41,6 +36,12 @@ class SourceViewer(TextViewer):
     def toTextLine(self, text):
         return SourceTextLine(text, self._font, self._option)
 
+    def toText(self, item):
+        # SourceTextLineBase doesn't keep the CR
+        if item.endswith('\r'):
+            return item[:-1]
+        return item
+
     def setPanel(self, panel):
         if self._panel:
             if panel != self._panel:
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+from typing import Iterable
 
 from PySide6.QtCore import Signal
 
@@ -10,8 +11,49 @@ from qgitc.common import fullRepoDir, logger
 from qgitc.gitutils import Git
 from qgitc.submoduleexecutor import SubmoduleExecutor
 
-
-def _fetchStatusGit(submodule, cancelEvent: CancelEvent, showUntrackedFiles=True, showIgnoredFiles=False):
+# The trie node keys marking a hidden file or directory,
+# not valid path parts
+_HIDDEN_FILE = "/file"
+_HIDDEN_DIR = "/dir"
+
+
+class UntrackedFilter:
+    """ Match the untracked files to hide by a trie of the
+    normalized path parts of the hidden files and directories """
+
+    def __init__(self, files: Iterable[str] = (), directories: Iterable[str] = ()):
+        self._root = {}
+        for file in files:
+            self._addPath(file, _HIDDEN_FILE)
+        for directory in directories:
+            self._addPath(directory, _HIDDEN_DIR)
+
+    def _addPath(self, path: str, mark: str):
+        node = self._root
+        for part in os.path.normpath(path).split(os.sep):
+            node = node.setdefault(part, {})
+        node[mark] = True
+
+    def isEmpty(self):
+        return not self._root
+
+    def isHidden(self, file: str):
+        """ Return True if the normalized `file` or any
+        of its parent directories is hidden """
+        node = self._root
+        parts = file.split(os.sep)
+        last = len(parts) - 1
+        for i, part in enumerate(parts):
+            node = node.get(part)
+            if node is None:
+                return False
+            if i < last and _HIDDEN_DIR in node:
+                return True
+        return _HIDDEN_FILE in node
+
+
+def _fetchStatusGit(submodule, cancelEvent: CancelEvent, showUntrackedFiles=True,
+                    showIgnoredFiles=False, untrackedFilter: UntrackedFilter = None):
     repoDir = fullRepoDir(submodule)
     if not Git.isRepoRoot(repoDir):
         return None, None
@@ -29,8 +71,12 @@ def _fetchStatusGit(submodule, cancelEvent: CancelEvent, showUntrackedFiles=True
             "Cancel event set, aborting status fetch for `%s`", repoDir)
         return None, None
 
+    if untrackedFilter and untrackedFilter.isEmpty():
+        untrackedFilter = None
+
     lines = data.rstrip(b'\0').split(b'\0')
     result = []
+    hiddenCount = 0
     i = 0
     while i < len(lines):
         line = lines[i]
@@ -54,9 +100,15 @@ def _fetchStatusGit(submodule, cancelEvent: CancelEvent, showUntrackedFiles=True
                 submodule, oldFile) if submodule and submodule != '.' else oldFile)
             i += 1
 
+        if untrackedFilter and status[1] == "?" and \
+                untrackedFilter.isHidden(repoFile):
+            hiddenCount += 1
+            continue
+
         result.append((status, repoFile, oldRepoFile))
 
-    logger.debug("Status fetch result for `%s`: %s", repoDir, result)
+    logger.debug("Status fetch result for `%s`: %s (%d hidden)",
+                 repoDir, result, hiddenCount)
 
     return submodule, result
 
@@ -70,6 +122,7 @@ class StatusFetcher(SubmoduleExecutor):
         self._delayedTask = []
         self._showUntrackedFiles = True
         self._showIgnoredFiles = False
+        self._untrackedFilter: UntrackedFilter = None
         self._needCheckBranch = False
         self._span = None
 
@@ -120,6 +173,10 @@ class StatusFetcher(SubmoduleExecutor):
     def setShowIgnoredFiles(self, showIgnoredFiles: bool):
         self._showIgnoredFiles = showIgnoredFiles
 
+    def setUntrackedFilter(self, untrackedFilter: UntrackedFilter):
+        """ Drop the untracked files matched by `untrackedFilter` """
+        self._untrackedFilter = untrackedFilter
+
     def fetchStatus(self, submodule, cancelEvent: CancelEvent):
         _, result = self._fetchStatus(submodule, None, cancelEvent)
         if result:
@@ -127,4 +184,5 @@ class StatusFetcher(SubmoduleExecutor):
 
     def _fetchStatus(self, submodule, userData, cancelEvent: CancelEvent):
         return _fetchStatusGit(
-            submodule, cancelEvent, self._showUntrackedFiles, self._showIgnoredFiles)
+            submodule, cancelEvent, self._showUntrackedFiles,
+            self._showIgnoredFiles, self._untrackedFilter)
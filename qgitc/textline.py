@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 
 import bisect
+import math
 import re
+import time
+from collections import OrderedDict
 from typing import List, Tuple
 
 from PySide6.QtCore import QT_TRANSLATE_NOOP, QCoreApplication, QRectF, Qt
 from PySide6.QtGui import (
     QFont,
+    QFontInfo,
     QFontMetrics,
     QPalette,
     QTextCharFormat,
@@ -16,22 +20,64 @@ from PySide6.QtGui import (
 
 from qgitc.applicationbase import ApplicationBase
 
-__all__ = ["createFormatRange", "Link", "TextLine",
-           "SourceTextLineBase", "LinkTextLine"]
+__all__ = ["createFormatRange", "fontMonoMetrics", "invalidateHighlightCache",
+           "Link", "TextLine", "SourceTextLineBase", "LinkTextLine"]
 
 
 sha1_re = re.compile("(?<![a-zA-Z0-9_])[a-f0-9]{7,40}(?![a-zA-Z0-9_])")
 email_re = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
 url_re = re.compile("((https?|ftp)://[a-zA-Z0-9@:%_+-.~#?&/=()]+)")
+whitespace_re = re.compile(r"\s+")
 
 cr_char = "^M"
 
-# Lines longer than this skip link detection to avoid catastrophic regex backtracking
+# Lines longer than this are scanned for links by windows in background,
+# to avoid catastrophic regex backtracking blocking the UI
 _MAX_LINK_SCAN_LEN = 5000
+# Overlap of the windows, a longer link might be broken in a long line
+_LINK_SCAN_OVERLAP = 1024
 # Lines longer than this are truncated for QTextLayout to keep rendering fast
 _MAX_DISPLAY_CHARS = 10000
 _TRUNCATED_SUFFIX = QT_TRANSLATE_NOOP("TextLine", " (truncated)")
 
+# font key => (advance, height) of a monospace font, None for others
+_monoMetricsCache = {}
+_NOT_CHECKED = object()
+
+# Max number of lines whose links and formats are cached
+_MAX_CACHED_HIGHLIGHTS = 8192
+# Max number of long lines whose links are cached
+_MAX_CACHED_LONG_LINES = 64
+
+# The literal must present in the line for the builtin pattern to match
+_linkAnchors = {email_re: "@", url_re: "://"}
+
+
+class _LruCache(OrderedDict):
+
+    def __init__(self, capacity):
+        super().__init__()
+        self._capacity = capacity
+
+    def lookup(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def insert(self, key, value):
+        self[key] = value
+        if len(self) > self._capacity:
+            self.popitem(last=False)
+
+
+# (text, patterns) => links
+_linksCache = _LruCache(_MAX_CACHED_HIGHLIGHTS)
+# (class, text, showWhitespace, link ranges, extra key) => formats
+_formatsCache = _LruCache(_MAX_CACHED_HIGHLIGHTS)
+# (text, patterns) => links of the lines longer than _MAX_LINK_SCAN_LEN
+_longLinksCache = _LruCache(_MAX_CACHED_LONG_LINES)
+
 
 def createFormatRange(start, length, fmt):
     formatRange = QTextLayout.FormatRange()
@@ -42,6 +88,32 @@ def createFormatRange(start, length, fmt):
     return formatRange
 
 
+def fontMonoMetrics(font: QFont):
+    """ Return the (advance, height) of a char if `font` is monospace """
+    key = font.key()
+    if key in _monoMetricsCache:
+        return _monoMetricsCache[key]
+
+    metrics = None
+    if QFontInfo(font).fixedPitch():
+        # measure with the same way as TextLine does
+        layout = QTextLayout("M", font)
+        layout.beginLayout()
+        line = layout.createLine()
+        layout.endLayout()
+        metrics = (line.naturalTextWidth(), line.height())
+
+    _monoMetricsCache[key] = metrics
+    return metrics
+
+
+def invalidateHighlightCache():
+    """ Drop the cached highlighting, e.g. the color schema changed """
+    _linksCache.clear()
+    _formatsCache.clear()
+    _longLinksCache.clear()
+
+
 class Link():
     Sha1 = 0
     BugId = 1
@@ -61,14 +133,69 @@ class Link():
         return self.start <= pos and pos <= self.end
 
 
+def _newLink(m: re.Match, linkType, url):
+    link = Link(m.start(), m.end(), linkType)
+    if url:
+        if m.re.groups == 1:
+            link.setData(url + m.group(1))
+        else:
+            link.setData(url + m.group(2))
+    elif m.re.groups == 0 or m.lastindex is None:
+        link.setData(m.group(0))
+    else:
+        link.setData(m.group(m.lastindex))
+
+    return link
+
+
+def _addLink(links: List[Link], starts: List[int], m: re.Match, linkType, url):
+    """ Add the match to `links` sorted by start, the earlier one is
+    preferred unless the new one covers it """
+    start, end = m.span()
+    i = bisect.bisect_left(starts, start)
+    if i > 0 and links[i - 1].end > start:
+        return
+
+    j = i
+    while j < len(links) and links[j].start < end:
+        link = links[j]
+        if link.end > end or (link.start == start and link.end == end):
+            return
+        j += 1
+
+    links[i:j] = [_newLink(m, linkType, url)]
+    starts[i:j] = [start]
+
+
+def _matchLinks(text: str, patterns, begin, end, links: List[Link], starts: List[int]):
+    for linkType, pattern, url in patterns:
+        anchor = _linkAnchors.get(pattern)
+        if anchor and text.find(anchor, begin, end) == -1:
+            continue
+
+        for m in pattern.finditer(text, begin, end):
+            # the one reaches the window end might be truncated
+            if m.start() == m.end() or \
+                    (m.end() == end and end < len(text)):
+                continue
+            _addLink(links, starts, m, linkType, url)
+
+
 class TextLine():
 
+    # the line is laid out at (0, 0), so it can be measured
+    # arithmetically if the text is plain ASCII in monospace font
+    _plainLayout = True
+
     def __init__(self, text: str, font: QFont, option: QTextOption = None):
         self._text = text
         self._layout = None
         self._links = []
         self._lineNo = 0
         self._patterns = None
+        # patterns to scan the long line in background
+        self._linkScanPatterns = None
+        self._linkScanRequested = False
         self._rehighlight = True
         self._invalidated = True
         self._font = font
@@ -84,6 +211,7 @@ class TextLine():
         self._indices = None
         # Truncate display to avoid QTextLayout being slow on very long lines
         self._displayLen = min(len(text), _MAX_DISPLAY_CHARS)
+        self._monoMetrics = _NOT_CHECKED
 
     def _relayout(self):
         self._layout.beginLayout()
@@ -91,63 +219,90 @@ class TextLine():
         self._layout.endLayout()
 
     def _findLinks(self, patterns):
+        if len(self._text) > _MAX_LINK_SCAN_LEN:
+            self._findLongLineLinks(patterns)
+            return
+
         links = TextLine.findLinks(
             self._text,
             patterns)
         if links:
             self._links.extend(links)
 
+    def _findLongLineLinks(self, patterns):
+        self._linkScanPatterns = None
+        if not patterns:
+            return
+
+        patterns = tuple(patterns)
+        links = _longLinksCache.lookup((self._text, patterns))
+        if links is None:
+            self._linkScanPatterns = patterns
+            self._linkScanRequested = False
+        elif links:
+            self._links.extend(links)
+
+    def requestLinkScan(self):
+        """ Return the patterns to scan the long line with
+        `findLongLineLinks` once, None if no need """
+        if self._linkScanPatterns is None or self._linkScanRequested:
+            return None
+
+        self._linkScanRequested = True
+        return self._linkScanPatterns
+
+    def setScannedLinks(self, patterns, links: List[Link]):
+        """ Apply the links scanned for `requestLinkScan` """
+        _longLinksCache.insert((self._text, patterns), links)
+        if patterns != self._linkScanPatterns:
+            return
+
+        self._linkScanPatterns = None
+        self._links.extend(links)
+        if self._layout:
+            self.rehighlight()
+            self._invalidated = True
+
     @staticmethod
     def findLinks(text: str, patterns: List[Tuple[int, re.Pattern, str]]):
+        """ Return the links of `text` sorted by start, empty if the text
+        is longer than _MAX_LINK_SCAN_LEN, use `findLongLineLinks` instead """
         links: List[Link] = []
         if not text or not patterns:
             return links
 
-        # Skip link detection on very long lines: email/url regexes can catastrophically
-        # backtrack (O(n²)) on long ASCII-only strings without an @ or ://
+        # email/url regexes can catastrophically backtrack (O(n²))
+        # on long ASCII-only strings without an @ or ://
         if len(text) > _MAX_LINK_SCAN_LEN:
             return links
 
-        for linkType, pattern, url, in patterns:
-            matches = pattern.finditer(text)
-            for m in matches:
-                shouldAdd = True
-                for i in reversed(range(len(links))):
-                    start = links[i].start
-                    end = links[i].end
-
-                    # prefer the first one if the range is the same
-                    if m.start() == start and m.end() == end:
-                        shouldAdd = False
-                        break
-
-                    # the new one is longer than the old one
-                    if m.start() <= start and end <= m.end():
-                        del links[i]
-                        continue
-
-                    # the old one is longer than the new one or overlap
-                    if (start <= m.start() and m.end() <= end) or \
-                        (start < m.end() and m.start() < end) or \
-                            (m.start() < end and start < m.end()):
-                        shouldAdd = False
-                        break
-
-                if not shouldAdd:
-                    continue
-
-                link = Link(m.start(), m.end(), linkType)
-                if url:
-                    if pattern.groups == 1:
-                        link.setData(url + m.group(1))
-                    else:
-                        link.setData(url + m.group(2))
-                elif pattern.groups == 0 or m.lastindex is None:
-                    link.setData(m.group(0))
-                else:
-                    link.setData(m.group(m.lastindex))
-
-                links.append(link)
+        _matchLinks(text, patterns, 0, len(text), links, [])
+        return links
+
+    @staticmethod
+    def findLongLineLinks(text: str, patterns: List[Tuple[int, re.Pattern, str]],
+                          isInterrupted=None, timeout=None):
+        """ Find the links of a long line by windows, so that each regex
+        runs in bounded time. None returned if `isInterrupted` returns
+        True, the links found so far returned if `timeout` (in seconds)
+        reached """
+        links: List[Link] = []
+        if not text or not patterns:
+            return links
+
+        starts = []
+        beginTime = time.perf_counter()
+        step = _MAX_LINK_SCAN_LEN - _LINK_SCAN_OVERLAP
+        for begin in range(0, len(text), step):
+            if isInterrupted and isInterrupted():
+                return None
+            if timeout is not None and time.perf_counter() - beginTime > timeout:
+                break
+
+            end = min(begin + _MAX_LINK_SCAN_LEN, len(text))
+            _matchLinks(text, patterns, begin, end, links, starts)
+            if end == len(text):
+                break
 
         return links
 
@@ -182,7 +337,10 @@ class TextLine():
     def utf16Length(self):
         """ For createFormatRange """
         if self._utf16Len is None:
-            self._utf16Len = len(self._text.encode('utf-16-le')) // 2
+            if self._text.isascii():
+                self._utf16Len = len(self._text)
+            else:
+                self._utf16Len = len(self._text.encode('utf-16-le')) // 2
 
         return self._utf16Len
 
@@ -251,6 +409,7 @@ class TextLine():
 
     def setFont(self, font):
         self._font = font
+        self._monoMetrics = _NOT_CHECKED
         if self._layout:
             self._layout.setFont(self._font)
             self._invalidated = True
@@ -288,19 +447,52 @@ class TextLine():
             self._relayout()
             self._invalidated = False
 
+    def _fastMetrics(self):
+        """ The (advance, height) to measure the line without layout,
+        None if a real layout is required """
+        # always prefer the layout once created
+        if self._layout is not None:
+            return None
+
+        if self._monoMetrics is _NOT_CHECKED:
+            self._monoMetrics = None
+            # tabs, wide or combining chars need the layout
+            if self._plainLayout and \
+                    self._displayLen == len(self._text) and \
+                    self._text.isascii() and self._text.isprintable():
+                self._monoMetrics = fontMonoMetrics(self._font)
+
+        return self._monoMetrics
+
     def boundingRect(self):
+        metrics = self._fastMetrics()
+        if metrics:
+            advance, height = metrics
+            return QRectF(0, 0, advance * len(self._text), height)
+
         self.ensureLayout()
         return self._layout.boundingRect()
 
     def offsetForPos(self, pos):
         if not self._text:
             return 0
+
+        metrics = self._fastMetrics()
+        if metrics:
+            # same as QTextLine, the middle of a char belongs to the left
+            offset = math.ceil(pos.x() / metrics[0] - 0.5)
+            return max(0, min(offset, len(self._text)))
+
         self.ensureLayout()
         line = self._layout.lineAt(0)
         offset = line.xToCursor(pos.x())
         return self.mapFromUtf16(offset)
 
     def offsetToX(self, offset):
+        metrics = self._fastMetrics()
+        if metrics:
+            return max(0, min(offset, len(self._text))) * metrics[0]
+
         self.ensureLayout()
         line = self._layout.lineAt(0)
         offset = self.mapToUtf16(offset)
@@ -320,6 +512,7 @@ class TextLine():
 
     def setCustomLinkPatterns(self, patterns):
         self._links.clear()
+        self._linkScanPatterns = None
         self._patterns = list(patterns)
 
         if self._layout:
@@ -406,26 +599,10 @@ class SourceTextLineBase(TextLine):
         tcFormat.setForeground(
             ApplicationBase.instance().colorSchema().Whitespace)
 
-        offset = 0
-        i = 0
-        length = len(text)
-        while i < length:
-            c = text[i]
-            if c.isspace():
-                start = offset
-                offset += 1
-                i += 1
-                while i < length and text[i].isspace():
-                    offset += 1
-                    i += 1
-                rg = createFormatRange(start, offset - start, tcFormat)
-                formats.append(rg)
-            else:
-                if ord(c) > 0xFFFF:
-                    offset += 2
-                else:
-                    offset += 1
-                i += 1
+        for m in whitespace_re.finditer(text):
+            start = self.mapToUtf16(m.start())
+            end = self.mapToUtf16(m.end())
+            formats.append(createFormatRange(start, end - start, tcFormat))
 
     def _showWhitespaces(self):
         flags = self._defOption.flags()
@@ -455,6 +632,51 @@ class SourceTextLineBase(TextLine):
 
         return formats
 
+    def _highlightFormats(self):
+        """ The formats of the line, subclass can override it to add
+        more, and must also override `_highlightKey` if they depend on
+        anything else besides the text """
+        return self._commonHighlightFormats()
+
+    def _highlightKey(self):
+        return None
+
+    def _cacheable(self):
+        # don't keep the huge lines alive
+        return len(self._text) <= _MAX_LINK_SCAN_LEN
+
+    def _findLinks(self, patterns):
+        if not self._cacheable():
+            super()._findLinks(patterns)
+            return
+
+        # the lines with same text share the links
+        key = (self._text, tuple(patterns))
+        links = _linksCache.lookup(key)
+        if links is None:
+            links = TextLine.findLinks(self._text, patterns)
+            _linksCache.insert(key, links)
+
+        if links:
+            self._links.extend(links)
+
+    def rehighlight(self):
+        if not self._cacheable():
+            formats = self._highlightFormats()
+        else:
+            key = (type(self),
+                   self._text,
+                   bool(self._showWhitespaces()),
+                   tuple((link.start, link.end) for link in self._links),
+                   self._highlightKey())
+            formats = _formatsCache.lookup(key)
+            if formats is None:
+                formats = self._highlightFormats()
+                _formatsCache.insert(key, formats)
+
+        if formats:
+            self._layout.setFormats(formats)
+
 
 class LinkTextLine(TextLine):
 
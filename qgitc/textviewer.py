@@ -2,6 +2,8 @@
 
 import bisect
 import re
+from collections import OrderedDict, deque
+from functools import partial
 from typing import List
 
 from PySide6.QtCore import (
@@ -15,6 +17,7 @@ from PySide6.QtCore import (
     QRectF,
     QRegularExpression,
     Qt,
+    QThread,
     QTimer,
     Signal,
 )
@@ -36,15 +39,143 @@ from PySide6.QtWidgets import (
     QMenu,
     QScrollBar,
 )
+from shiboken6 import Shiboken
 
 from qgitc.applicationbase import ApplicationBase
 from qgitc.findconstants import FindFlags, FindPart
 from qgitc.findwidget import FindWidget
 from qgitc.textcursor import TextCursor
-from qgitc.textline import Link, TextLine, createFormatRange
+from qgitc.textline import (
+    _MAX_DISPLAY_CHARS,
+    Link,
+    TextLine,
+    createFormatRange,
+    fontMonoMetrics,
+    invalidateHighlightCache,
+)
 
 __all__ = ["TextViewer"]
 
+# Minimum number of TextLine converted from raw lines to keep alive
+_MAX_CACHED_LINES = 4096
+# Time budget (ms) of each batch to reload the hidden lines
+_RELOAD_BATCH_MS = 8
+# Number of lines to search before reporting the results
+_FIND_BATCH_LINES = 10000
+# Time budget (seconds) to scan the links of a long line
+_LINK_SCAN_TIMEOUT = 2
+
+# The running threads without parent, a QThread deleted before
+# finished aborts the program, keep them until finished
+_runningThreads = set()
+
+
+def _keepUntilFinished(thread: QThread):
+    _runningThreads.add(thread)
+    thread.finished.connect(partial(_onThreadFinished, thread))
+    # finished before connected
+    if not thread.isRunning():
+        _onThreadFinished(thread)
+
+
+def _onThreadFinished(thread: QThread):
+    if thread in _runningThreads:
+        _runningThreads.remove(thread)
+        thread.deleteLater()
+
+
+def _releaseLinkScanThread(thread: "LinkScanThread"):
+    """ Stop the `thread` of a destroyed viewer """
+    # already deleted on exit
+    if not Shiboken.isValid(thread):
+        return
+    thread.clear()
+    thread.requestInterruption()
+    _keepUntilFinished(thread)
+
+
+def _findInText(pattern: re.Pattern, lineNo: int, text: str, result: List[TextCursor]):
+    if not text:
+        return
+
+    for m in pattern.finditer(text):
+        tc = TextCursor()
+        tc.moveTo(lineNo, m.start())
+        tc.selectTo(lineNo, m.end())
+        result.append(tc)
+
+
+class FindTextThread(QThread):
+    """ Find the lines out of current page without creating TextLine """
+
+    findResultAvailable = Signal(list, int)
+
+    def __init__(self, pattern: re.Pattern, lines: list, textLines: dict,
+                 toText, curPageRange, parent=None):
+        super().__init__(parent)
+        self._pattern = pattern
+        self._lines = lines
+        self._textLines = textLines
+        self._toText = toText
+        self._curPageRange = curPageRange
+
+    def _textAt(self, n):
+        textLine = self._textLines.get(n)
+        if textLine is not None:
+            return textLine.text()
+        return self._toText(self._lines[n])
+
+    def run(self):
+        low, high = self._curPageRange
+        # search after current page first, then from the beginning
+        ranges = [(high + 1, len(self._lines), FindPart.AfterCurPage),
+                  (0, low, FindPart.BeforeCurPage)]
+
+        for begin, end, findPart in ranges:
+            for batchBegin in range(begin, end, _FIND_BATCH_LINES):
+                if self.isInterruptionRequested():
+                    return
+
+                result = []
+                batchEnd = min(batchBegin + _FIND_BATCH_LINES, end)
+                for i in range(batchBegin, batchEnd):
+                    _findInText(self._pattern, i, self._textAt(i), result)
+
+                if result:
+                    self.findResultAvailable.emit(result, findPart)
+
+
+class LinkScanThread(QThread):
+    """ Scan the links of the long lines in queue """
+
+    linksAvailable = Signal(TextLine, tuple, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queue = deque()
+
+    def addLine(self, textLine: TextLine, patterns):
+        self._queue.append((textLine, patterns))
+
+    def hasPendingLines(self):
+        return len(self._queue) > 0
+
+    def clear(self):
+        self._queue.clear()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                textLine, patterns = self._queue.popleft()
+            except IndexError:
+                break
+
+            links = TextLine.findLongLineLinks(
+                textLine.text(), patterns, self.isInterruptionRequested,
+                _LINK_SCAN_TIMEOUT)
+            if links is not None:
+                self.linksAvailable.emit(textLine, patterns, links)
+
 
 class TextViewer(QAbstractScrollArea):
 
@@ -56,14 +187,21 @@ class TextViewer(QAbstractScrollArea):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # raw text lines
-        self._lines = None
-        # TextLine instances
+        # raw text lines, None for the lines added by appendTextLine
+        self._lines = []
+        # TextLine instances added by appendTextLine
         self._textLines = {}
+        # TextLine converted from raw lines on demand, in LRU order
+        self._cachedLines = OrderedDict()
         self._inReading = False
 
-        self._convertIndex = 0
-        self._convertTimerId = None
+        # estimated chars of the longest line
+        self._maxChars = 0
+        self._layoutTimerId = None
+
+        # lines of `_textLines` not reloaded since settings changed
+        self._staleLines = set()
+        self._reloadTimerId = None
 
         self._option = QTextOption()
         self._option.setWrapMode(QTextOption.NoWrap)
@@ -71,7 +209,7 @@ class TextViewer(QAbstractScrollArea):
         self.reloadSettings()
 
         self._maxWidth = 0
-        self._highlightLines = []
+        self._highlightLines = set()
         self._highlightFind: List[TextCursor] = []
 
         self._cursor = TextCursor(self)
@@ -85,10 +223,11 @@ class TextViewer(QAbstractScrollArea):
 
         self._contextMenu = None
 
-        self._findTimerId = None
-        self._findIndex = 0
-        self._findPattern = None
-        self._findCurPageRange = None
+        self._findThread: FindTextThread = None
+        ApplicationBase.instance().aboutToQuit.connect(self.cancelFind)
+
+        self._linkScanThread: LinkScanThread = None
+        ApplicationBase.instance().aboutToQuit.connect(self._cancelLinkScan)
 
         self._settingsTimer = None
         ApplicationBase.instance().settings().bugPatternChanged.connect(
@@ -108,6 +247,8 @@ class TextViewer(QAbstractScrollArea):
         self.verticalScrollBar().setSingleStep(1)
 
         self.findResultAvailable.connect(self._onFindResultAvailable)
+        # prepare the lines around the new visible ones
+        self.verticalScrollBar().valueChanged.connect(self._delayLayout)
 
     def _selectionKey(self):
         if not self._cursor.hasSelection():
@@ -130,6 +271,11 @@ class TextViewer(QAbstractScrollArea):
         self._font = font
         fm = QFontMetrics(self._font)
         self._lineHeight = fm.height()
+        metrics = fontMonoMetrics(self._font)
+        if metrics:
+            self._charWidth = metrics[0]
+        else:
+            self._charWidth = fm.averageCharWidth()
 
     def reloadSettings(self):
         self.updateFont(self.font())
@@ -178,33 +324,34 @@ class TextViewer(QAbstractScrollArea):
         self.appendLines([line])
 
     def appendLines(self, lines: List[str]):
-        if self._lines:
+        # TextLine is created only when the line is about to be used
+        if lines:
             self._lines.extend(lines)
-        elif self._inReading:
-            self._lines = lines
-        else:
-            for line in lines:
-                textLine = self.toTextLine(line)
-                self.appendTextLine(textLine)
-
-        if self._convertTimerId is None:
-            self._convertTimerId = self.startTimer(0)
+            self._updateMaxChars(max(map(self.textLength, lines)))
 
+        self._delayLayout()
         self.viewport().update()
 
     def appendTextLine(self, textLine: TextLine):
         lineNo = self.textLineCount()
         self.initTextLine(textLine, lineNo)
-        if self._lines is None:
-            self._lines = []
         self._lines.append(None)
         self._textLines[lineNo] = textLine
+        self._updateMaxChars(len(textLine.text()))
 
-        if self._convertTimerId is None:
-            self._convertTimerId = self.startTimer(0)
-
+        self._delayLayout()
         self.viewport().update()
 
+    def toText(self, item):
+        """ Return the text of raw line `item` as the TextLine has,
+        this is also called from find thread """
+        return item
+
+    def textLength(self, item):
+        """ Estimated chars of the raw line `item`, used for the
+        horizontal extent before the line is laid out """
+        return len(item)
+
     def beginReading(self):
         """ Call before reading lines to TextViewer """
         self._inReading = True
@@ -212,19 +359,18 @@ class TextViewer(QAbstractScrollArea):
     def endReading(self):
         """ Call after reading finished """
         self._inReading = False
-        if self._lines and \
-                len(self._lines) == len(self._textLines):
-            self._lines = None
 
         if self._findWidget and self._findWidget.isVisible():
             # redo a find
             self._onFind(self._findWidget.text, self._findWidget.flags)
 
     def clear(self):
-        self._lines = None
+        self._lines = []
         self._textLines.clear()
+        self._cachedLines.clear()
         self._inReading = False
         self._maxWidth = 0
+        self._maxChars = 0
         self._highlightLines.clear()
         self._cursor.clear()
         self._maybeEmitSelectionChanged()
@@ -232,12 +378,18 @@ class TextViewer(QAbstractScrollArea):
         self._link = None
         self._similarWordPattern = None
 
-        self._convertIndex = 0
-        if self._convertTimerId is not None:
-            self.killTimer(self._convertTimerId)
-            self._convertTimerId = None
+        if self._layoutTimerId is not None:
+            self.killTimer(self._layoutTimerId)
+            self._layoutTimerId = None
+
+        self._staleLines.clear()
+        if self._reloadTimerId is not None:
+            self.killTimer(self._reloadTimerId)
+            self._reloadTimerId = None
 
         self.cancelFind()
+        if self._linkScanThread:
+            self._linkScanThread.clear()
 
         if self._settingsTimer is not None:
             if self._settingsTimer.isActive():
@@ -257,39 +409,40 @@ class TextViewer(QAbstractScrollArea):
         return self.textLineCount() > 0
 
     def textLineCount(self):
-        if self._lines:
-            return len(self._lines)
-
-        return len(self._textLines)
+        return len(self._lines)
 
     def textLineAt(self, n):
-        if n < 0:
+        if n < 0 or n >= len(self._lines):
             return None
 
-        # n already converted
-        if n in self._textLines:
-            return self._textLines[n]
-
-        # all converted but no match
-        if not self._lines:
-            return None
+        textLine = self._textLines.get(n)
+        if textLine is not None:
+            if n in self._staleLines:
+                self._staleLines.discard(n)
+                self._reloadTextLine(textLine)
+            return textLine
 
-        # convert one
-        if n >= len(self._lines):
-            return None
+        textLine = self._cachedLines.get(n)
+        if textLine is not None:
+            self._cachedLines.move_to_end(n)
+            return textLine
 
         textLine = self.toTextLine(self._lines[n])
         self.initTextLine(textLine, n)
 
-        self._textLines[n] = textLine
-        # free the memory
-        self._lines[n] = None
-        if not self._inReading and \
-                len(self._lines) == len(self._textLines):
-            self._lines = None
+        self._cachedLines[n] = textLine
+        # drop the least recently used one, it will be
+        # converted again from the raw line if needed
+        maxCachedLines = max(_MAX_CACHED_LINES, self._linesPerPage() * 4)
+        if len(self._cachedLines) > maxCachedLines:
+            self._cachedLines.popitem(last=False)
 
         return textLine
 
+    def _aliveTextLines(self):
+        yield from self._textLines.values()
+        yield from self._cachedLines.values()
+
     def firstVisibleLine(self):
         return self.verticalScrollBar().value()
 
@@ -351,7 +504,7 @@ class TextViewer(QAbstractScrollArea):
         return self.textLineAt(n)
 
     def highlightLines(self, lines):
-        self._highlightLines = lines
+        self._highlightLines = set(lines)
 
         self.viewport().update()
 
@@ -362,9 +515,7 @@ class TextViewer(QAbstractScrollArea):
             self._highlightFind = result[:]
         elif findPart == FindPart.BeforeCurPage:
             low = bisect.bisect_left(self._highlightFind, result[0])
-            # FIXME: how to improve performance?
-            for i in range(0, len(result)):
-                self._highlightFind.insert(low + i, result[i])
+            self._highlightFind[low:low] = result
         else:
             self._highlightFind.extend(result)
 
@@ -385,7 +536,7 @@ class TextViewer(QAbstractScrollArea):
 
         self._cursor.moveTo(0, 0)
         lastLine = self.textLineCount() - 1
-        self._cursor.selectTo(lastLine, len(self.textLineAt(lastLine).text()))
+        self._cursor.selectTo(lastLine, len(self._textAt(lastLine)))
         self._invalidateSelection()
         self._maybeEmitSelectionChanged()
 
@@ -521,18 +672,28 @@ class TextViewer(QAbstractScrollArea):
         if begin == 0 and end == self.textLineCount():
             return False
 
-        self._findPattern = pattern
-        self._findCurPageRange = (begin, end - 1)
-        self._findIndex = end  # search from next page
-        self._findTimerId = self.startTimer(0)
+        # search the snapshot of raw lines, the viewer may be changed later
+        self._findThread = FindTextThread(
+            pattern, list(self._lines), dict(self._textLines),
+            self.toText, (begin, end - 1))
+        self._findThread.findResultAvailable.connect(
+            self._onFindThreadResultAvailable)
+        self._findThread.finished.connect(self._onFindThreadFinished)
+        self.destroyed.connect(self._findThread.requestInterruption)
+        self._findThread.start()
+        _keepUntilFinished(self._findThread)
 
         return True
 
     def cancelFind(self):
-        if self._findTimerId is not None:
-            self.killTimer(self._findTimerId)
-            self._findTimerId = None
-            self._findPattern = None
+        if self._findThread is not None:
+            thread = self._findThread
+            self._findThread = None
+            thread.findResultAvailable.disconnect(
+                self._onFindThreadResultAvailable)
+            thread.requestInterruption()
+            # it stops at next batch, no need to wait long
+            thread.wait(100)
             self.findFinished.emit()
 
     @property
@@ -623,7 +784,8 @@ class TextViewer(QAbstractScrollArea):
             hScrollBar.setRange(0, 0)
             return
 
-        hScrollBar.setRange(0, self._maxWidth - self.viewport().width())
+        maxWidth = max(self._maxWidth, self._maxChars * self._charWidth)
+        hScrollBar.setRange(0, int(maxWidth) - self.viewport().width())
         hScrollBar.setPageStep(self.viewport().width())
 
         linesPerPage = self._linesPerPage()
@@ -766,42 +928,54 @@ class TextViewer(QAbstractScrollArea):
 
         return re.compile(exp, exp_flags)
 
+    def _textAt(self, n):
+        textLine = self._textLines.get(n)
+        if textLine is None:
+            textLine = self._cachedLines.get(n)
+        if textLine is not None:
+            return textLine.text()
+
+        return self.toText(self._lines[n])
+
     def _findInRange(self, pattern, low, high) -> List[TextCursor]:
         result = []
         for i in range(low, high):
-            text = self.textLineAt(i).text()
-            if not text:
-                continue
-
-            iter = pattern.finditer(text)
-            for m in iter:
-                tc = TextCursor()
-                tc.moveTo(i, m.start())
-                tc.selectTo(i, m.end())
-                result.append(tc)
+            _findInText(pattern, i, self._textAt(i), result)
 
         return result
 
-    def _onConvertEvent(self):
-        # wait for more text lines
-        if self._inReading and self._convertIndex >= self.textLineCount():
-            return
+    def _updateMaxChars(self, chars):
+        chars = min(chars, _MAX_DISPLAY_CHARS)
+        if chars > self._maxChars:
+            self._maxChars = chars
 
-        textLine = self.textLineAt(self._convertIndex)
-        self._convertIndex += 1
+    def _delayLayout(self):
+        if self._layoutTimerId is None:
+            self._layoutTimerId = self.startTimer(0)
 
-        if not self._inReading and self._convertIndex >= self.textLineCount():
-            self.killTimer(self._convertTimerId)
-            self._convertTimerId = None
-            self._convertIndex = 0
+    def _onLayoutEvent(self):
+        self.killTimer(self._layoutTimerId)
+        self._layoutTimerId = None
 
-        maximum = self.textLineCount() - self._linesPerPage()
+        # lay out the visible lines plus one page around them only,
+        # the others are estimated by `_maxChars`
+        linesPerPage = self._linesPerPage()
+        firstVisibleLine = self.firstVisibleLine()
+        begin = max(0, firstVisibleLine - linesPerPage)
+        end = min(self.textLineCount(),
+                  firstVisibleLine + linesPerPage * 2 + 1)
+
+        maxWidth = self._maxWidth
+        for i in range(begin, end):
+            width = self.textLineAt(i).boundingRect().width()
+            if width > maxWidth:
+                maxWidth = width
+
+        maximum = self.textLineCount() - linesPerPage
         needAdjust = self.verticalScrollBar().maximum() < maximum
-        if textLine:
-            width = textLine.boundingRect().width()
-            if width > self._maxWidth:
-                self._maxWidth = width
-                needAdjust = True
+        if maxWidth > self._maxWidth:
+            self._maxWidth = maxWidth
+            needAdjust = True
 
         if needAdjust:
             self._adjustScrollbars()
@@ -814,48 +988,78 @@ class TextViewer(QAbstractScrollArea):
             self._settingsTimer.disconnect(self)
             self._settingsTimer = None
 
-        # TODO: move to background
-        for _, line in self._textLines.items():
-            self._reloadTextLine(line)
+        # the font may changed, measure again
+        self._maxWidth = 0
+        self._delayLayout()
+
+        # the converted lines will be created again with
+        # the new settings when needed
+        self._cachedLines.clear()
+
+        # reload the others on demand or in background, this
+        # also discards the unfinished reloading of last changes
+        self._staleLines = set(self._textLines.keys())
+        if self._staleLines and self._reloadTimerId is None:
+            self._reloadTimerId = self.startTimer(0)
 
         self._adjustScrollbars()
         self.viewport().update()
 
-    def _onFindEvent(self):
-        low, high = self._findCurPageRange
-        if self._findIndex > high:
-            findPart = FindPart.AfterCurPage
-            # Search from beginning
-            if self._findIndex == self.textLineCount():
-                self._findIndex = 0
-                findPart = FindPart.BeforeCurPage
-        else:
-            findPart = FindPart.BeforeCurPage
+    def _onReloadEvent(self):
+        timer = QElapsedTimer()
+        timer.start()
 
-        assert (self._findIndex < low or high < self._findIndex)
+        while self._staleLines:
+            n = self._staleLines.pop()
+            self._reloadTextLine(self._textLines[n])
+            if timer.elapsed() >= _RELOAD_BATCH_MS:
+                break
 
-        begin = self._findIndex
-        end = begin + 1000
-        pattern = self._findPattern
-        if findPart == FindPart.AfterCurPage:
-            if end >= self.textLineCount():
-                end = self.textLineCount()
-        else:
-            if end >= low:
-                end = low
+        if not self._staleLines:
+            self.killTimer(self._reloadTimerId)
+            self._reloadTimerId = None
+
+    def _scanLinks(self, textLine: TextLine, patterns):
+        if not self._linkScanThread:
+            # not a child, it may still be running when we're deleted
+            self._linkScanThread = LinkScanThread()
+            self._linkScanThread.linksAvailable.connect(
+                self._onLinksAvailable)
+            self._linkScanThread.finished.connect(
+                self._onLinkScanFinished)
+            self.destroyed.connect(
+                partial(_releaseLinkScanThread, self._linkScanThread))
+
+        self._linkScanThread.addLine(textLine, patterns)
+        if not self._linkScanThread.isRunning():
+            self._linkScanThread.start(QThread.LowPriority)
+
+    def _cancelLinkScan(self):
+        if self._linkScanThread:
+            self._linkScanThread.clear()
+            self._linkScanThread.requestInterruption()
+            # it stops at next window, no need to wait long
+            self._linkScanThread.wait(100)
+
+    def _onLinksAvailable(self, textLine: TextLine, patterns, links):
+        textLine.setScannedLinks(patterns, links)
+        self.viewport().update()
 
-        self._findIndex = end
+    def _onLinkScanFinished(self):
+        # the lines added while finishing
+        if self._linkScanThread.hasPendingLines() and \
+                not self._linkScanThread.isInterruptionRequested():
+            self._linkScanThread.start(QThread.LowPriority)
 
-        result = self._findInRange(pattern, begin, end)
-        if result:
-            self.findResultAvailable.emit(result, findPart)
+    def _onFindThreadResultAvailable(self, result, findPart):
+        if self.sender() != self._findThread:
+            return
+        self.findResultAvailable.emit(result, findPart)
 
-        if findPart == FindPart.AfterCurPage:
-            if low == 0 and self._findIndex == self.textLineCount():
-                self.cancelFind()
-        else:
-            if self._findIndex == low:
-                self.cancelFind()
+    def _onFindThreadFinished(self):
+        if self.sender() == self._findThread:
+            self._findThread = None
+            self.findFinished.emit()
 
     def paintEvent(self, event):
         if not self.hasTextLines():
@@ -883,11 +1087,14 @@ class TextViewer(QAbstractScrollArea):
 
         borderStartLine = -1
         borderRect = QRectF()
+        maxWidth = self._maxWidth
         for i in range(startLine, endLine):
             textLine = self.textLineAt(i)
 
             br = textLine.boundingRect()
             r = br.translated(offset)
+            if br.width() > maxWidth:
+                maxWidth = br.width()
 
             def lineRect():
                 fr = QRectF(br)
@@ -935,6 +1142,9 @@ class TextViewer(QAbstractScrollArea):
                 formats.append(selectionRg)
 
             textLine.draw(painter, offset, formats, QRectF(eventRect))
+            linkPatterns = textLine.requestLinkScan()
+            if linkPatterns:
+                self._scanLinks(textLine, linkPatterns)
 
             offset.setY(offset.y() + self._lineHeight)
 
@@ -944,6 +1154,10 @@ class TextViewer(QAbstractScrollArea):
         if borderStartLine != -1:
             self.drawLinesBorder(painter, borderRect)
 
+        # the estimated width is not enough
+        if maxWidth > self._maxWidth:
+            self._delayLayout()
+
     def resizeEvent(self, event):
         self._adjustScrollbars()
 
@@ -1151,10 +1365,10 @@ class TextViewer(QAbstractScrollArea):
 
     def timerEvent(self, event):
         id = event.timerId()
-        if id == self._convertTimerId:
-            self._onConvertEvent()
-        elif id == self._findTimerId:
-            self._onFindEvent()
+        if id == self._layoutTimerId:
+            self._onLayoutEvent()
+        elif id == self._reloadTimerId:
+            self._onReloadEvent()
         elif id == self._autoScrollTimer.timerId():
             self._handleAutoScroll()
 
@@ -1196,7 +1410,8 @@ class TextViewer(QAbstractScrollArea):
         return super().event(evt)
 
     def _onColorSchemeChanged(self):
-        for _, line in self._textLines.items():
+        invalidateHighlightCache()
+        for line in self._aliveTextLines():
             line.reapplyColorTheme()
 
         self.viewport().update()
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from unittest.mock import patch
+
 from PySide6.QtCore import QPoint
 from PySide6.QtGui import QTextCursor
 from PySide6.QtTest import QTest
@@ -6,6 +8,7 @@ from PySide6.QtTest import QTest
 from qgitc.agent.tool import ToolType
 from qgitc.aichatbot import AiChatbot
 from qgitc.aitoolconfirmation import ButtonType
+from qgitc.findconstants import FindFlags
 from qgitc.llm import AiResponse, AiRole
 from tests.base import TestBase
 
@@ -140,6 +143,94 @@ class TestAiChatbot(TestBase):
         self.assertEqual(c2.selectionStart(), start1)
         self.assertEqual(c2.selectedText(), "hel")
 
+    def _appendMessage(self, message):
+        response = AiResponse(role=AiRole.Assistant, message=message)
+        response.is_delta = False
+        self.chatbot.appendResponse(response)
+
+    def _selectedText(self, start, end):
+        cursor = QTextCursor(self.chatbot.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        return cursor.selectedText()
+
+    def testFind_MoreThanMaxMatches(self):
+        self._appendMessage("foo " * 8)
+        self.chatbot.executeFind()
+
+        with patch("qgitc.aichatbot._MAX_FIND_MATCHES", 5):
+            self.chatbot._onFindRequested("foo", 0)
+        self.assertEqual(len(self.chatbot._findMatches), 5)
+        self.assertEqual(self.chatbot._findMoreCount, 3)
+        self.assertIn("(3 more)", self.chatbot._findPanel._lbStatus.text())
+
+    def testFind_NarrowDownPrefix(self):
+        self._appendMessage("abc abd \U0001F600 abcd")
+        self.chatbot._onFindRequested("ab", 0)
+        self.assertEqual(len(self.chatbot._findMatches), 3)
+
+        with patch.object(AiChatbot, "_scanFindMatches") as scan:
+            matches, moreCount = self.chatbot._computeFindMatches("ABC", 0)
+            scan.assert_not_called()
+        self.assertEqual(moreCount, 0)
+        self.assertEqual([self._selectedText(s, e) for s, e in matches],
+                         ["abc", "abc"])
+
+        matches, _ = self.chatbot._computeFindMatches(
+            "ABC", FindFlags.CaseSenitively)
+        self.assertEqual(matches, [])
+
+    def testFind_NarrowDownOverlapped(self):
+        self._appendMessage("aaab aXaXaX")
+
+        def _fullScan(text):
+            self.chatbot._findCache.clear()
+            return self.chatbot._computeFindMatches(text, 0)[0]
+
+        for prefix, text, expected in [("aa", "aab", ["aab"]),
+                                       ("aX", "aXaX", ["aXaX"])]:
+            self.chatbot._findCache.clear()
+            self.chatbot._computeFindMatches(prefix, 0)
+            with patch.object(AiChatbot, "_scanFindMatches") as scan:
+                matches, _ = self.chatbot._computeFindMatches(text, 0)
+                scan.assert_not_called()
+            self.assertEqual([self._selectedText(s, e) for s, e in matches],
+                             expected)
+            self.assertEqual(matches, _fullScan(text))
+
+    def testFind_RescanChangedOnly(self):
+        self._appendMessage("hello \U0001F600 hello")
+        self.chatbot.executeFind()
+        self.chatbot._findPanel.setText("hello")
+        self.chatbot._onFindRequested("hello", 0)
+        self.assertEqual(len(self.chatbot._findMatches), 2)
+
+        self._appendMessage("\U0001F600 hello")
+        self.assertEqual(len(self.chatbot._findMatches), 3)
+        for s, e in self.chatbot._findMatches:
+            self.assertEqual(self._selectedText(s, e), "hello")
+
+        self.chatbot._findCache.clear()
+        self.chatbot._findQuery = None
+        matches, _ = self.chatbot._computeFindMatches("hello", 0)
+        self.assertEqual(matches, self.chatbot._findMatches)
+
+    def testFind_HighlightVisibleOnly(self):
+        self._appendMessage("\n".join("line %d" % i for i in range(2000)))
+        self.chatbot._onFindRequested("line", 0)
+        self.assertEqual(len(self.chatbot._findMatches), 2000)
+
+        selections = self.chatbot.extraSelections()
+        self.assertGreater(len(selections), 0)
+        self.assertLess(len(selections), 200)
+
+        # the highlights follow the scrolling
+        scrollBar = self.chatbot.verticalScrollBar()
+        scrollBar.setValue(scrollBar.minimum())
+        begin = self.chatbot.firstVisibleBlock().position()
+        selections = self.chatbot.extraSelections()
+        self.assertLessEqual(selections[0].cursor.selectionStart(), begin + 20)
+
     def testGetConfirmDataAtPosition_WithScrolling(self):
         """Test that _getConfirmDataAtPosition works correctly when document is scrolled"""
         # Add a lot of initial content to enable scrolling
@@ -2,7 +2,7 @@
 import os
 from unittest.mock import patch
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QPoint, Qt
 from PySide6.QtTest import QSignalSpy, QTest
 
 from qgitc.applicationbase import ApplicationBase
@@ -62,6 +62,57 @@ class TestBlame(TestBase):
 
         self.assertTrue(settings.ignoreWhitespaceBlame())
 
+    def testBlameRevision(self):
+        view = self.window._view
+        spyFetcher = QSignalSpy(view._fetcher.fetchFinished)
+        spyContent = QSignalSpy(view._contentFetcher.fetchFinished)
+
+        file = os.path.join(self.gitDir.name, "test.py")
+        with patch("qgitc.blameview._VIEWPORT_BLAME_MIN_LINES", 1), \
+                patch.object(view._viewportFetcher, "fetch") as mockFetch:
+            self.window.blame(file, "HEAD")
+            self.assertTrue(spyContent.wait(3000))
+            # the source is shown before blame
+            self.assertEqual(view.viewer.textLineCount(), 2)
+            self.assertEqual("#!/usr/bin/python3",
+                             view.viewer.textLineAt(0).text())
+            if view._fetcher.process:
+                self.assertEqual(mockFetch.call_args[0][3], (1, 2))
+                self.assertTrue(spyFetcher.wait(3000))
+
+        sha1 = Git.checkOutput(
+            ["log", "-1", "--pretty=format:%H", file]).rstrip().decode()
+        revisions = view.viewer.panel.revisions
+        self.assertEqual(len(revisions), 2)
+        self.assertEqual(revisions.commitAt(0).sha1, sha1)
+        self.assertEqual(revisions[1].sha1, sha1)
+        self.assertTrue(view.viewer.panel.textLineAt(0).text().startswith(sha1[:4]))
+
+    def testPanelCommitTexts(self):
+        view = self.window._view
+        spyChanged = QSignalSpy(view.blameFileChanged)
+
+        file = os.path.join(self.gitDir.name, "test.py")
+        self.window.blame(file)
+        self.assertTrue(spyChanged.wait(3000))
+
+        panel = view.viewer.panel
+        panel.viewport().repaint()
+        # painted from the texts of the commit, no TextLine per line
+        self.assertEqual(len(panel._cachedLines), 0)
+        self.assertEqual(len(panel._commitTexts), 2)
+        self.assertIsNone(panel._commitText(2))
+
+        sha1 = panel.revisions.commitAt(0).sha1
+        self.assertTrue(panel._commitText(0).text().startswith(sha1[:4]))
+        self.assertEqual(panel._commitText(1).text(), sha1[:4])
+
+        spyRev = QSignalSpy(panel.revisionActivated)
+        pos = QPoint(panel.width() // 2, int(panel.lineHeight * 1.5))
+        QTest.mouseClick(panel.viewport(), Qt.LeftButton, pos=pos)
+        self.assertEqual(spyRev.count(), 1)
+        self.assertEqual(spyRev.at(0)[0].newLineNo, 2)
+
     def testFind(self):
         spyFetcher = QSignalSpy(self.window._view._fetcher.fetchFinished)
         file = os.path.join(self.gitDir.name, "README.md")
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PySide6.QtTest import QSignalSpy
+
+from qgitc.blamecache import BlameCache, BlameResult
+from qgitc.blameline import BlameCommit, BlameTable
+from qgitc.gitutils import Git
+from qgitc.windowtype import WindowType
+from tests.base import TestBase
+
+_SHA1_A = "a" * 40
+_SHA1_B = "b" * 40
+
+
+def _makeResult():
+    commitA = BlameCommit(_SHA1_A)
+    commitA.author = "Foo"
+    commitA.authorTime = "2020-09-13 20:26:40+0800"
+    commitA.filename = "a.py"
+    commitB = BlameCommit(_SHA1_B)
+    commitB.author = "Bar"
+    commitB.previous = _SHA1_A
+    commitB.prevFileName = "a.py"
+    commitB.filename = "a.py"
+
+    table = BlameTable()
+    table.setLines(0, 2, commitA, 1)
+    table.setLines(2, 1, commitB, 3)
+    return BlameResult([b"line 1", b"", b"line 3\r"], table)
+
+
+class TestBlameCache(unittest.TestCase):
+
+    def testMakeKey(self):
+        self.assertIsNone(BlameCache.makeKey("/repo", None, "a.py", False))
+        self.assertIsNone(BlameCache.makeKey("/repo", "HEAD", "a.py", False))
+        self.assertIsNone(BlameCache.makeKey("/repo", _SHA1_A[:7], "a.py", False))
+
+        key = BlameCache.makeKey("/repo", _SHA1_A, "a.py", False)
+        self.assertIsNotNone(key)
+        self.assertEqual(key, BlameCache.makeKey(
+            "/repo", _SHA1_A, os.path.join("/repo", "a.py"), False))
+        self.assertNotEqual(key, BlameCache.makeKey(
+            "/repo", _SHA1_A, "a.py", True))
+
+    def testLru(self):
+        cache = BlameCache(maxCount=2)
+        keys = [BlameCache.makeKey("/repo", sha1, "a.py", False)
+                for sha1 in (_SHA1_A, _SHA1_B, "c" * 40)]
+        results = [_makeResult() for _ in keys]
+
+        cache.put(keys[0], results[0])
+        cache.put(keys[1], results[1])
+        self.assertIs(cache.get(keys[0]), results[0])
+
+        # the least recently used one is dropped
+        cache.put(keys[2], results[2])
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIs(cache.get(keys[0]), results[0])
+        self.assertIs(cache.get(keys[2]), results[2])
+
+    def testDiskCache(self):
+        with tempfile.TemporaryDirectory() as diskDir:
+            key = BlameCache.makeKey("/repo", _SHA1_A, "a.py", False)
+            BlameCache(diskDir=diskDir).put(key, _makeResult())
+
+            cache = BlameCache(diskDir=diskDir)
+            result = cache.get(key)
+            self.assertIsNotNone(result)
+            self.assertEqual(result.lines, [b"line 1", b"", b"line 3\r"])
+
+            table = result.table
+            self.assertEqual(len(table), 3)
+            self.assertEqual([table.commitIndexAt(i) for i in range(3)],
+                             [0, 0, 1])
+            self.assertEqual(table[1].oldLineNo, 2)
+            self.assertEqual(table[2].previous, _SHA1_A)
+            self.assertEqual(table.commitAt(0).author, "Foo")
+            self.assertEqual(table.commitIndex(_SHA1_B), 1)
+
+            otherKey = BlameCache.makeKey("/repo", _SHA1_B, "a.py", False)
+            self.assertIsNone(cache.get(otherKey))
+
+            cache = BlameCache()
+            self.assertIsNone(cache.get(key))
+
+
+class TestBlameViewCache(TestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.window = self.app.getWindow(WindowType.BlameWindow)
+        self.window.showMaximized()
+
+    def tearDown(self):
+        self.window.close()
+        super().tearDown()
+
+    def testBlameFromCache(self):
+        view = self.window._view
+        file = os.path.join(self.gitDir.name, "test.py")
+        sha1 = Git.checkOutput(
+            ["log", "-1", "--pretty=format:%H", file]).rstrip().decode()
+
+        with patch("qgitc.blameview._blameCache", BlameCache()):
+            spyChanged = QSignalSpy(view.blameFileChanged)
+            self.window.blame(file, sha1)
+            self.assertTrue(spyChanged.wait(3000))
+            self.assertEqual(view.viewer.textLineCount(), 2)
+
+            self.window.blame(os.path.join(self.gitDir.name, "README.md"))
+            self.assertTrue(spyChanged.wait(3000))
+
+            with patch.object(view._fetcher, "fetch") as mockFetch:
+                self.window.blame(file, sha1)
+                self.assertFalse(mockFetch.called)
+                self.assertEqual(spyChanged.count(), 3)
+
+            self.assertEqual(view.viewer.textLineCount(), 2)
+            self.assertEqual("#!/usr/bin/python3",
+                             view.viewer.textLineAt(0).text())
+            revisions = view.viewer.panel.revisions
+            self.assertEqual(revisions.commitAt(1).sha1, sha1)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+from PySide6.QtTest import QSignalSpy
+
+from qgitc.blamefetcher import (
+    BlameContentFetcher,
+    BlameFetcher,
+    splitContentLines,
+)
+from qgitc.blameline import BlameTable
+from tests.base import TestBase
+
+_SHA1_A = "a" * 40
+_SHA1_B = "b" * 40
+
+_INCREMENTAL = b"""%s 1 1 2
+author Foo
+author-mail <foo@bar.com>
+author-time 1600000000
+author-tz +0800
+committer Foo
+committer-mail <foo@bar.com>
+committer-time 1600000000
+committer-tz +0800
+summary first
+filename a.py
+%s 1 3 1
+author Bar
+author-mail <bar@bar.com>
+author-time 1600000100
+author-tz +0800
+committer Bar
+committer-mail <bar@bar.com>
+committer-time 1600000100
+committer-tz +0800
+summary second
+previous %s a.py
+filename a.py
+%s 5 4 1
+filename a.py
+""" % (_SHA1_A.encode(), _SHA1_B.encode(),
+       _SHA1_A.encode(), _SHA1_A.encode())
+
+
+class TestBlameFetcher(TestBase):
+
+    def doCreateRepo(self):
+        pass
+
+    def testParse(self):
+        fetcher = BlameFetcher()
+        spy = QSignalSpy(fetcher.dataAvailable)
+        fetcher.parse(_INCREMENTAL)
+        self.assertEqual(spy.count(), 1)
+
+        lines = spy.at(0)[0]
+        self.assertEqual([line.sha1 for line in lines],
+                         [_SHA1_A, _SHA1_B, _SHA1_A])
+        self.assertEqual([line.oldLineNo for line in lines], [1, 1, 5])
+        self.assertEqual([line.newLineNo for line in lines], [1, 3, 4])
+        self.assertEqual([line.groupLines for line in lines], [2, 1, 1])
+
+        # the groups of same commit share the headers
+        self.assertIs(lines[0].commit, lines[2].commit)
+        self.assertEqual(lines[2].author, "Foo")
+        self.assertEqual(lines[2].filename, "a.py")
+        self.assertIsNone(lines[2].previous)
+        self.assertEqual(lines[1].author, "Bar")
+        self.assertEqual(lines[1].previous, _SHA1_A)
+
+    def testMakeArgs(self):
+        fetcher = BlameFetcher()
+        self.assertEqual(fetcher.makeArgs(("a.py", None, True, (10, 20))),
+                         ["blame", "--incremental", "-w", "-L10,20", "--", "a.py"])
+        self.assertEqual(fetcher.makeArgs(("a.py", "HEAD")),
+                         ["blame", "--incremental", "HEAD", "--", "a.py"])
+
+        fetcher = BlameContentFetcher()
+        fetcher.cwd = os.path.join(os.sep, "repo")
+        file = os.path.join(os.sep, "repo", "src", "a.py")
+        self.assertEqual(fetcher.makeArgs((file, "HEAD")),
+                         ["cat-file", "-p", "HEAD:./src/a.py"])
+
+    def testSplitContentLines(self):
+        self.assertEqual(splitContentLines(b"a\nb\n"), [b"a", b"b"])
+        self.assertEqual(splitContentLines(b"a\n\nb"), [b"a", b"", b"b"])
+        self.assertEqual(splitContentLines(b"a\n\n"), [b"a", b""])
+        self.assertEqual(splitContentLines(b""), [])
+
+
+class TestBlameTable(unittest.TestCase):
+
+    def testTable(self):
+        fetcher = BlameFetcher()
+        spy = QSignalSpy(fetcher.dataAvailable)
+        fetcher.parse(_INCREMENTAL)
+
+        table = BlameTable()
+        table.resize(2)
+        self.assertIsNone(table.commitAt(1))
+        self.assertEqual(table.commitIndexAt(1), -1)
+
+        # the groups come in any order
+        for line in reversed(spy.at(0)[0]):
+            table.setLines(line.newLineNo - 1, line.groupLines,
+                           line.commit, line.oldLineNo)
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(len(table.commits), 2)
+        self.assertEqual(table.commitIndex(_SHA1_B), 1)
+        self.assertEqual(table.commitIndex("c" * 40), -1)
+        self.assertEqual(table.commitIndex(_SHA1_A), 0)
+        self.assertEqual([table.commitIndexAt(i) for i in range(4)],
+                         [0, 0, 1, 0])
+        self.assertEqual(table[1].oldLineNo, 2)
+
+        line = table[3]
+        self.assertEqual(line.sha1, _SHA1_A)
+        self.assertEqual(line.oldLineNo, 5)
+        self.assertEqual(line.newLineNo, 4)
+        self.assertEqual(line.author, "Foo")
+
+        table.clear()
+        self.assertFalse(table)
+
+    def testLineRanges(self):
+        fetcher = BlameFetcher()
+        spy = QSignalSpy(fetcher.dataAvailable)
+        fetcher.parse(_INCREMENTAL)
+        lineA, lineB, lineA2 = spy.at(0)[0]
+
+        table = BlameTable()
+        table.resize(6)
+        table.setLines(3, 1, lineA2.commit, 5)
+        table.setLines(0, 2, lineA.commit, 1)
+        self.assertEqual(table.lineRanges(0), [(0, 2), (3, 4)])
+        self.assertEqual(table.lineRanges(-1), [])
+
+        # the adjacent and overlapped ranges are merged
+        table.setLines(1, 2, lineA.commit, 2)
+        self.assertEqual(table.lineRanges(0), [(0, 4)])
+
+        # some lines blamed to another commit
+        table.setLines(1, 1, lineB.commit, 1)
+        self.assertEqual(table.lineRanges(0), [(0, 1), (2, 4)])
+        self.assertEqual(table.lineRanges(1), [(1, 2)])
+
+        copy = BlameTable.fromData(table.toData())
+        self.assertEqual(copy.lineRanges(0), [(0, 1), (2, 4)])
+        self.assertEqual(copy.lineRanges(1), [(1, 2)])
+
+        self.assertEqual(table.fileName(_SHA1_B), "a.py")
+        self.assertEqual(copy.fileName(_SHA1_A), "a.py")
+        self.assertIsNone(table.fileName("c" * 40))
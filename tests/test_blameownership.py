@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+
+from qgitc.blameownership import (
+    AGE_DAYS,
+    BlameOwnershipThread,
+    OwnershipReport,
+    parseBlameOwnership,
+)
+from qgitc.blameownershipdialog import BlameOwnershipDialog
+from qgitc.gitutils import Git
+from tests.base import TestBase
+
+_SHA1_A = "a" * 40
+_SHA1_B = "b" * 40
+
+_NOW = 1700000000
+
+_BLAME_DATA = b"""%s 1 1 2
+author Foo
+author-mail <foo@bar.com>
+author-time %d
+author-tz +0800
+summary Add a.py
+filename a.py
+%s 3 3 1
+author Bar
+author-mail <bar@bar.com>
+author-time %d
+author-tz +0800
+summary Fix a.py
+previous %s a.py
+filename a.py
+%s 4 4 3
+filename a.py
+""" % (_SHA1_A.encode(), _NOW - 86400, _SHA1_B.encode(),
+       _NOW - 400 * 86400, _SHA1_A.encode(), _SHA1_A.encode())
+
+
+class _BlockedProcess:
+    """ A `git blame` never finishes until killed """
+
+    def __init__(self):
+        self.process = self
+        self.returncode = None
+        self._killed = threading.Event()
+
+    def kill(self):
+        self.returncode = -9
+        self._killed.set()
+
+    def communicate(self):
+        self._killed.wait(10)
+        return b"", b""
+
+
+class TestParseBlameOwnership(unittest.TestCase):
+
+    def testParse(self):
+        ownership = parseBlameOwnership(_BLAME_DATA)
+        self.assertEqual(ownership.lineCount, 6)
+        self.assertEqual(ownership.commitLines, {_SHA1_A: 5, _SHA1_B: 1})
+
+        commit = ownership.commits[_SHA1_A]
+        self.assertEqual(commit.author, "Foo <foo@bar.com>")
+        self.assertEqual(commit.authorTime, _NOW - 86400)
+        self.assertEqual(commit.summary, "Add a.py")
+
+    def testParseEmpty(self):
+        ownership = parseBlameOwnership(b"")
+        self.assertEqual(ownership.lineCount, 0)
+        self.assertEqual(ownership.commits, {})
+
+    def testReport(self):
+        report = OwnershipReport(_NOW)
+        report.add(parseBlameOwnership(_BLAME_DATA))
+        report.add(parseBlameOwnership(_BLAME_DATA))
+
+        self.assertEqual(report.fileCount, 2)
+        self.assertEqual(report.lineCount, 12)
+        self.assertEqual(report.authorLines, {
+            "Foo <foo@bar.com>": 10, "Bar <bar@bar.com>": 2})
+        self.assertEqual(report.commitLines, {_SHA1_A: 10, _SHA1_B: 2})
+
+        ageLines = [0] * (len(AGE_DAYS) + 1)
+        ageLines[0] = 10
+        ageLines[3] = 2
+        self.assertEqual(report.ageLines, ageLines)
+
+
+class TestBlameOwnershipThread(TestBase):
+
+    def _runThread(self, paths):
+        thread = BlameOwnershipThread(self.gitDir.name, None, paths)
+        thread.start()
+        self.wait(10000, lambda: not thread.isFinished())
+        self.assertTrue(thread.wait(1000))
+        return thread
+
+    def testBlame(self):
+        with patch("qgitc.blameownership._cachedFiles", OrderedDict()):
+            thread = self._runThread(["."])
+            report = thread.report
+            self.assertEqual(thread.blamedCount, 2)
+            self.assertEqual(report.fileCount, 2)
+            self.assertEqual(report.lineCount, 3)
+            self.assertEqual(report.authorLines, {"foo <foo@bar.com>": 3})
+            self.assertEqual(len(report.commits), 2)
+            self.assertEqual(report.ageLines[0], 3)
+
+            # the unchanged blobs are from cache
+            thread = self._runThread(["test.py"])
+            self.assertEqual(thread.blamedCount, 0)
+            self.assertEqual(thread.report.fileCount, 1)
+            self.assertEqual(thread.report.lineCount, 2)
+
+    def testCancel(self):
+        gitRun = Git.run
+
+        def _run(args, *largs, **kwargs):
+            if args[0] == "blame":
+                return _BlockedProcess()
+            return gitRun(args, *largs, **kwargs)
+
+        with patch("qgitc.blameownership._cachedFiles", OrderedDict()), \
+                patch("qgitc.blameownership.Git.run", side_effect=_run):
+            thread = BlameOwnershipThread(self.gitDir.name, None, ["."])
+            thread.start()
+            self.wait(10000, lambda: not thread._processes)
+            self.assertTrue(thread._processes)
+
+            thread.cancel()
+            self.assertTrue(thread.wait(3000))
+            self.assertIsNone(thread.report)
+
+    def testDialog(self):
+        dialog = BlameOwnershipDialog()
+        dialog.blame(self.gitDir.name, "HEAD", ["."])
+        self.wait(10000, lambda: dialog._thread is not None)
+
+        self.assertIsNone(dialog._thread)
+        self.assertEqual(dialog._authorTree.topLevelItemCount(), 1)
+        self.assertEqual(dialog._commitTree.topLevelItemCount(), 2)
+        self.assertEqual(dialog._ageTree.topLevelItemCount(),
+                         len(AGE_DAYS) + 1)
+        dialog.close()
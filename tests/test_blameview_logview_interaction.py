@@ -101,6 +101,16 @@ class TestBlameViewLogViewInteraction(TestBase):
             # Should have set preferSha1 because isLoading() returned True and commit not found
             self.assertEqual(self.logView.preferSha1, sha1)
 
+    def test_showLogs_file_names(self):
+        """Test the file names of commits come with the log fetch"""
+        file = os.path.join(self.gitDir.name, "test.py")
+        self.commitPanel.showLogs(self.gitDir.name, file)
+        self.wait(3000, lambda: self.logView.fetcher.isLoading())
+
+        self.assertGreater(len(self.logView.data), 0)
+        for commit in self.logView.data:
+            self.assertEqual(self.commitPanel._sha1Names[commit.sha1], "test.py")
+
     def test_no_endFetch_connection_in_BlameCommitPanel(self):
         """Test that BlameCommitPanel doesn't connect to logView.endFetch signal"""
         # This test verifies that the problematic endFetch connection is removed
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from qgitc.commitfilter import CommitFilter
+from qgitc.common import Commit
+from qgitc.gitutils import Git
+from qgitc.logview import LogView
+from tests.base import TestBase
+
+
+def _makeCommit(sha1, comments, author):
+    return Commit(sha1=sha1, comments=comments, author=author,
+                  committer="Committer <c@foo.com>", parents=[])
+
+
+class TestCommitFilter(unittest.TestCase):
+
+    def testFromArgs(self):
+        args, commitFilter = CommitFilter.fromArgs(
+            ["--author=Foo", "--grep", "fix", "-i", "--", "a.py"])
+        self.assertEqual(args, ["--", "a.py"])
+        self.assertEqual(commitFilter.authors, ["Foo"])
+        self.assertEqual(commitFilter.greps, ["fix"])
+        self.assertTrue(commitFilter.ignoreCase)
+
+        args, commitFilter = CommitFilter.fromArgs(
+            ["--since=1.week", "--committer=Bar", "master"])
+        self.assertEqual(args, ["--since=1.week", "master"])
+        self.assertEqual(commitFilter.committers, ["Bar"])
+
+    def testFromArgsUnsupported(self):
+        for args in (["--since=1.week"],
+                     ["--author=Foo", "--all-match"],
+                     ["--grep=fix", "-E"],
+                     ["--grep=fix", "-10"],
+                     ["--grep=fix", "-n", "10"],
+                     ["--grep=a+b"],
+                     ["--author=(Foo|Bar)"],
+                     ["--grep=[[:digit:]]"],
+                     ["--author"]):
+            newArgs, commitFilter = CommitFilter.fromArgs(args)
+            self.assertEqual(newArgs, args)
+            self.assertIsNone(commitFilter)
+
+    def testFromArgsInvalidPattern(self):
+        for args in (["--grep=*fix"],
+                     ["--author=a**"],
+                     ["--grep=[abc", "master"]):
+            newArgs, commitFilter = CommitFilter.fromArgs(args)
+            self.assertEqual(newArgs, args)
+            self.assertIsNone(commitFilter)
+
+    def testFilter(self):
+        commitFilter = CommitFilter(["Foo", "Bar"], [], ["^fix"], True)
+        self.assertTrue(commitFilter(
+            _makeCommit("1", "Add a\n\nFix b", "foo <foo@x.com>")))
+        self.assertFalse(commitFilter(
+            _makeCommit("2", "Add a prefix", "foo <foo@x.com>")))
+        self.assertFalse(commitFilter(
+            _makeCommit("3", "fix a", "baz <baz@x.com>")))
+
+    def testEqual(self):
+        self.assertEqual(CommitFilter(["Foo"], [], []),
+                         CommitFilter(["Foo"], [], []))
+        self.assertNotEqual(CommitFilter(["Foo"], [], []),
+                            CommitFilter(["Foo"], [], [], True))
+        self.assertNotEqual(CommitFilter(["Foo"], [], []), None)
+
+
+class TestLogViewCommitFilter(TestBase):
+
+    def doCreateRepo(self):
+        pass
+
+    def setUp(self):
+        super().setUp()
+        self.logView = LogView()
+        self.logView.data = [
+            _makeCommit("a%039d" % i, "commit %d" % i,
+                        "Author%d <a@foo.com>" % (i % 3))
+            for i in range(10)]
+
+    def tearDown(self):
+        self.logView.deleteLater()
+        super().tearDown()
+
+    def testSetCommitFilter(self):
+        allData = list(self.logView.data)
+        self.logView.setCurrentIndex(3)
+
+        self.logView.setCommitFilter(CommitFilter(["Author0"], [], []))
+        self.assertEqual([c.sha1 for c in self.logView.data],
+                         ["a%039d" % i for i in (0, 3, 6, 9)])
+        # keep the current commit
+        self.assertEqual(self.logView.currentIndex(), 1)
+
+        self.logView.setCommitFilter(CommitFilter(["Author1"], [], []))
+        self.assertEqual([c.sha1 for c in self.logView.data],
+                         ["a%039d" % i for i in (1, 4, 7)])
+        self.assertEqual(self.logView.currentIndex(), 0)
+
+        self.logView.setCommitFilter(None)
+        self.assertEqual(self.logView.data, allData)
+        self.assertEqual(self.logView.currentIndex(), 1)
+
+    def testKeepLocalChanges(self):
+        lcc = Commit(sha1=Git.LCC_SHA1, comments="Local changes")
+        self.logView.data.insert(0, lcc)
+
+        self.logView.setCommitFilter(CommitFilter([], [], ["commit 2"]))
+        self.assertEqual(len(self.logView.data), 2)
+        self.assertIs(self.logView.data[0], lcc)
+        self.assertEqual(self.logView.data[1].sha1, "a%039d" % 2)
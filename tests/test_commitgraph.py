@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+
+from qgitc.commitgraph import (
+    CommitGraphThread,
+    commitGraphFiles,
+    hasChangedPaths,
+    isCommitGraphStale,
+)
+from qgitc.gitutils import Git
+from tests.base import TestBase
+
+
+class TestCommitGraph(TestBase):
+
+    def _commonDir(self):
+        return os.path.join(self.gitDir.name, ".git")
+
+    def _writeGraph(self):
+        thread = CommitGraphThread(self.gitDir.name)
+        thread.start()
+        self.wait(10000, lambda: not thread.isFinished())
+        self.assertTrue(thread.isFinished())
+        return thread
+
+    def testWriteCommitGraph(self):
+        commonDir = self._commonDir()
+        self.assertEqual(commitGraphFiles(commonDir), [])
+        self.assertTrue(isCommitGraphStale(commonDir))
+
+        thread = self._writeGraph()
+        self.assertTrue(thread.updated)
+
+        graphFiles = commitGraphFiles(commonDir)
+        self.assertEqual(len(graphFiles), 1)
+        self.assertTrue(hasChangedPaths(graphFiles[0]))
+        self.assertFalse(isCommitGraphStale(commonDir))
+
+        # up to date, nothing to do
+        thread = self._writeGraph()
+        self.assertFalse(thread.updated)
+
+    def testStaleCommitGraph(self):
+        commonDir = self._commonDir()
+        self._writeGraph()
+
+        with open(os.path.join(self.gitDir.name, "new.txt"), "w") as f:
+            f.write("new file")
+        Git.addFiles(repoDir=self.gitDir.name, files=["new.txt"])
+        Git.commit("Add new file", repoDir=self.gitDir.name)
+        self.assertTrue(isCommitGraphStale(commonDir))
+
+        self.assertTrue(self._writeGraph().updated)
+        self.assertFalse(isCommitGraphStale(commonDir))
+
+    def testWithoutChangedPaths(self):
+        Git.checkOutput(["commit-graph", "write", "--reachable"],
+                        repoDir=self.gitDir.name)
+
+        graphFiles = commitGraphFiles(self._commonDir())
+        self.assertEqual(len(graphFiles), 1)
+        self.assertFalse(hasChangedPaths(graphFiles[0]))
+        self.assertTrue(isCommitGraphStale(self._commonDir()))
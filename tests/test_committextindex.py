@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import re
+import unittest
+from unittest.mock import patch
+
+from qgitc.committextindex import CommitTextIndex, commitMatches
+from qgitc.common import Commit
+from qgitc.gitutils import Git
+
+
+def _makeCommits(count):
+    commits = []
+    for i in range(count):
+        commit = Commit(
+            sha1="%040x" % (i * 7919),
+            comments="Fix BUG-%d in module %d" % (i, i % 13),
+            author="Author%d <a%d@foo.com>" % (i % 5, i % 5),
+            authorDate="2024-01-%02d 10:00:00" % (i % 28 + 1),
+            committer="Committer <c@foo.com>",
+            committerDate="2024-02-%02d 10:00:00" % (i % 28 + 1),
+            parents=["%040x" % ((i + 1) * 7919)])
+        commits.append(commit)
+    return commits
+
+
+class TestCommitTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.commits = _makeCommits(300)
+        self.index = CommitTextIndex()
+
+    def _scan(self, pattern, findRange):
+        for i in findRange:
+            if commitMatches(pattern, self.commits[i]):
+                return i
+        return -1
+
+    def _check(self, pattern, flags=0):
+        pattern = re.compile(pattern, flags)
+        count = len(self.commits)
+        for findRange in (range(0, count), range(37, count),
+                          range(count - 1, -1, -1), range(150, -1, -1),
+                          range(250, 260), range(5, 4)):
+            self.assertEqual(
+                self.index.findCommit(self.commits, pattern, findRange),
+                self._scan(pattern, findRange),
+                "%s %s" % (pattern.pattern, findRange))
+
+    def testSameAsScan(self):
+        with patch("qgitc.committextindex._BLOCK_SIZE", 64):
+            self._check(re.escape("BUG-123"))
+            self._check("bug-2[0-9]$", re.IGNORECASE)
+            self._check("^Author3")
+            self._check("^2024-02-05")
+            self._check("module 1\\s+Author")
+            self._check("Committer$")
+            self._check("no such text")
+            self._check("\\bBUG-7\\b")
+            self._check("BUG-1(?!\\d)")
+            self._check("\\Afoo|BUG-9\\Z")
+
+    @patch("qgitc.committextindex._MAX_CACHED_BLOCKS", 2)
+    @patch("qgitc.committextindex._BLOCK_SIZE", 64)
+    def testCacheBounded(self):
+        pattern = re.compile(re.escape("no such text"))
+        self.index.findCommit(self.commits, pattern, range(0, 300))
+        self.assertEqual(len(self.index._blocks), 2)
+
+        # the cached blocks are not evicted by the next scan
+        blocks = dict(self.index._blocks)
+        self.index.findCommit(self.commits, pattern, range(299, -1, -1))
+        self.assertEqual(self.index._blocks, blocks)
+        for blockNo, block in blocks.items():
+            self.assertIs(self.index._blocks[blockNo], block)
+
+        self.assertEqual(self.index.findCommit(
+            self.commits, re.compile("BUG-299 "), range(0, 300)), 299)
+        self.assertEqual(len(self.index._blocks), 2)
+
+    def testUpdatedData(self):
+        with patch("qgitc.committextindex._BLOCK_SIZE", 64):
+            pattern = re.compile(re.escape("new commit"))
+            self.assertEqual(
+                self.index.findCommit(self.commits, pattern, range(0, 300)), -1)
+
+            commit = Commit(sha1=Git.LCC_SHA1, comments="new commit")
+            self.commits.insert(10, commit)
+            self.assertEqual(
+                self.index.findCommit(self.commits, pattern, range(0, 301)), 10)
+
+            pattern = re.compile(re.escape("abcdef"))
+            self.assertEqual(
+                self.index.findCommit(self.commits, pattern, range(0, 301)), -1)
+            commit.parents = ["abcdef"]
+            self.assertEqual(
+                self.index.findCommit(self.commits, pattern, range(0, 301)), 10)
@@ -1332,6 +1332,75 @@ class TestCommitWindow(TestBase):
         self.assertGreater(viewer.textLineCount(), 0)
         self.assertEqual(len(viewer._highlightFind), 3)
 
+    def testStatusAvailableInsertOnce(self):
+        self.waitForLoaded()
+        self.window._filesModel.clear()
+        self.window._stagedModel.clear()
+
+        spyFiles = QSignalSpy(self.window._filesModel.rowsInserted)
+        spyStaged = QSignalSpy(self.window._stagedModel.rowsInserted)
+        fileList = [("??", "a.txt", None),
+                    (" M", "b.txt", None),
+                    ("R ", "c.txt", "old.txt"),
+                    ("MM", "d.txt", None)]
+        self.window._onStatusAvailable(".", fileList)
+
+        self.assertEqual(spyFiles.count(), 1)
+        self.assertEqual(spyStaged.count(), 1)
+
+        filesModel = self.window._filesModel
+        self.assertEqual(filesModel.rowCount(), 3)
+        self.assertEqual([filesModel.data(filesModel.index(i, 0))
+                          for i in range(3)], ["a.txt", "b.txt", "d.txt"])
+
+        stagedModel = self.window._stagedModel
+        self.assertEqual(stagedModel.rowCount(), 2)
+        index = stagedModel.index(0, 0)
+        self.assertEqual(stagedModel.data(index), "c.txt")
+        self.assertEqual(stagedModel.data(
+            index, stagedModel.OldFileRole), "old.txt")
+
+        # nothing to insert
+        self.window._onStatusAvailable(".", [])
+        self.assertEqual(spyFiles.count(), 1)
+
+    def testStageRefetchesChangedRepoOnly(self):
+        self.waitForLoaded()
+
+        with open(os.path.join(self.gitDir.name, "test.txt"), "w+") as f:
+            f.write("test")
+
+        subRepoFile = os.path.join("subRepo", "test.py")
+        with open(os.path.join(self.gitDir.name, subRepoFile), "a+") as f:
+            f.write("# new line\n")
+
+        QTest.mouseClick(self.window.ui.tbRefresh, Qt.LeftButton)
+        self.waitForLoaded()
+
+        filesModel = self.window._filesModel
+        self.assertEqual(filesModel.rowCount(), 2)
+        row = filesModel.fileRow("test.txt", ".")
+        self.assertNotEqual(row, -1)
+
+        lvFiles = self.window.ui.lvFiles
+        lvFiles.selectionModel().select(
+            lvFiles.model().mapFromSource(filesModel.index(row, 0)),
+            QItemSelectionModel.ClearAndSelect)
+
+        spyFinished = QSignalSpy(self.window._submoduleExecutor.finished)
+        with patch.object(self.window._submoduleExecutor, "submit",
+                          wraps=self.window._submoduleExecutor.submit) as mockSubmit:
+            QTest.mouseClick(self.window.ui.tbStage, Qt.LeftButton)
+            self.assertEqual(mockSubmit.call_args[0][0], {".": ["test.txt"]})
+
+        # the file of the other repo is kept
+        self.assertEqual(filesModel.rowCount(), 1)
+        self.assertEqual(filesModel.fileRow(subRepoFile, "subRepo"), 0)
+
+        self.wait(10000, lambda: spyFinished.count() == 0)
+        self.assertEqual(filesModel.rowCount(), 1)
+        self.assertEqual(self.window._stagedModel.fileRow("test.txt", "."), 0)
+
 
 class TestHideUntrackedFiles(TestBase):
     """Test suite for hide untracked files feature"""
@@ -1,7 +1,12 @@
 import os
 import unittest
 
-from qgitc.common import extractFilePaths, isRevisionRange, pathsEqual
+from qgitc.common import (
+    Commit,
+    extractFilePaths,
+    isRevisionRange,
+    pathsEqual,
+)
 
 
 class TestCommon(unittest.TestCase):
@@ -105,3 +110,17 @@ class TestCommon(unittest.TestCase):
             with self.subTest(path1=path1, path2=path2):
                 self.assertEqual(pathsEqual(path1, path2), expected,
                                  f"pathsEqual({path1!r}, {path2!r}) should be {expected}")
+
+    def testCommitFromRawString(self):
+        raw = "a" * 40 + "\x01Fix\n\nbody\n\x01Foo <foo@bar.com>\x01" \
+            "2020-01-01 00:00:00 +0800\x01Foo <foo@bar.com>\x01" \
+            "2020-01-01 00:00:00 +0800\x01" + "b" * 40
+        commit = Commit.fromRawString(raw)
+        self.assertEqual(commit.comments, "Fix\n\nbody")
+        self.assertEqual(commit.parents, ["b" * 40])
+        self.assertIsNone(commit.fileName)
+
+        # the output of `--name-only`
+        commit = Commit.fromRawString(raw + "\nsub/a.py")
+        self.assertEqual(commit.parents, ["b" * 40])
+        self.assertEqual(commit.fileName, "sub/a.py")
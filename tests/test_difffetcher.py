@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import os
+import shutil
 import unittest
 
+from PySide6.QtCore import qInstallMessageHandler
+from shiboken6 import delete
+
 from qgitc.difffetcher import DiffFetcher
 from qgitc.diffutils import DiffType, FileState
 
@@ -799,3 +804,27 @@ class TestDiffFetcher(unittest.TestCase):
         lineItems, fileItems = self._parse_and_get_results(diff_data)
 
         self.assertIn('unicode.txt', fileItems)
+
+
+class TestDiffFetcherProcess(unittest.TestCase):
+
+    @unittest.skipIf(not shutil.which("sleep"), "no sleep command")
+    def test_kill_process_on_delete(self):
+        fetcher = DiffFetcher()
+        fetcher._ensureProcess()
+        process = fetcher._process
+        process.start(shutil.which("sleep"), ["10"])
+        self.assertTrue(process.waitForStarted())
+        pid = process.processId()
+
+        messages = []
+        qInstallMessageHandler(lambda mode, context, msg: messages.append(msg))
+        try:
+            delete(fetcher)
+        finally:
+            qInstallMessageHandler(None)
+
+        # killed and reaped before the process deleted
+        self.assertEqual(messages, [])
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
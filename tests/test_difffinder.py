@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import shutil
+from unittest.mock import patch
+
+from PySide6.QtCore import QObject, QProcess, Signal
+
+from qgitc.commitsource import CommitSource
+from qgitc.common import (
+    FIND_CANCELED,
+    FIND_REGEXP,
+    Commit,
+    FindField,
+    FindParameter,
+)
+from qgitc.difffinder import DiffFinder, FindWorker, _findCache
+from qgitc.gitutils import GitProcess
+from tests.base import TestBase
+
+
+class FakeFindWorker(QObject):
+
+    resultAvailable = Signal(list)
+    finished = Signal(int, QProcess.ExitStatus)
+
+    running = []
+
+    def __init__(self, submodule, parent=None):
+        super().__init__(parent)
+        self.submodule = submodule
+        self.sha1s = None
+        self.result = []
+
+    def find(self, sha1s, param, filterPath=None):
+        self.sha1s = sha1s
+        FakeFindWorker.running.append(self)
+
+    def cancel(self):
+        FakeFindWorker.running.remove(self)
+
+    def finish(self, result=None, exitCode=0):
+        FakeFindWorker.running.remove(self)
+        if result:
+            self.result = result
+            self.resultAvailable.emit(result)
+        self.finished.emit(exitCode, QProcess.NormalExit)
+
+
+class FakeCommitSource(CommitSource):
+
+    def __init__(self, commits):
+        super().__init__()
+        self._commits = commits
+
+    def getCommit(self, index):
+        return self._commits[index]
+
+    def getCount(self):
+        return len(self._commits)
+
+
+class TestDiffFinder(TestBase):
+
+    def doCreateRepo(self):
+        pass
+
+    def setUp(self):
+        super().setUp()
+        FakeFindWorker.running = []
+        _findCache.clear()
+
+        commits = []
+        for i in range(6):
+            commit = Commit(sha1="%040d" % i)
+            commit.repoDir = "."
+            subCommit = Commit(sha1="%040d" % (i + 100))
+            subCommit.repoDir = "sub%d" % i
+            commit.subCommits = [subCommit]
+            commits.append(commit)
+
+        self.commits = commits
+        self.submodules = ["."] + ["sub%d" % i for i in range(6)]
+        self.finder = DiffFinder(FakeCommitSource(commits))
+
+    def tearDown(self):
+        self.finder.reset()
+        super().tearDown()
+
+    def _findAsync(self):
+        param = FindParameter(range(3, 6), "foo",
+                              FindField.Changes, FIND_REGEXP)
+        self.finder.updateParameters(param, None, self.submodules)
+        return self.finder.findAsync()
+
+    def testBoundedFinders(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker), \
+                patch("qgitc.difffinder._MAX_FINDERS", 2):
+            self.assertTrue(self._findAsync())
+            self.assertTrue(self.finder.isRunning())
+
+            # target range first
+            running = [w.submodule for w in FakeFindWorker.running]
+            self.assertEqual(running, [".", "sub3"])
+
+            FakeFindWorker.running[1].finish(["%040d" % 103])
+            self.assertEqual(self.finder.findResult, [3])
+            running = [w.submodule for w in FakeFindWorker.running]
+            self.assertEqual(running, [".", "sub4"])
+
+            finished = []
+            self.finder.findFinished.connect(finished.append)
+            while FakeFindWorker.running:
+                self.assertLessEqual(len(FakeFindWorker.running), 2)
+                FakeFindWorker.running[0].finish()
+
+            self.assertFalse(self.finder.isRunning())
+            # found one, no notification
+            self.assertEqual(finished, [])
+
+    def testCancel(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker), \
+                patch("qgitc.difffinder._MAX_FINDERS", 2):
+            self.assertTrue(self._findAsync())
+            self.finder.cancel()
+
+            self.assertFalse(self.finder.isRunning())
+            self.assertEqual(FakeFindWorker.running, [])
+
+    def testShardCommits(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker), \
+                patch("qgitc.difffinder._MAX_FINDERS", 100), \
+                patch("qgitc.difffinder._FIND_CHUNK_SIZE", 2):
+            self.submodules = ["."]
+            self.assertTrue(self._findAsync())
+
+            shards = [w.sha1s for w in FakeFindWorker.running]
+            self.assertEqual(shards, [
+                ["%040d" % 3, "%040d" % 4],
+                ["%040d" % 5, "%040d" % 0],
+                ["%040d" % 1, "%040d" % 2],
+            ])
+
+            # results of later shards come first
+            FakeFindWorker.running[2].finish(["%040d" % 2])
+            FakeFindWorker.running[1].finish(["%040d" % 5])
+            self.assertEqual(self.finder.findResult, [2, 5])
+            self.assertEqual(self.finder.nextResult(), 5)
+
+    def testCachedResult(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker):
+            self.submodules = ["."]
+            self.assertTrue(self._findAsync())
+            FakeFindWorker.running[0].finish(["%040d" % 4])
+            self.assertEqual(self.finder.findResult, [4])
+
+            # reload the logs with a new commit
+            self.finder.reset()
+            commit = Commit(sha1="%040d" % 6)
+            commit.repoDir = "."
+            self.commits.insert(0, commit)
+
+            self.assertTrue(self._findAsync())
+            self.assertTrue(self.finder.isRunning())
+            self.assertEqual(len(FakeFindWorker.running), 1)
+            self.assertEqual(
+                FakeFindWorker.running[0].sha1s, ["%040d" % 6])
+            FakeFindWorker.running[0].finish()
+
+            self.wait(1000, lambda: self.finder.isRunning())
+            self.assertFalse(self.finder.isRunning())
+            self.assertEqual(self.finder.findResult, [5])
+
+            # nothing new to search
+            self.finder.reset()
+            finished = []
+            self.finder.findFinished.connect(finished.append)
+            self.assertTrue(self._findAsync())
+            self.assertEqual(FakeFindWorker.running, [])
+            self.wait(1000, lambda: self.finder.isRunning())
+            self.assertEqual(self.finder.findResult, [5])
+            self.assertEqual(finished, [])
+
+    def testCachePrunedAndBounded(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker):
+            self.submodules = ["."]
+            self.assertTrue(self._findAsync())
+            FakeFindWorker.running[0].finish(["%040d" % 4])
+            entry = next(iter(_findCache.values()))
+            self.assertEqual(len(entry.searched), 6)
+
+            # reload the logs with a commit rewritten
+            self.finder.reset()
+            commit = Commit(sha1="%040d" % 7)
+            commit.repoDir = "."
+            self.commits[4] = commit
+
+            self.assertTrue(self._findAsync())
+            self.assertEqual(len(entry.searched), 5)
+            self.assertEqual(entry.matched, set())
+            self.assertEqual(
+                FakeFindWorker.running[0].sha1s, ["%040d" % 7])
+            FakeFindWorker.running[0].finish()
+            self.assertEqual(len(entry.searched), 6)
+
+            # the old finds are dropped if too many commits cached
+            with patch("qgitc.difffinder._MAX_CACHED_SHA1S", 8):
+                param = FindParameter(range(3, 6), "bar",
+                                      FindField.Changes, FIND_REGEXP)
+                self.finder.updateParameters(param, None, self.submodules)
+                self.assertTrue(self.finder.findAsync())
+                FakeFindWorker.running[0].finish()
+
+            self.assertEqual(len(_findCache), 1)
+            self.assertIsNot(next(iter(_findCache.values())), entry)
+
+    def testFailedChunk(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker), \
+                patch("qgitc.difffinder._MAX_FINDERS", 1):
+            self.assertTrue(self._findAsync())
+            finished = []
+            self.finder.findFinished.connect(finished.append)
+
+            # such as an invalid pattern
+            FakeFindWorker.running[0].finish(exitCode=128)
+            while FakeFindWorker.running:
+                FakeFindWorker.running[0].finish()
+
+            self.assertFalse(self.finder.isRunning())
+            self.assertEqual(finished, [FIND_CANCELED])
+            # the failed one is not cached
+            self.assertEqual(sum(len(entry.searched)
+                             for entry in _findCache.values()), 6)
+
+    def testCancelWorker(self):
+        if not GitProcess.GIT_BIN:
+            GitProcess.GIT_BIN = shutil.which("git")
+
+        worker = FindWorker(None)
+        param = FindParameter(range(0, 1), "foo",
+                              FindField.Changes, FIND_REGEXP)
+        worker.find(["%040d" % 1], param)
+        process = worker._process
+        worker.cancel()
+        self.assertEqual(process.state(), QProcess.NotRunning)
+
+    def testResultMembership(self):
+        with patch("qgitc.difffinder.FindWorker", FakeFindWorker):
+            self.assertTrue(self._findAsync())
+            worker = FakeFindWorker.running[0]
+            # the main commit and its sub commit are in the same row
+            worker.resultAvailable.emit(["%040d" % 4, "%040d" % 104])
+            worker.resultAvailable.emit(["%040d" % 1, "%040d" % 5])
+
+            self.assertEqual(self.finder.findResult, [1, 4, 5])
+            self.assertTrue(self.finder.isResult(4))
+            self.assertFalse(self.finder.isResult(3))
+            self.assertEqual(self.finder.nextResult(), 4)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from PySide6.QtTest import QSignalSpy
+
+from qgitc.filestatus import StatusFileInfo, StatusFileListModel
+
+
+def _files(model: StatusFileListModel):
+    return [(model.data(model.index(i, 0)),
+             model.data(model.index(i, 0), StatusFileListModel.RepoDirRole))
+            for i in range(model.rowCount())]
+
+
+class TestStatusFileListModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = StatusFileListModel()
+        self.model.addFiles([
+            StatusFileInfo("a.txt", ".", "M"),
+            StatusFileInfo("b.txt", ".", "M"),
+            StatusFileInfo("sub/c.txt", "sub", "?"),
+            StatusFileInfo("sub/d.txt", "sub", "M"),
+            StatusFileInfo("e.txt", ".", "A"),
+        ])
+
+    def testFileRow(self):
+        self.assertEqual(self.model.fileRow("sub/c.txt", "sub"), 2)
+        self.assertEqual(self.model.fileRow("sub/c.txt", "."), -1)
+
+        info = self.model.removeFile("a.txt", ".")
+        self.assertEqual(info.file, "a.txt")
+        self.assertIsNone(self.model.removeFile("a.txt", "."))
+        self.assertEqual(self.model.fileRow("sub/c.txt", "sub"), 1)
+        self.assertEqual(self.model.fileRow("e.txt", "."), 3)
+
+    def testRemoveFiles(self):
+        spy = QSignalSpy(self.model.rowsRemoved)
+        removed = self.model.removeFiles([
+            ("e.txt", "."), ("a.txt", "."), ("b.txt", "."), ("x.txt", ".")])
+
+        self.assertEqual([info.file for info in removed],
+                         ["a.txt", "b.txt", "e.txt"])
+        # one for each contiguous range
+        self.assertEqual(spy.count(), 2)
+        self.assertEqual(_files(self.model),
+                         [("sub/c.txt", "sub"), ("sub/d.txt", "sub")])
+        self.assertEqual(self.model.fileRow("sub/d.txt", "sub"), 1)
+
+    def testRemoveRepoFiles(self):
+        spy = QSignalSpy(self.model.rowsRemoved)
+        removed = self.model.removeRepoFiles(["sub"])
+
+        self.assertEqual(len(removed), 2)
+        self.assertEqual(spy.count(), 1)
+        self.assertEqual(_files(self.model),
+                         [("a.txt", "."), ("b.txt", "."), ("e.txt", ".")])
+        self.assertEqual(self.model.fileRow("e.txt", "."), 2)
+
+        self.model.addFile("sub/c.txt", "sub", "?")
+        self.assertEqual(self.model.fileRow("sub/c.txt", "sub"), 3)
+
+        self.model.clear()
+        self.assertEqual(self.model.rowCount(), 0)
+        self.assertEqual(self.model.fileRow("a.txt", "."), -1)
@@ -129,6 +129,26 @@ class TestMarker(unittest.TestCase):
         self.assertTrue(self.marker.isMarked(36))
         self.assertTrue(self.marker.isMarked(40))
 
+    def test_unmark_indices(self):
+        """Test unmarking many indices at once"""
+        callback = []
+        marker = Marker(lambda: callback.append(1))
+        marker.mark(0, 9)
+        marker.mark(20, 29, MarkType.PICKED)
+        callback.clear()
+
+        marker.unmarkIndices([0, 3, 4, 9, 15, 21, 29, 40])
+        self.assertEqual(len(callback), 1)
+        self.assertEqual([(r.begin, r.end, r.markType) for r in marker._ranges],
+                         [(1, 2, MarkType.NORMAL),
+                          (5, 8, MarkType.NORMAL),
+                          (20, 20, MarkType.PICKED),
+                          (22, 28, MarkType.PICKED)])
+        self.assertEqual(marker.countMarked(), 14)
+
+        marker.unmarkIndices([])
+        self.assertEqual(len(callback), 1)
+
     def test_count_marked_empty(self):
         """Test counting with no marks"""
         self.assertEqual(self.marker.countMarked(), 0)
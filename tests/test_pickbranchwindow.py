@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 import os
+import re
+import unittest
 from unittest.mock import Mock, patch
 
 from PySide6.QtWidgets import QMessageBox
 
 from qgitc.gitutils import Git
-from qgitc.pickbranchwindow import CommitsAvailableEvent, PickBranchWindow
+from qgitc.pickbranchwindow import (
+    CommitsAvailableEvent,
+    PickBranchWindow,
+    _combineFilterPatterns,
+)
 from qgitc.windowtype import WindowType
 from tests.base import TestBase
 
@@ -561,3 +567,45 @@ class TestPickBranchWindow(TestBase):
         self.assertIsNotNone(self.window.ui.cbSourceBranch.completer())
         self.assertIsNotNone(self.window.ui.cbTargetBranch.completer())
         self.assertIsNotNone(self.window.ui.cbBaseBranch.completer())
+
+
+class TestCombineFilterPatterns(unittest.TestCase):
+
+    def testPlainText(self):
+        patterns = _combineFilterPatterns(["WIP", "a.b"], False)
+        self.assertEqual(len(patterns), 1)
+        self.assertTrue(patterns[0].search("fix: wip"))
+        self.assertTrue(patterns[0].search("update A.B"))
+        self.assertFalse(patterns[0].search("update axb"))
+
+    def testRegex(self):
+        patterns = _combineFilterPatterns(["^Merge", "fix(es)?$"], True)
+        self.assertEqual(len(patterns), 1)
+        self.assertTrue(patterns[0].search("Merge branch"))
+        self.assertTrue(patterns[0].search("some fixes"))
+        self.assertFalse(patterns[0].search("Not Merge"))
+
+        # can't be combined
+        patterns = _combineFilterPatterns(["(a)\\1", "b"], True)
+        self.assertEqual(len(patterns), 2)
+        patterns = _combineFilterPatterns(["(?i)wip", "b"], True)
+        self.assertEqual(len(patterns), 2)
+        self.assertTrue(patterns[0].search("WIP"))
+        self.assertFalse(patterns[1].search("B"))
+
+        patterns = _combineFilterPatterns(
+            ["(?P<id>WIP)", "(?P<id>fixup)"], True)
+        self.assertEqual(len(patterns), 2)
+        self.assertTrue(patterns[1].search("fixup! foo"))
+        patterns = _combineFilterPatterns(["(x)", "(a)?(?(1)b|c)"], True)
+        self.assertEqual(len(patterns), 2)
+        self.assertTrue(any(p.search("ab") for p in patterns))
+
+        # the scoped flags are fine
+        patterns = _combineFilterPatterns(["(?i:wip)", "b"], True)
+        self.assertEqual(len(patterns), 1)
+        self.assertTrue(patterns[0].search("WIP"))
+        self.assertFalse(patterns[0].search("B"))
+
+        with self.assertRaises(re.error):
+            _combineFilterPatterns(["(a", "b"], True)
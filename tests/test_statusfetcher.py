@@ -1,9 +1,10 @@
 
 import os
+import unittest
 from unittest.mock import MagicMock, patch
 
 from qgitc.gitutils import Git
-from qgitc.statusfetcher import _fetchStatusGit
+from qgitc.statusfetcher import UntrackedFilter, _fetchStatusGit
 from tests.base import TestBase
 
 
@@ -126,3 +127,48 @@ class TestStatusFetcher(TestBase):
         self.assertIsNone(submodule)
         self.assertIsNone(status)
 
+    def testGitStatusUntrackedFilter(self):
+        os.makedirs(os.path.join(self.gitDir.name, "build", "out"))
+        for file in ["a.txt", "b.txt", os.path.join("build", "out", "c.o")]:
+            with open(os.path.join(self.gitDir.name, file), "w") as f:
+                f.write("test")
+        with open(os.path.join(self.gitDir.name, "README.md"), "a+") as f:
+            f.write("Test content")
+
+        cancelEvent = MagicMock()
+        cancelEvent.isSet.return_value = False
+
+        untrackedFilter = UntrackedFilter(["a.txt", "README.md"], ["build"])
+        submodule, status = _fetchStatusGit(
+            ".", cancelEvent, untrackedFilter=untrackedFilter)
+        self.assertEqual(submodule, ".")
+        # the tracked files are never hidden
+        self.assertEqual(sorted(file for _, file, _ in status),
+                         ["README.md", "b.txt"])
+
+
+class TestUntrackedFilter(unittest.TestCase):
+
+    def testIsHidden(self):
+        untrackedFilter = UntrackedFilter(
+            ["a.txt", os.path.join("src", "b.txt")],
+            [os.path.join("build", "out"), "tmp" + os.sep])
+
+        self.assertFalse(untrackedFilter.isEmpty())
+        self.assertTrue(untrackedFilter.isHidden("a.txt"))
+        self.assertTrue(untrackedFilter.isHidden(os.path.join("src", "b.txt")))
+        self.assertFalse(untrackedFilter.isHidden("b.txt"))
+        self.assertFalse(untrackedFilter.isHidden("src"))
+        self.assertFalse(untrackedFilter.isHidden(os.path.join("src", "a.txt")))
+
+        self.assertTrue(untrackedFilter.isHidden(
+            os.path.join("build", "out", "c.o")))
+        self.assertTrue(untrackedFilter.isHidden(
+            os.path.join("build", "out", "sub", "d.o")))
+        self.assertTrue(untrackedFilter.isHidden(os.path.join("tmp", "e")))
+        # the directory itself is not under it
+        self.assertFalse(untrackedFilter.isHidden(os.path.join("build", "out")))
+        self.assertFalse(untrackedFilter.isHidden(os.path.join("build", "c.o")))
+        self.assertFalse(untrackedFilter.isHidden(os.path.join("outer", "c.o")))
+
+        self.assertTrue(UntrackedFilter().isEmpty())
@@ -2,10 +2,18 @@
 import re
 import unittest
 from typing import List
-
-from PySide6.QtGui import QTextLayout
-
-from qgitc.textline import Link, SourceTextLineBase, TextLine
+from unittest.mock import patch
+
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QFont, QFontDatabase, QTextLayout, QTextOption
+
+from qgitc.textline import (
+    Link,
+    SourceTextLineBase,
+    TextLine,
+    fontMonoMetrics,
+    invalidateHighlightCache,
+)
 from tests.base import TestBase
 
 
@@ -175,3 +183,112 @@ class TestFormatRange(TestBase):
         self.assertEqual(1, len(links))
         self.assertEqual(links[0].start, 3)
         self.assertEqual(links[0].length, 6)
+
+
+class TestTextLineMonospace(TestBase):
+
+    def doCreateRepo(self):
+        pass
+
+    def _assertSameAsLayout(self, text, font):
+        fastLine = TextLine(text, font)
+        layoutLine = TextLine(text, font)
+        layoutLine.ensureLayout()
+
+        self.assertEqual(fastLine.boundingRect(), layoutLine.boundingRect())
+        for offset in range(len(text) + 1):
+            self.assertAlmostEqual(fastLine.offsetToX(offset),
+                                   layoutLine.offsetToX(offset))
+
+        advance = fastLine.offsetToX(1) if text else 1
+        for i in range(len(text) * 4 + 4):
+            pos = QPointF(i * advance / 4, 0)
+            self.assertEqual(fastLine.offsetForPos(pos),
+                             layoutLine.offsetForPos(pos))
+
+    def testFastPath(self):
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        if not fontMonoMetrics(font):
+            self.skipTest("No monospace font available")
+
+        text = "def foo(bar): return bar + 1  # comment"
+        textLine = TextLine(text, font)
+        textLine.boundingRect()
+        textLine.offsetForPos(QPointF(10, 0))
+        textLine.offsetToX(5)
+        # no layout required for plain ASCII
+        self.assertIsNone(textLine._layout)
+
+        self._assertSameAsLayout(text, font)
+        self._assertSameAsLayout("", font)
+
+    def testFallbackToLayout(self):
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+
+        for text in ["\tindent", "Hello 🤩 world", "中文"]:
+            textLine = TextLine(text, font)
+            textLine.boundingRect()
+            self.assertIsNotNone(textLine._layout)
+
+        font = QFont(self.app.font())
+        font.setFixedPitch(False)
+        if not fontMonoMetrics(font):
+            textLine = TextLine("abc", font)
+            textLine.boundingRect()
+            self.assertIsNotNone(textLine._layout)
+
+
+class TestHighlightCache(TestBase):
+
+    def doCreateRepo(self):
+        pass
+
+    def setUp(self):
+        super().setUp()
+        invalidateHighlightCache()
+
+    def _newLine(self, text):
+        option = QTextOption()
+        option.setFlags(QTextOption.ShowTabsAndSpaces)
+        return SourceTextLineBase(text, self.app.font(), option)
+
+    def testReuseFormats(self):
+        text = "def foo(): # see abc1234"
+        textLine = self._newLine(text)
+        textLine.ensureLayout()
+        formats = textLine.layout().formats()
+        self.assertEqual(len(formats), 5)
+
+        with patch.object(SourceTextLineBase, "_applyWhitespaces") as apply, \
+                patch.object(TextLine, "findLinks") as findLinks:
+            textLine2 = self._newLine(text)
+            textLine2.ensureLayout()
+            apply.assert_not_called()
+            findLinks.assert_not_called()
+
+        formats2 = textLine2.layout().formats()
+        self.assertEqual(len(formats2), len(formats))
+        for f1, f2 in zip(formats, formats2):
+            self.assertEqual(f1.start, f2.start)
+            self.assertEqual(f1.length, f2.length)
+        self.assertEqual(len(textLine2._links), 1)
+
+    def testDifferentOptions(self):
+        text = "a b"
+        textLine = self._newLine(text)
+        textLine.ensureLayout()
+        self.assertEqual(len(textLine.layout().formats()), 1)
+
+        textLine2 = SourceTextLineBase(text, self.app.font(), QTextOption())
+        textLine2.ensureLayout()
+        self.assertEqual(len(textLine2.layout().formats()), 0)
+
+    def testInvalidate(self):
+        textLine = self._newLine("a b")
+        textLine.ensureLayout()
+
+        invalidateHighlightCache()
+        with patch.object(SourceTextLineBase, "_applyWhitespaces") as apply:
+            textLine2 = self._newLine("a b")
+            textLine2.ensureLayout()
+            apply.assert_called_once()
@@ -7,12 +7,15 @@ and QTextLayout overhead on 100k+ char lines (e.g. minified JS in diffs).
 import time
 from unittest.mock import patch
 
+from PySide6.QtGui import QFontDatabase
+
 from qgitc.textline import (
     _MAX_DISPLAY_CHARS,
     _MAX_LINK_SCAN_LEN,
     _TRUNCATED_SUFFIX,
     Link,
     TextLine,
+    fontMonoMetrics,
 )
 from tests.base import TestBase
 
@@ -86,6 +89,34 @@ class TestTextLinePerformance(TestBase):
         self.assertIn(Link.Email, types)
         self.assertIn(Link.Url, types)
 
+    def test_findLongLineLinks(self):
+        """findLongLineLinks finds the links across the scan windows."""
+        patterns = []
+        for linkType, pattern in TextLine.builtinPatterns().items():
+            patterns.append((linkType, pattern, None))
+
+        prefix = "x" * (_MAX_LINK_SCAN_LEN - 4)
+        long_text = prefix + " abc1234 foo@bar.com " + \
+            "y" * 100000 + " https://example.com/a1b2c3d"
+
+        elapsed, links = self._time_ms(
+            lambda: TextLine.findLongLineLinks(long_text, patterns))
+        self.assertLess(elapsed, _SINGLE_LINE_MAX_MS * 5,
+                        f"findLongLineLinks took {elapsed:.0f}ms")
+        self.assertEqual([(Link.Sha1, "abc1234"),
+                          (Link.Email, "foo@bar.com"),
+                          (Link.Url, "https://example.com/a1b2c3d")],
+                         [(link.type, link.data) for link in links])
+        self.assertEqual(links[0].start, len(prefix) + 1)
+
+        # a hex run broken by the window is not a sha1
+        long_text = "z" + "a" * (_MAX_LINK_SCAN_LEN * 3)
+        self.assertEqual(
+            [], TextLine.findLongLineLinks(long_text, patterns))
+
+        self.assertIsNone(TextLine.findLongLineLinks(
+            long_text, patterns, lambda: True))
+
     # ------------------------------------------------------------------
     # TextLine construction + ensureLayout on very long text
     # ------------------------------------------------------------------
@@ -163,3 +194,29 @@ class TestTextLinePerformance(TestBase):
         # Position beyond display range is silently capped
         pos_out = _MAX_DISPLAY_CHARS + 500
         self.assertEqual(tl.mapToUtf16(pos_out), _MAX_DISPLAY_CHARS)
+
+    # ------------------------------------------------------------------
+    # Monospace fast path
+    # ------------------------------------------------------------------
+
+    def test_textline_measure_many_lines_monospace(self):
+        """Measuring plain ASCII lines in monospace font needs no layout."""
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        if not fontMonoMetrics(font):
+            self.skipTest("No monospace font available")
+
+        texts = ["    self._value = compute(%d)  # comment" % i
+                 for i in range(10000)]
+
+        def _measure():
+            lines = []
+            for text in texts:
+                tl = TextLine(text, font)
+                tl.boundingRect()
+                lines.append(tl)
+            return lines
+
+        elapsed, lines = self._time_ms(_measure)
+        self.assertTrue(all(tl._layout is None for tl in lines))
+        self.assertLess(elapsed, _SINGLE_LINE_MAX_MS * 5,
+                        f"measuring 10k lines took {elapsed:.0f}ms")
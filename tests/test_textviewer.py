@@ -3,10 +3,11 @@ import time
 
 from PySide6.QtCore import QPointF, Qt
 from PySide6.QtTest import QSignalSpy, QTest
+from PySide6.QtWidgets import QWidget
 
 from qgitc.findconstants import FindFlags, FindPart
-from qgitc.textline import SourceTextLineBase, TextLine
-from qgitc.textviewer import TextViewer
+from qgitc.textline import _MAX_LINK_SCAN_LEN, Link, SourceTextLineBase, TextLine
+from qgitc.textviewer import TextViewer, _runningThreads
 from tests.base import TestBase
 
 
@@ -486,3 +487,153 @@ class TestTextViewer(TestBase):
         # Verify highlights are cleared
         self.assertEqual(len(self.viewer._highlightFind), 0)
         self.assertEqual(self.viewer.findWidget._findResult, [])
+
+    def testLazyTextLines(self):
+        self.viewer.resize(400, 200)
+        self.viewer.show()
+        lines = [f"Line {i}" for i in range(50000)]
+        lines[40000] = "x" * 200
+        self.viewer.appendLines(lines)
+        self.processEvents()
+
+        self.assertEqual(self.viewer.textLineCount(), 50000)
+        # only the lines around the viewport are converted
+        self.assertLess(len(self.viewer._cachedLines), 1000)
+
+        # estimated by the longest line without laying it out
+        hbar = self.viewer.horizontalScrollBar()
+        self.assertGreater(hbar.maximum(), 0)
+
+        textLine = self.viewer.textLineAt(40000)
+        self.assertEqual(textLine.text(), "x" * 200)
+        self.assertEqual(textLine.lineNo(), 40000)
+
+        for i in range(0, 50000, 5):
+            self.viewer.textLineAt(i)
+        self.assertLessEqual(len(self.viewer._cachedLines), 4096)
+
+        # evicted line is converted again
+        textLine = self.viewer.textLineAt(1)
+        self.assertEqual(textLine.text(), "Line 1")
+        self.assertEqual(textLine.lineNo(), 1)
+
+    def testReloadSettingsInBackground(self):
+        for i in range(5000):
+            self.viewer.appendTextLine(TextLine(f"Line {i}", self.viewer.font()))
+        self.viewer.appendLines(["raw line"])
+        self.viewer.textLineAt(5000)
+
+        reloaded = []
+        reloadTextLine = self.viewer._reloadTextLine
+
+        def _reloadTextLine(textLine):
+            reloaded.append(textLine.lineNo())
+            reloadTextLine(textLine)
+
+        self.viewer._reloadTextLine = _reloadTextLine
+        self.viewer._onUpdateSettings()
+
+        # nothing reloaded synchronously
+        self.assertEqual(reloaded, [])
+        self.assertEqual(len(self.viewer._staleLines), 5000)
+        # converted lines are dropped instead of reloaded
+        self.assertEqual(len(self.viewer._cachedLines), 0)
+
+        # the line in use is reloaded immediately
+        self.viewer.textLineAt(100)
+        self.assertEqual(reloaded, [100])
+
+        # settings changed again, the pending ones restart
+        self.viewer._onUpdateSettings()
+        self.assertEqual(len(self.viewer._staleLines), 5000)
+
+        self.wait(3000, lambda: self.viewer._staleLines)
+        self.assertEqual(len(self.viewer._staleLines), 0)
+        self.assertIsNone(self.viewer._reloadTimerId)
+        self.assertEqual(len(reloaded), 5001)
+
+    def testFindAsyncWithoutTextLines(self):
+        self.viewer.resize(400, 200)
+        lines = [f"Line {i} match" if i %
+                 100 == 0 else f"Line {i}" for i in range(100000)]
+        self.viewer.appendLines(lines)
+
+        spyFindResult = QSignalSpy(self.viewer.findResultAvailable)
+        spyFindFinished = QSignalSpy(self.viewer.findFinished)
+        self.assertTrue(self.viewer.findAllAsync("match", 0))
+
+        self.wait(10000, lambda: spyFindFinished.count() == 0)
+        self.assertEqual(spyFindFinished.count(), 1)
+
+        found = 0
+        for i in range(spyFindResult.count()):
+            found += len(spyFindResult.at(i)[0])
+        self.assertEqual(found, 1000)
+
+        # only the lines of current page were converted
+        self.assertLess(len(self.viewer._cachedLines), 100)
+
+    def testCancelFindAsync(self):
+        lines = [f"Line {i}" for i in range(100000)]
+        self.viewer.appendLines(lines)
+
+        spyFindResult = QSignalSpy(self.viewer.findResultAvailable)
+        spyFindFinished = QSignalSpy(self.viewer.findFinished)
+        self.assertTrue(self.viewer.findAllAsync("Line", 0))
+        self.viewer.cancelFind()
+        self.assertEqual(spyFindFinished.count(), 1)
+
+        count = spyFindResult.count()
+        self.wait(200)
+        # no more results after cancelled
+        self.assertEqual(spyFindResult.count(), count)
+        self.assertEqual(spyFindFinished.count(), 1)
+
+    def testScanLinksOfLongLine(self):
+        text = "x" * _MAX_LINK_SCAN_LEN + " see abc1234"
+        self.viewer.appendLines(["short abc1234", text])
+        self.viewer.resize(400, 300)
+        self.viewer.show()
+        self.viewer.repaint()
+
+        textLine = self.viewer.textLineAt(1)
+        self.wait(3000, lambda: not textLine._links)
+        self.assertEqual(len(textLine._links), 1)
+        self.assertEqual(textLine._links[0].type, Link.Sha1)
+        self.assertEqual(textLine._links[0].start, len(text) - 7)
+        self.assertIsNone(textLine.requestLinkScan())
+
+        # the scanned links are reused by the same text
+        self.viewer.clear()
+        self.viewer.appendLines([text])
+        textLine = self.viewer.textLineAt(0)
+        textLine.ensureLayout()
+        self.assertEqual(len(textLine._links), 1)
+        self.assertIsNone(textLine.requestLinkScan())
+
+    def testDeleteWhileThreadsRunning(self):
+        window = QWidget()
+        window.setAttribute(Qt.WA_DeleteOnClose, True)
+        viewer = TextViewer(window)
+        viewer.resize(400, 300)
+        window.resize(400, 300)
+        window.show()
+
+        text = "x" * _MAX_LINK_SCAN_LEN * 20 + " see abc1234"
+        viewer.appendLines([text] + [f"Line {i}" for i in range(100000)])
+        self.processEvents()
+        viewer.repaint()
+        self.assertTrue(viewer.findAllAsync("Line", 0))
+
+        self.assertIsNotNone(viewer._linkScanThread)
+        self.assertIsNone(viewer._linkScanThread.parent())
+        self.assertIsNone(viewer._findThread.parent())
+
+        window.close()
+        del viewer
+        del window
+        self.processEvents()
+
+        # kept until finished
+        self.wait(3000, lambda: len(_runningThreads) > 0)
+        self.assertEqual(len(_runningThreads), 0)